@@ -1,26 +1,51 @@
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from flask_mail import Mail
-from flask_migrate import Migrate  
 
 db = SQLAlchemy()
 login_manager = LoginManager()
-mail = Mail()
-migrate = Migrate()  
+# Flask-Mail se configura con el primer envío (ver correo.py) y Flask-Migrate
+# solo desde la consola: ninguno de los dos se importa al arrancar un worker
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     app.config.from_object("app.config.Config")
+    if config:
+        app.config.update(config)
+
+    # Pool, timeouts y pragmas según el motor (SQLite o PostgreSQL)
+    from .motor import opciones_motor, registrar_pragmas
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = opciones_motor(app.config)
+
+    # Los archivos subidos se escriben a disco en bloques mientras se hashean
+    from .almacenamiento import SubidaRequest
+    app.request_class = SubidaRequest
+    # url_for('static') con huella de contenido, si se corrió `flask construir-estaticos`
+    from .estaticos import registrar_estaticos
+    registrar_estaticos(app)
 
     db.init_app(app)
+    from .metricas import registrar_metricas
+    with app.app_context():
+        registrar_pragmas(db.engine, app.config)
+        # Tiempos y SQL por endpoint, solo si METRICAS_HABILITADAS
+        registrar_metricas(app, db.engine)
     login_manager.init_app(app)
-    mail.init_app(app)
-    migrate.init_app(app, db)  
+    if click.get_current_context(silent=True) is not None:
+        # `flask db ...` y demás comandos: Flask-Migrate trae Alembic entero
+        # (unos 200 ms de imports) y el servidor web nunca lo usa
+        from flask_migrate import Migrate
+        # La tabla FTS5 de búsqueda no es un modelo: que Alembic no la toque
+        from .busqueda import excluir_de_migraciones
+        Migrate(app, db, include_object=excluir_de_migraciones)
 
     login_manager.login_view = "main.login"
 
-    from . import routes, models   
+    from . import routes
     app.register_blueprint(routes.main)
 
+    from .comandos import registrar_comandos
+    registrar_comandos(app)
+
     return app
@@ -0,0 +1,212 @@
+# almacenamiento.py
+# Archivos de los cursos guardados por contenido: cada upload se escribe a disco
+# en bloques mientras se calcula su SHA-256, y el contenido se guarda una sola vez
+# en uploads/<2 primeros>/<sha256><ext> aunque se suba en varios cursos.
+# BlobArchivo.referencias cuenta cuántos Archivo apuntan a cada contenido.
+# uploads/ vive en una carpeta privada (ARCHIVOS_RAIZ, por defecto instance/),
+# nunca bajo static/: solo se descarga por /archivo/<id>/descargar, que controla
+# el acceso. Archivo.ruta y BlobArchivo.ruta son relativas a esa carpeta.
+import hashlib
+import os
+import shutil
+import tempfile
+
+from flask import Request, current_app
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from . import db
+from .models import BlobArchivo
+
+TAMANO_BLOQUE = 1024 * 1024
+
+
+def raiz_archivos():
+    """Carpeta privada con los archivos de los cursos."""
+    return current_app.config["ARCHIVOS_RAIZ"] or current_app.instance_path
+
+
+def ruta_archivo(ruta):
+    """Ruta en disco de un Archivo/BlobArchivo a partir de su ruta relativa."""
+    return os.path.join(raiz_archivos(), ruta)
+
+
+def directorio_subidas():
+    return ruta_archivo("uploads")
+
+
+class ArchivoConHash:
+    """Archivo temporal que va calculando el SHA-256 a medida que se escribe."""
+
+    def __init__(self, directorio):
+        os.makedirs(directorio, exist_ok=True)
+        fd, self.ruta_temporal = tempfile.mkstemp(dir=directorio, prefix=".subida-")
+        self._archivo = os.fdopen(fd, "w+b")
+        self._hash = hashlib.sha256()
+        self._conservado = False
+        self.tamano = 0
+
+    def write(self, datos):
+        self._hash.update(datos)
+        self.tamano += len(datos)
+        return self._archivo.write(datos)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def conservar_en(self, destino):
+        """Mueve el temporal a su ubicación final (rename, sin copiar datos)."""
+        self._archivo.close()
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        os.replace(self.ruta_temporal, destino)
+        self._conservado = True
+
+    def close(self):
+        self._archivo.close()
+        if not self._conservado and os.path.exists(self.ruta_temporal):
+            os.remove(self.ruta_temporal)
+
+    def __getattr__(self, nombre):
+        # read, seek, tell, flush, etc. van directo al archivo
+        return getattr(self._archivo, nombre)
+
+
+class SubidaRequest(Request):
+    """Request que escribe los archivos subidos directo a disco, hasheando al vuelo."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return ArchivoConHash(directorio_subidas())
+
+
+def guardar_subida(archivo_subido):
+    """Guarda un FileStorage y devuelve su BlobArchivo con una referencia más.
+
+    Si el contenido ya existía no se escribe otra copia. Los cambios en la base
+    quedan en la sesión; los confirma quien llama.
+    """
+    flujo = archivo_subido.stream
+    if not isinstance(flujo, ArchivoConHash):
+        # El archivo no vino por SubidaRequest: se copia en bloques hasheando
+        flujo = _copiar_hasheando(flujo)
+    return _registrar_contenido(flujo, archivo_subido.filename)
+
+
+def _copiar_hasheando(origen):
+    copia = ArchivoConHash(directorio_subidas())
+    shutil.copyfileobj(origen, copia, TAMANO_BLOQUE)
+    return copia
+
+
+def _registrar_contenido(flujo, nombre_archivo):
+    sha256 = flujo.hexdigest()
+    blob = db.session.get(BlobArchivo, sha256)
+    if blob is not None and _sumar_referencia(sha256):
+        flujo.close()
+        return blob
+
+    # Contenido nuevo, o un liberar_blob concurrente borró el blob (y su archivo)
+    # después de leerlo: se escribe el archivo y se vuelve a crear la fila
+    extension = os.path.splitext(nombre_archivo or "")[1].lower()[:10]
+    ruta = f"uploads/{sha256[:2]}/{sha256}{extension}"
+    try:
+        # Si otro request sube el mismo contenido a la vez, escribe los mismos bytes
+        flujo.conservar_en(ruta_archivo(ruta))
+        if _insertar_blob(sha256, ruta, flujo.tamano):
+            # Si la transacción no se confirma, el archivo queda huérfano: se borra
+            db.session.info.setdefault("subidas_nuevas", set()).add(ruta)
+        blob = db.session.get(BlobArchivo, sha256, populate_existing=True)
+        if blob.ruta != ruta:
+            # Ganó otra subida con otra extensión: esta copia sobra
+            borrar_fisico(ruta)
+        if not _sumar_referencia(sha256):
+            raise RuntimeError(f"El contenido {sha256} se borró mientras se subía")
+    except Exception:
+        flujo.close()
+        raise
+    return blob
+
+
+def _sumar_referencia(sha256):
+    """Suma una referencia al blob; False si la fila ya no existe."""
+    resultado = db.session.execute(
+        update(BlobArchivo)
+        .where(BlobArchivo.sha256 == sha256)
+        .values(referencias=BlobArchivo.referencias + 1)
+    )
+    return resultado.rowcount == 1
+
+
+def _insertar_blob(sha256, ruta, tamano):
+    """INSERT del blob que no hace nada si otra subida concurrente ya lo creó.
+
+    Devuelve True si la fila la creó esta subida.
+    """
+    valores = {"sha256": sha256, "ruta": ruta, "tamano": tamano, "referencias": 0}
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto in ("sqlite", "postgresql"):
+        if dialecto == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as insert_dialecto
+        else:
+            from sqlalchemy.dialects.postgresql import insert as insert_dialecto
+        resultado = db.session.execute(insert_dialecto(BlobArchivo).values(**valores).on_conflict_do_nothing())
+        return resultado.rowcount == 1
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(BlobArchivo).values(**valores))
+    except IntegrityError:
+        return False
+    return True
+
+
+@event.listens_for(db.session, "after_commit")
+def _confirmar_subidas(session):
+    session.info.pop("subidas_nuevas", None)
+
+
+@event.listens_for(db.session, "after_transaction_end")
+def _borrar_subidas_descartadas(session, transaccion):
+    # Rollback, o sesión cerrada sin commit (error en la vista): el archivo no
+    # quedó registrado en ninguna fila
+    if transaccion.parent is None:
+        for ruta in session.info.pop("subidas_nuevas", ()):
+            borrar_fisico(ruta)
+
+
+def liberar_blob(sha256):
+    """Quita una referencia al contenido.
+
+    Si era la última, borra la fila del blob y devuelve la ruta del archivo
+    físico, que hay que eliminar después del commit (ver borrar_fisico).
+    """
+    db.session.execute(
+        update(BlobArchivo)
+        .where(BlobArchivo.sha256 == sha256)
+        .values(referencias=BlobArchivo.referencias - 1)
+    )
+    referencias, ruta = db.session.execute(
+        select(BlobArchivo.referencias, BlobArchivo.ruta).where(BlobArchivo.sha256 == sha256)
+    ).one()
+    if referencias > 0:
+        return None
+    db.session.execute(BlobArchivo.__table__.delete().where(BlobArchivo.sha256 == sha256))
+    return ruta
+
+
+def borrar_fisico(ruta):
+    ruta_completa = ruta_archivo(ruta)
+    if os.path.exists(ruta_completa):
+        os.remove(ruta_completa)
+
+
+def indexar_archivo_existente(archivo):
+    """Pasa un Archivo subido antes del almacenamiento por contenido al nuevo esquema.
+
+    Devuelve la ruta completa del archivo viejo, que se puede borrar tras el commit.
+    """
+    ruta_vieja = ruta_archivo(archivo.ruta)
+    with open(ruta_vieja, "rb") as origen:
+        copia = _copiar_hasheando(origen)
+
+    blob = _registrar_contenido(copia, archivo.ruta)
+    archivo.ruta, archivo.sha256, archivo.tamano = blob.ruta, blob.sha256, blob.tamano
+    return ruta_vieja
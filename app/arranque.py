@@ -0,0 +1,51 @@
+# arranque.py
+# Arranque en producción con un proceso padre que arma la app una sola vez y
+# workers creados con fork() (gunicorn con preload_app, ver gunicorn.conf.py).
+#   - precalentar(): en el padre, antes del fork. Lo que se hace acá lo
+#     heredan todos los workers en vez de pagarlo cada uno en su primer request.
+#   - despues_de_fork(): en cada worker, apenas nace.
+#   - verificar_backends(): en el padre, corta el arranque si hay varios workers
+#     y algún estado compartido quedó en memoria (uno distinto por proceso).
+# Los hilos y pools de la app (cola de correos, volcado de borradores, pool de
+# hash de contraseñas) se crean con el primer uso, así que en el padre no corre
+# ninguno y cada worker arranca los suyos.
+from sqlalchemy.orm import configure_mappers
+
+from . import db
+
+# Estado que tiene que ser uno solo para todos los workers
+BACKENDS_COMPARTIDOS = ("BORRADORES_BACKEND", "LIMITES_BACKEND", "CACHE_BACKEND")
+
+
+def precalentar(app):
+    """Configura los mappers, compila las plantillas y el mapa de URLs."""
+    configure_mappers()
+    for nombre in app.jinja_env.list_templates():
+        app.jinja_env.get_template(nombre)
+    app.url_map.update()
+
+
+def despues_de_fork(app):
+    """Deja listo un worker que heredó la app ya armada."""
+    with app.app_context():
+        # Las conexiones heredadas del padre no se pueden compartir entre
+        # procesos: se olvidan sin cerrarlas (cerrarlas cortaría las del padre)
+        # y el worker abre las suyas
+        db.engine.dispose(close=False)
+
+
+def verificar_backends(app, workers):
+    """Falla si con más de un worker algún backend compartido es "memoria".
+
+    Cada proceso tendría el suyo: borradores que se pisan con versiones viejas,
+    límites de login multiplicados por la cantidad de workers y cachés que se
+    invalidan en un solo worker.
+    """
+    if workers <= 1:
+        return
+    en_memoria = [clave for clave in BACKENDS_COMPARTIDOS if app.config[clave] == "memoria"]
+    if en_memoria:
+        raise RuntimeError(
+            f"Con {workers} workers estos backends no pueden ser \"memoria\": {', '.join(en_memoria)}. "
+            "Usar redis (CACHE_REDIS_URL) o GUNICORN_WORKERS=1"
+        )
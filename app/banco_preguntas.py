@@ -0,0 +1,309 @@
+# banco_preguntas.py
+# Importación de bancos de preguntas completos (JSON, CSV o GIFT) a un examen.
+# Primero se lee y valida todo el banco: si hay errores no se escribe nada.
+# Después preguntas y opciones entran con dos INSERT en lote y un solo commit
+# (más la versión del examen y el índice de búsqueda, en la misma transacción).
+import csv
+import io
+import json
+import os
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy import insert
+
+from . import db
+from .busqueda import indexar_preguntas
+from .examenes import nueva_version_examen
+from .models import MascaraOpciones, Opcion, Pregunta
+
+PreguntaBanco = namedtuple("PreguntaBanco", "texto tipo opciones origen")  # opciones: ((texto, es_correcta), ...)
+
+FORMATOS = ("json", "csv", "gift")
+EXTENSIONES = {".json": "json", ".csv": "csv", ".gift": "gift", ".txt": "gift"}
+TIPOS = ("multiple", "abierta")
+MAX_TEXTO_OPCION = 255  # Opcion.texto es String(255)
+MAX_OPCIONES = MascaraOpciones.MAX_OPCIONES  # las elegidas se guardan como máscara de bits
+# Valores aceptados como texto en "correcta" (cualquier otro es un error, no True)
+VALORES_BOOLEANOS = {
+    "true": True, "1": True, "si": True, "sí": True, "verdadero": True,
+    "false": False, "0": False, "no": False, "falso": False, "": False,
+}
+
+
+class BancoInvalido(ValueError):
+    """El banco no se puede importar; `errores` lista cada problema encontrado."""
+
+    def __init__(self, errores):
+        super().__init__(f"{len(errores)} errores en el banco de preguntas")
+        self.errores = errores
+
+
+def formato_por_nombre(nombre_archivo):
+    """Formato según la extensión del archivo (None si no se reconoce)."""
+    return EXTENSIONES.get(os.path.splitext(nombre_archivo or "")[1].lower())
+
+
+# ------------------- Lectores -------------------
+
+def leer_json(texto):
+    """Lista de {"texto", "tipo", "opciones": [{"texto", "correcta"}]} (o {"preguntas": [...]})."""
+    try:
+        datos = json.loads(texto)
+    except json.JSONDecodeError as error:
+        raise BancoInvalido([f"JSON inválido: {error}"])
+    if isinstance(datos, dict):
+        datos = datos.get("preguntas")
+    if not isinstance(datos, list):
+        raise BancoInvalido(["Se esperaba una lista de preguntas"])
+
+    preguntas, errores = [], []
+    for numero, item in enumerate(datos, start=1):
+        if not isinstance(item, dict):
+            errores.append(f"Pregunta {numero}: se esperaba un objeto")
+            continue
+        crudas = item.get("opciones")
+        if crudas is None:
+            crudas = []
+        elif not isinstance(crudas, list):
+            # Un texto o un objeto se recorrería letra por letra o clave por clave
+            errores.append(f"Pregunta {numero}: 'opciones' debe ser una lista")
+            continue
+        opciones = []
+        for indice, opcion in enumerate(crudas, start=1):
+            origen = f"Pregunta {numero}, opción {indice}"
+            if isinstance(opcion, str):
+                opciones.append((opcion, False))
+                continue
+            if not isinstance(opcion, dict) or not isinstance(opcion.get("texto", ""), str):
+                errores.append(f"{origen}: se esperaba un texto o un objeto con 'texto'")
+                continue
+            correcta = _booleano(opcion.get("correcta", opcion.get("es_correcta")))
+            if correcta is None:
+                errores.append(f"{origen}: 'correcta' debe ser true o false")
+                continue
+            opciones.append((opcion.get("texto", ""), correcta))
+        tipo = item.get("tipo") or ("multiple" if opciones else "abierta")
+        preguntas.append(PreguntaBanco(str(item.get("texto", "")), tipo, tuple(opciones), f"Pregunta {numero}"))
+    if errores:
+        raise BancoInvalido(errores)
+    return preguntas
+
+
+def _booleano(valor):
+    """True/False para un valor de 'correcta' (ausente = False); None si no se entiende."""
+    if valor is None or isinstance(valor, bool):
+        return bool(valor)
+    if isinstance(valor, int) and valor in (0, 1):
+        return bool(valor)
+    if isinstance(valor, str):
+        return VALORES_BOOLEANOS.get(valor.strip().lower())
+    return None
+
+
+def leer_csv(texto):
+    """Columnas: pregunta, tipo, opciones (separadas por |), correctas (números desde 1, separados por |)."""
+    lector = csv.DictReader(io.StringIO(texto))
+    if not lector.fieldnames or "pregunta" not in lector.fieldnames:
+        raise BancoInvalido(["El CSV debe tener una columna 'pregunta'"])
+
+    preguntas, errores = [], []
+    for fila in lector:
+        origen = f"Línea {lector.line_num}"
+        textos = [t.strip() for t in (fila.get("opciones") or "").split("|") if t.strip()]
+        correctas = set()
+        for indice in (fila.get("correctas") or "").split("|"):
+            indice = indice.strip()
+            if not indice:
+                continue
+            if not indice.isdigit() or not 1 <= int(indice) <= len(textos):
+                errores.append(f"{origen}: correcta '{indice}' no es una opción")
+                continue
+            correctas.add(int(indice) - 1)
+        tipo = (fila.get("tipo") or "").strip() or ("multiple" if textos else "abierta")
+        opciones = tuple((t, i in correctas) for i, t in enumerate(textos))
+        preguntas.append(PreguntaBanco((fila.get("pregunta") or "").strip(), tipo, opciones, origen))
+    if errores:
+        raise BancoInvalido(errores)
+    return preguntas
+
+
+def _sin_escapes(texto):
+    resultado, escapado = [], False
+    for caracter in texto:
+        if escapado:
+            resultado.append(caracter if caracter in "~=#{}:\\" else "\\" + caracter)
+            escapado = False
+        elif caracter == "\\":
+            escapado = True
+        else:
+            resultado.append(caracter)
+    return "".join(resultado).strip()
+
+
+def _buscar_sin_escapar(texto, caracteres, desde=0):
+    """Posición del primer carácter de `caracteres` que no esté escapado con \\ (o -1)."""
+    i = desde
+    while i < len(texto):
+        if texto[i] == "\\":
+            i += 2
+            continue
+        if texto[i] in caracteres:
+            return i
+        i += 1
+    return -1
+
+
+def _respuestas_gift(cuerpo, origen):
+    cuerpo = cuerpo.strip()
+    if cuerpo == "":
+        return "abierta", ()
+    if cuerpo.upper() in ("T", "TRUE", "F", "FALSE"):
+        verdadero = cuerpo.upper().startswith("T")
+        return "multiple", (("Verdadero", verdadero), ("Falso", not verdadero))
+    if cuerpo[0] not in "=~":
+        raise BancoInvalido([f"{origen}: tipo de pregunta GIFT no soportado ({cuerpo[:20]}...)"])
+
+    opciones = []
+    inicio = 0
+    while inicio < len(cuerpo):
+        fin = _buscar_sin_escapar(cuerpo, "=~", inicio + 1)
+        fin = len(cuerpo) if fin == -1 else fin
+        marca, respuesta = cuerpo[inicio], cuerpo[inicio + 1:fin]
+        comentario = _buscar_sin_escapar(respuesta, "#")
+        if comentario != -1:
+            respuesta = respuesta[:comentario]
+        correcta = marca == "="
+        if respuesta.startswith("%"):
+            # ~%50%texto: peso parcial; cuenta como correcta si es positivo
+            cierre = respuesta.find("%", 1)
+            try:
+                correcta = float(respuesta[1:cierre]) > 0
+            except ValueError:
+                raise BancoInvalido([f"{origen}: peso de respuesta inválido"])
+            respuesta = respuesta[cierre + 1:]
+        if "->" in respuesta:
+            raise BancoInvalido([f"{origen}: las preguntas de emparejamiento no están soportadas"])
+        opciones.append((_sin_escapes(respuesta), correcta))
+        inicio = fin
+    return "multiple", tuple(opciones)
+
+
+def leer_gift(texto):
+    """Subconjunto de GIFT (Moodle): opción múltiple (=/~, pesos %n%), V/F ({T}/{F}) y abiertas ({})."""
+    bloques, actual, linea_inicio = [], [], None
+    for numero, linea in enumerate(texto.splitlines(), start=1):
+        if linea.lstrip().startswith("//"):
+            continue
+        if linea.strip() == "":
+            if actual:
+                bloques.append((linea_inicio, "\n".join(actual)))
+                actual = []
+            continue
+        if not actual:
+            linea_inicio = numero
+        actual.append(linea)
+    if actual:
+        bloques.append((linea_inicio, "\n".join(actual)))
+
+    preguntas, errores = [], []
+    for linea_inicio, bloque in bloques:
+        origen = f"Línea {linea_inicio}"
+        if bloque.lstrip().startswith("$CATEGORY"):
+            continue
+        apertura = _buscar_sin_escapar(bloque, "{")
+        cierre = _buscar_sin_escapar(bloque, "}", apertura + 1) if apertura != -1 else -1
+        if apertura == -1 or cierre == -1:
+            errores.append(f"{origen}: falta el bloque de respuestas {{...}}")
+            continue
+        enunciado = bloque[:apertura] + " " + bloque[cierre + 1:]
+        if enunciado.lstrip().startswith("::"):
+            fin_titulo = enunciado.find("::", enunciado.find("::") + 2)
+            if fin_titulo != -1:
+                enunciado = enunciado[fin_titulo + 2:]
+        if enunciado.lstrip().startswith("["):
+            # Formato del texto ([html], [markdown]...): se ignora
+            enunciado = enunciado[enunciado.find("]") + 1:]
+        try:
+            tipo, opciones = _respuestas_gift(bloque[apertura + 1:cierre], origen)
+        except BancoInvalido as error:
+            errores.extend(error.errores)
+            continue
+        preguntas.append(PreguntaBanco(_sin_escapes(" ".join(enunciado.split())), tipo, opciones, origen))
+    if errores:
+        raise BancoInvalido(errores)
+    return preguntas
+
+
+LECTORES = {"json": leer_json, "csv": leer_csv, "gift": leer_gift}
+
+
+# ------------------- Validación e importación -------------------
+
+def validar(preguntas):
+    """Revisa el banco completo y lanza BancoInvalido con todos los errores juntos."""
+    errores = []
+    maximo = current_app.config["BANCO_MAX_PREGUNTAS"]
+    if not preguntas:
+        errores.append("El banco no tiene preguntas")
+    elif len(preguntas) > maximo:
+        errores.append(f"El banco tiene {len(preguntas)} preguntas (máximo {maximo})")
+    for pregunta in preguntas:
+        if not pregunta.texto.strip():
+            errores.append(f"{pregunta.origen}: la pregunta no tiene texto")
+        if pregunta.tipo not in TIPOS:
+            errores.append(f"{pregunta.origen}: tipo '{pregunta.tipo}' desconocido (multiple o abierta)")
+        elif pregunta.tipo == "multiple":
+            if len(pregunta.opciones) < 2:
+                errores.append(f"{pregunta.origen}: una pregunta de opción múltiple necesita al menos 2 opciones")
+            elif len(pregunta.opciones) > MAX_OPCIONES:
+                errores.append(f"{pregunta.origen}: más de {MAX_OPCIONES} opciones")
+            if not any(correcta for _, correcta in pregunta.opciones):
+                errores.append(f"{pregunta.origen}: ninguna opción está marcada como correcta")
+            for texto, _ in pregunta.opciones:
+                if not texto.strip():
+                    errores.append(f"{pregunta.origen}: hay una opción vacía")
+                elif len(texto) > MAX_TEXTO_OPCION:
+                    errores.append(f"{pregunta.origen}: opción de más de {MAX_TEXTO_OPCION} caracteres")
+        elif pregunta.opciones:
+            errores.append(f"{pregunta.origen}: una pregunta abierta no lleva opciones")
+    if errores:
+        raise BancoInvalido(errores)
+
+
+def leer_banco(texto, formato):
+    """Lee y valida el banco; devuelve la lista de PreguntaBanco."""
+    if formato not in LECTORES:
+        raise BancoInvalido([f"Formato desconocido: {formato} (json, csv o gift)"])
+    preguntas = LECTORES[formato](texto.lstrip("\ufeff"))
+    validar(preguntas)
+    return preguntas
+
+
+def importar_banco(examen_id, preguntas):
+    """Agrega todas las preguntas y opciones al examen en una única transacción.
+
+    Devuelve la cantidad de preguntas importadas.
+    """
+    try:
+        # RETURNING con ids en el mismo orden que las filas: en PostgreSQL va en
+        # lotes (insertmanyvalues); SQLite no garantiza ese orden en un INSERT
+        # múltiple y SQLAlchemy lo ejecuta fila por fila dentro de la transacción
+        pregunta_ids = db.session.execute(
+            insert(Pregunta.__table__).returning(Pregunta.__table__.c.id, sort_by_parameter_order=True),
+            [{"examen_id": examen_id, "texto": p.texto, "tipo": p.tipo} for p in preguntas],
+        ).scalars().all()
+        opciones = [
+            {"pregunta_id": pregunta_id, "texto": texto, "es_correcta": correcta}
+            for pregunta_id, pregunta in zip(pregunta_ids, preguntas)
+            for texto, correcta in pregunta.opciones
+        ]
+        if opciones:
+            db.session.execute(insert(Opcion.__table__), opciones)
+        indexar_preguntas(pregunta_ids)
+        nueva_version_examen(examen_id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(pregunta_ids)
@@ -0,0 +1,360 @@
+# borradores.py
+# Autoguardado de exámenes en curso. Cada cambio llega por la API JSON y se
+# guarda en un buffer con clave (alumno, examen) -> {pregunta_id: fila}: varios
+# cambios a la misma pregunta se pisan y solo queda el último, así que el
+# tecleo de cientos de alumnos no llega a la base. Un hilo vuelca el buffer
+# cada BORRADORES_INTERVALO segundos a RespuestaAlumno con un único upsert.
+#   "memoria" -> buffer dentro del proceso (por defecto)
+#   "redis"   -> compartido entre procesos (requiere el paquete redis)
+# Con backend "memoria" y varios procesos cada uno vuelca lo suyo, pero la
+# entrega solo ve el buffer del proceso que la atiende: usar "redis".
+#
+# Las respuestas sin EntregaExamen son borradores: corrección, estadísticas y
+# exportaciones solo cuentan las entregadas. La entrega final se arma con el
+# borrador (buffer + lo ya volcado) más los cambios que aún no se enviaron.
+# El volcado copia un lote del buffer y lo borra recién después del commit, así
+# que una entrega que llega a mitad de un volcado igual ve los últimos cambios;
+# y su upsert no pisa respuestas de exámenes ya entregados.
+import atexit
+import itertools
+import json
+import threading
+
+from flask import current_app
+from sqlalchemy import select, tuple_
+
+from . import db
+from .examenes import fila_respuesta, guardar_respuestas, registrar_entrega
+from .models import EntregaExamen, RespuestaAlumno
+from .selecciones import decodificar
+
+_worker = None
+_despertar = threading.Event()
+_lock_worker = threading.Lock()
+
+
+class BufferMemoria:
+    """Borradores pendientes de volcar, dentro del proceso."""
+
+    def __init__(self):
+        self._pendientes = {}  # {(alumno_id, examen_id): {pregunta_id: fila}}
+        self._lock = threading.Lock()
+
+    def guardar(self, alumno_id, examen_id, filas):
+        """Agrega los cambios y devuelve cuántos (alumno, examen) hay pendientes."""
+        with self._lock:
+            self._pendientes.setdefault((alumno_id, examen_id), {}).update(filas)
+            return len(self._pendientes)
+
+    def ver(self, alumno_id, examen_id):
+        with self._lock:
+            return dict(self._pendientes.get((alumno_id, examen_id), {}))
+
+    def tomar(self, alumno_id, examen_id):
+        with self._lock:
+            return self._pendientes.pop((alumno_id, examen_id), {})
+
+    def tomar_lote(self, limite):
+        """Copia de hasta `limite` borradores; siguen en el buffer hasta confirmar()."""
+        with self._lock:
+            return {clave: dict(filas) for clave, filas in itertools.islice(self._pendientes.items(), limite)}
+
+    def confirmar(self, lote):
+        """Quita lo ya volcado, salvo las preguntas que cambiaron mientras tanto."""
+        with self._lock:
+            for clave, filas in lote.items():
+                actuales = self._pendientes.get(clave)
+                if actuales is None:
+                    continue
+                for pregunta_id, fila in filas.items():
+                    if actuales.get(pregunta_id) == fila:
+                        del actuales[pregunta_id]
+                if not actuales:
+                    del self._pendientes[clave]
+
+    def devolver(self, pendientes):
+        """Reincorpora un lote que no se pudo volcar sin pisar cambios más nuevos."""
+        with self._lock:
+            for clave, filas in pendientes.items():
+                actuales = self._pendientes.setdefault(clave, {})
+                for pregunta_id, fila in filas.items():
+                    actuales.setdefault(pregunta_id, fila)
+
+
+class BufferRedis:
+    """Borradores en Redis: un hash por (alumno, examen) y un set con los pendientes."""
+
+    PENDIENTES = "aula:borradores:pendientes"
+    # Borra cada pregunta volcada si no cambió y, si el hash quedó vacío, lo saca de pendientes
+    CONFIRMAR = """
+    for i = 2, #ARGV, 2 do
+        if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+            redis.call('HDEL', KEYS[1], ARGV[i])
+        end
+    end
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        redis.call('SREM', KEYS[2], ARGV[1])
+    end
+    """
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as error:
+            raise RuntimeError("BORRADORES_BACKEND=redis requiere instalar el paquete redis") from error
+        self._redis = redis.Redis.from_url(url)
+        self._confirmar = self._redis.register_script(self.CONFIRMAR)
+
+    @staticmethod
+    def _clave(alumno_id, examen_id):
+        return f"aula:borradores:{alumno_id}:{examen_id}"
+
+    @staticmethod
+    def _filas(datos):
+        return {int(pregunta_id): json.loads(fila) for pregunta_id, fila in datos.items()}
+
+    def guardar(self, alumno_id, examen_id, filas):
+        with self._redis.pipeline() as pipe:
+            pipe.hset(self._clave(alumno_id, examen_id), mapping={
+                str(pregunta_id): json.dumps(fila) for pregunta_id, fila in filas.items()
+            })
+            pipe.sadd(self.PENDIENTES, f"{alumno_id}:{examen_id}")
+            pipe.scard(self.PENDIENTES)
+            return pipe.execute()[-1]
+
+    def ver(self, alumno_id, examen_id):
+        return self._filas(self._redis.hgetall(self._clave(alumno_id, examen_id)))
+
+    def tomar(self, alumno_id, examen_id):
+        with self._redis.pipeline() as pipe:
+            pipe.hgetall(self._clave(alumno_id, examen_id))
+            pipe.delete(self._clave(alumno_id, examen_id))
+            return self._filas(pipe.execute()[0])
+
+    def tomar_lote(self, limite):
+        # Solo lectura: los hash se borran en confirmar() después del commit
+        miembros = self._redis.srandmember(self.PENDIENTES, limite)
+        if not miembros:
+            return {}
+        claves = [tuple(map(int, miembro.split(b":"))) for miembro in miembros]
+        with self._redis.pipeline() as pipe:
+            for alumno_id, examen_id in claves:
+                pipe.hgetall(self._clave(alumno_id, examen_id))
+            resultados = pipe.execute()
+        # Si la entrega ya se llevó el borrador, se saca de pendientes (salvo que
+        # haya llegado un cambio nuevo entre medio)
+        for (alumno_id, examen_id), miembro, datos in zip(claves, miembros, resultados):
+            if not datos:
+                self._confirmar(keys=[self._clave(alumno_id, examen_id), self.PENDIENTES], args=[miembro])
+        return {clave: self._filas(datos) for clave, datos in zip(claves, resultados) if datos}
+
+    def confirmar(self, lote):
+        with self._redis.pipeline() as pipe:
+            for (alumno_id, examen_id), filas in lote.items():
+                argumentos = [f"{alumno_id}:{examen_id}"]
+                for pregunta_id, fila in filas.items():
+                    argumentos += [str(pregunta_id), json.dumps(fila)]
+                self._confirmar(
+                    keys=[self._clave(alumno_id, examen_id), self.PENDIENTES], args=argumentos, client=pipe,
+                )
+            pipe.execute()
+
+    def devolver(self, pendientes):
+        with self._redis.pipeline() as pipe:
+            for (alumno_id, examen_id), filas in pendientes.items():
+                for pregunta_id, fila in filas.items():
+                    pipe.hsetnx(self._clave(alumno_id, examen_id), str(pregunta_id), json.dumps(fila))
+                pipe.sadd(self.PENDIENTES, f"{alumno_id}:{examen_id}")
+            pipe.execute()
+
+
+def obtener_buffer():
+    app = current_app._get_current_object()
+    buffer = app.extensions.get("borradores")
+    if buffer is None:
+        if app.config["BORRADORES_BACKEND"] == "redis":
+            buffer = BufferRedis(app.config["CACHE_REDIS_URL"])
+        else:
+            buffer = BufferMemoria()
+        buffer = app.extensions.setdefault("borradores", buffer)
+    return buffer
+
+
+# ------------------- API -------------------
+
+def filas_borrador(examen, respuestas):
+    """{pregunta_id: fila} desde el JSON {"<pregunta_id>": texto | [opcion_id, ...]}.
+
+    Lanza ValueError si el JSON no tiene esa forma (texto en las abiertas, lista
+    de ids de opción en las de opción múltiple) o nombra preguntas de otro examen.
+    """
+    if not isinstance(respuestas, dict):
+        raise ValueError("Se esperaba un objeto {pregunta_id: respuesta}")
+    preguntas = {pregunta.id: pregunta for pregunta in examen.preguntas}
+    filas = {}
+    for clave, valor in respuestas.items():
+        pregunta = preguntas.get(int(clave)) if str(clave).isdigit() else None
+        if pregunta is None:
+            raise ValueError(f"La pregunta {clave} no pertenece a este examen")
+        _validar_valor(pregunta, valor)
+        fila = fila_respuesta(pregunta, valor)
+        if fila is not None:
+            filas[pregunta.id] = fila
+    return filas
+
+
+def _validar_valor(pregunta, valor):
+    # Un valor de otra forma (texto en una de opción múltiple) se guardaría como
+    # "ninguna elegida" y borraría la selección anterior: se rechaza
+    if pregunta.tipo == "multiple":
+        opciones = {opcion.id for opcion in pregunta.opciones}
+        if not isinstance(valor, list) or not all(
+            type(o_id) is int and o_id in opciones for o_id in valor
+        ):
+            raise ValueError(f"La pregunta {pregunta.id} espera una lista de ids de sus opciones")
+    elif pregunta.tipo == "abierta" and valor is not None and not isinstance(valor, str):
+        raise ValueError(f"La pregunta {pregunta.id} espera un texto")
+
+
+def guardar_borrador(examen, alumno_id, respuestas):
+    """Agrega los cambios al buffer (sin tocar la base). Devuelve cuántas preguntas cambiaron."""
+    filas = filas_borrador(examen, respuestas)
+    if not filas:
+        return 0
+    app = current_app._get_current_object()
+    pendientes = obtener_buffer().guardar(alumno_id, examen.id, filas)
+    if app.config["BORRADORES_WORKER"] == "thread":
+        _asegurar_worker(app)
+    if pendientes >= app.config["BORRADORES_LOTE"]:
+        _despertar.set()
+    return len(filas)
+
+
+def _guardadas(examen, alumno_id):
+    respuestas = RespuestaAlumno.__table__.c
+    filas = db.session.execute(
+        select(respuestas.pregunta_id, respuestas.respuesta_texto, respuestas.respuesta_opciones)
+        .where(
+            respuestas.alumno_id == alumno_id,
+            respuestas.pregunta_id.in_([pregunta.id for pregunta in examen.preguntas]),
+        )
+    )
+    return {
+        pregunta_id: {"pregunta_id": pregunta_id, "respuesta_texto": texto, "respuesta_opciones": opciones}
+        for pregunta_id, texto, opciones in filas
+    }
+
+
+def leer_borrador(examen, alumno_id):
+    """{pregunta_id: fila} del borrador actual: lo volcado más lo que sigue en el buffer."""
+    filas = _guardadas(examen, alumno_id)
+    filas.update(obtener_buffer().ver(alumno_id, examen.id))
+    return filas
+
+
+def respuestas_borrador(examen, alumno_id):
+    """{pregunta_id: texto | [opcion_id, ...]}: el borrador en la forma que usa la API."""
+    opciones = {pregunta.id: [opcion.id for opcion in pregunta.opciones] for pregunta in examen.preguntas}
+    return {
+        pregunta_id: (
+            fila["respuesta_texto"] if fila["respuesta_opciones"] is None
+            else decodificar(fila["respuesta_opciones"], opciones.get(pregunta_id, ()))
+        )
+        for pregunta_id, fila in leer_borrador(examen, alumno_id).items()
+    }
+
+
+def descartar_borrador(examen_id, alumno_id):
+    """Olvida lo pendiente en el buffer (la entrega llegó por el formulario completo)."""
+    obtener_buffer().tomar(alumno_id, examen_id)
+
+
+def entregar_borrador(examen, alumno_id, cambios):
+    """Registra la entrega a partir del borrador más los `cambios` aún no enviados.
+
+    Devuelve lo mismo que registrar_entrega; ValueError si `cambios` no es válido.
+    """
+    nuevas = filas_borrador(examen, cambios)
+    buffer = obtener_buffer()
+    pendientes = buffer.tomar(alumno_id, examen.id)
+    try:
+        pendientes.update(nuevas)
+        filas = _guardadas(examen, alumno_id)
+        filas.update(pendientes)
+        # Las preguntas nunca respondidas quedan vacías, como en el formulario
+        completas = [
+            filas.get(pregunta.id) or fila_respuesta(pregunta, None) for pregunta in examen.preguntas
+        ]
+        return registrar_entrega(examen, alumno_id, [fila for fila in completas if fila is not None])
+    except Exception:
+        buffer.devolver({(alumno_id, examen.id): pendientes})
+        raise
+
+
+# ------------------- Volcado a la base -------------------
+
+def volcar_borradores(limite=None):
+    """Escribe un lote del buffer en RespuestaAlumno con un solo upsert y confirma.
+
+    Devuelve cuántos borradores (alumno, examen) se volcaron. Los de exámenes
+    ya entregados se descartan: la entrega tiene la versión final.
+    """
+    limite = limite or current_app.config["BORRADORES_LOTE"]
+    buffer = obtener_buffer()
+    pendientes = buffer.tomar_lote(limite)
+    if not pendientes:
+        return 0
+    try:
+        entregados = set(db.session.execute(
+            select(EntregaExamen.alumno_id, EntregaExamen.examen_id)
+            .where(tuple_(EntregaExamen.alumno_id, EntregaExamen.examen_id).in_(list(pendientes)))
+        ).tuples())
+        filas = [
+            dict(fila, alumno_id=alumno_id)
+            for (alumno_id, examen_id), respuestas in pendientes.items()
+            if (alumno_id, examen_id) not in entregados
+            for fila in respuestas.values()
+        ]
+        if filas:
+            # Una entrega confirmada después de la consulta anterior tampoco se pisa
+            guardar_respuestas(filas, solo_borradores=True)
+        db.session.commit()
+    except Exception:
+        # El lote sigue en el buffer: se reintenta en el próximo volcado
+        db.session.rollback()
+        raise
+    buffer.confirmar(pendientes)
+    return len(pendientes)
+
+
+def volcar_periodicamente(app, intervalo=None, detener=None):
+    """Bucle del worker: vuelca cada `intervalo` segundos o antes si el buffer se llena."""
+    intervalo = intervalo or app.config["BORRADORES_INTERVALO"]
+    while detener is None or not detener.is_set():
+        _despertar.wait(intervalo)
+        _despertar.clear()
+        _volcar(app)
+
+
+def _volcar(app, hasta_vaciar=False):
+    # Un lote por pasada; si el buffer sigue lleno, guardar_borrador despierta al worker
+    with app.app_context():
+        try:
+            while volcar_borradores() and hasta_vaciar:
+                pass
+        except Exception:
+            app.logger.exception("Error volcando borradores de exámenes")
+        finally:
+            db.session.remove()
+
+
+def _asegurar_worker(app):
+    global _worker
+    with _lock_worker:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(
+                target=volcar_periodicamente, args=(app,), name="borradores", daemon=True
+            )
+            _worker.start()
+            # Al apagar el proceso se vuelca lo que quede en memoria
+            atexit.register(_volcar, app, hasta_vaciar=True)
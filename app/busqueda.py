@@ -0,0 +1,303 @@
+# busqueda.py
+# Búsqueda de texto completo con una tabla virtual FTS5 de SQLite.
+#
+# Cada documento (curso, examen, pregunta o archivo) es una fila de `busqueda`
+# cuyo rowid codifica tipo e id (id * 8 + tipo), así actualizar o borrar un
+# documento es un acceso por clave. El índice se mantiene solo:
+#   - after_flush: los cambios de Curso/Examen/Pregunta/Archivo se escriben en
+#     la misma transacción que los datos.
+#   - after_commit: los archivos nuevos pasan a un hilo que extrae su texto.
+# En motores que no son SQLite la búsqueda queda deshabilitada.
+import html
+import logging
+import os
+import queue
+import re
+import threading
+
+from flask import current_app
+from markupsafe import Markup
+from sqlalchemy import event, text
+
+from . import db
+from .almacenamiento import ruta_archivo
+from .models import Archivo, Curso, Examen, Pregunta
+
+logger = logging.getLogger(__name__)
+
+TABLA = "busqueda"
+TIPOS = {Curso: 1, Examen: 2, Pregunta: 3, Archivo: 4}
+NOMBRES_TIPO = {1: "curso", 2: "examen", 3: "pregunta", 4: "archivo"}
+MAX_TEXTO_EXTRAIDO = 200_000  # caracteres por archivo
+
+_cola_extraccion = queue.Queue()
+_worker = None
+_lock_worker = threading.Lock()
+
+
+def _rowid(tipo, ref_id):
+    return ref_id * 8 + tipo
+
+
+def crear_tabla_sql():
+    return (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA} USING fts5("
+        "titulo, contenido, curso_id UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+
+
+def excluir_de_migraciones(objeto, nombre, tipo, reflejado, comparar_con):
+    """include_object para Alembic: la tabla FTS5 y sus tablas internas no son modelos."""
+    return not (tipo == "table" and nombre.startswith(TABLA))
+
+
+def _habilitada(conexion):
+    # Se averigua una vez por motor si existe la tabla (migración o reindexar)
+    estado = current_app.extensions.setdefault("busqueda_habilitada", {})
+    clave = id(conexion.engine)
+    if clave not in estado:
+        estado[clave] = conexion.dialect.name == "sqlite" and conexion.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :nombre"),
+            {"nombre": TABLA},
+        ).first() is not None
+    return estado[clave]
+
+
+# ------------------- Documentos -------------------
+
+def _documento(conexion, objeto):
+    """Devuelve (titulo, contenido, curso_id) del objeto para indexar."""
+    if isinstance(objeto, Curso):
+        return objeto.nombre, objeto.descripcion or "", objeto.id
+    if isinstance(objeto, Examen):
+        return objeto.titulo, "", objeto.curso_id
+    if isinstance(objeto, Pregunta):
+        # Sin relaciones perezosas durante el flush: consulta directa
+        fila = conexion.execute(
+            text("SELECT titulo, curso_id FROM examen WHERE id = :id"), {"id": objeto.examen_id}
+        ).first()
+        if fila is None:
+            return None
+        return fila.titulo, objeto.texto, fila.curso_id
+    if isinstance(objeto, Archivo):
+        # El texto del archivo lo completa el worker de extracción
+        return objeto.nombre, "", objeto.curso_id
+    return None
+
+
+def _guardar(conexion, tipo, ref_id, titulo, contenido, curso_id):
+    conexion.execute(
+        text(
+            f"INSERT OR REPLACE INTO {TABLA} (rowid, titulo, contenido, curso_id) "
+            "VALUES (:rowid, :titulo, :contenido, :curso_id)"
+        ),
+        {"rowid": _rowid(tipo, ref_id), "titulo": titulo, "contenido": contenido, "curso_id": curso_id},
+    )
+
+
+def _borrar(conexion, tipo, ref_id):
+    conexion.execute(text(f"DELETE FROM {TABLA} WHERE rowid = :rowid"), {"rowid": _rowid(tipo, ref_id)})
+
+
+def indexar_preguntas(ids):
+    """Indexa preguntas insertadas sin pasar por el ORM (inserts masivos)."""
+    conexion = db.session.connection()
+    if not ids or not _habilitada(conexion):
+        return
+    # Una sola sentencia para todo el lote
+    conexion.execute(
+        text(
+            f"INSERT OR REPLACE INTO {TABLA} (rowid, titulo, contenido, curso_id) "
+            f"SELECT pregunta.id * 8 + {TIPOS[Pregunta]}, examen.titulo, pregunta.texto, examen.curso_id "
+            "FROM pregunta JOIN examen ON examen.id = pregunta.examen_id "
+            "WHERE pregunta.id IN (SELECT value FROM json_each(:ids))"
+        ),
+        {"ids": "[" + ",".join(str(int(i)) for i in ids) + "]"},
+    )
+
+
+# ------------------- Eventos de sesión -------------------
+
+@event.listens_for(db.session, "after_flush")
+def _sincronizar(session, contexto_flush):
+    cambiados = [o for o in list(session.new) + list(session.dirty) if type(o) in TIPOS]
+    borrados = [o for o in session.deleted if type(o) in TIPOS]
+    if not cambiados and not borrados:
+        return
+
+    conexion = session.connection()
+    if not _habilitada(conexion):
+        return
+
+    for objeto in cambiados:
+        if objeto in session.dirty and not session.is_modified(objeto):
+            continue
+        documento = _documento(conexion, objeto)
+        if documento:
+            _guardar(conexion, TIPOS[type(objeto)], objeto.id, *documento)
+        if isinstance(objeto, Archivo) and objeto in session.new:
+            session.info.setdefault("busqueda_extraer", set()).add(objeto.id)
+
+    for objeto in borrados:
+        _borrar(conexion, TIPOS[type(objeto)], objeto.id)
+        if isinstance(objeto, Curso):
+            conexion.execute(
+                text(f"DELETE FROM {TABLA} WHERE curso_id = :curso_id"), {"curso_id": objeto.id}
+            )
+
+
+@event.listens_for(db.session, "after_commit")
+def _encolar_extracciones(session):
+    ids = session.info.pop("busqueda_extraer", None)
+    if ids:
+        _asegurar_worker(current_app._get_current_object())
+        for archivo_id in ids:
+            _cola_extraccion.put(archivo_id)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _descartar_extracciones(session):
+    session.info.pop("busqueda_extraer", None)
+
+
+# ------------------- Extracción de texto de archivos -------------------
+
+def extraer_texto(ruta):
+    """Texto plano de un archivo subido ("" si el formato no se puede leer)."""
+    extension = os.path.splitext(ruta)[1].lower()
+    try:
+        if extension in (".txt", ".md", ".csv", ".html", ".htm"):
+            with open(ruta, encoding="utf-8", errors="ignore") as archivo:
+                contenido = archivo.read(MAX_TEXTO_EXTRAIDO)
+            if extension in (".html", ".htm"):
+                contenido = html.unescape(re.sub(r"<[^>]+>", " ", contenido))
+            return contenido
+        if extension == ".pdf":
+            try:
+                from pypdf import PdfReader
+            except ImportError:
+                logger.info("pypdf no está instalado: no se indexa el texto de %s", ruta)
+                return ""
+            partes, total = [], 0
+            for pagina in PdfReader(ruta).pages:
+                parte = pagina.extract_text() or ""
+                partes.append(parte)
+                total += len(parte)
+                if total >= MAX_TEXTO_EXTRAIDO:
+                    break
+            return "\n".join(partes)[:MAX_TEXTO_EXTRAIDO]
+    except Exception:
+        logger.exception("No se pudo extraer el texto de %s", ruta)
+    return ""
+
+
+def extraer_e_indexar(archivo_id):
+    archivo = db.session.get(Archivo, archivo_id)
+    if archivo is None:
+        return
+    contenido = extraer_texto(ruta_archivo(archivo.ruta))
+    conexion = db.session.connection()
+    if _habilitada(conexion):
+        _guardar(conexion, TIPOS[Archivo], archivo.id, archivo.nombre, contenido, archivo.curso_id)
+        db.session.commit()
+
+
+def _procesar_cola(app):
+    while True:
+        archivo_id = _cola_extraccion.get()
+        with app.app_context():
+            try:
+                extraer_e_indexar(archivo_id)
+            except Exception:
+                app.logger.exception("Error indexando el archivo %s", archivo_id)
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+
+def _asegurar_worker(app):
+    global _worker
+    with _lock_worker:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(
+                target=_procesar_cola, args=(app,), name="extraccion-texto", daemon=True
+            )
+            _worker.start()
+
+
+# ------------------- Consultas -------------------
+
+def _consulta_fts(termino):
+    # Cada palabra como prefijo entre comillas: nada de sintaxis FTS del usuario
+    palabras = re.findall(r"\w+", termino or "")
+    return " ".join(f'"{palabra}"*' for palabra in palabras[:10])
+
+
+def _resaltar(fragmento):
+    # snippet() marca con \x02...\x03; se escapa todo y luego se ponen los <mark>
+    seguro = html.escape(fragmento)
+    return Markup(seguro.replace("\x02", "<mark>").replace("\x03", "</mark>"))
+
+
+def buscar(termino, curso_ids=None, limite=20):
+    """Resultados ordenados por relevancia (bm25, el título pesa más).
+
+    curso_ids limita la búsqueda a esos cursos (None = todos).
+    Cada resultado es un dict con tipo, id, curso_id, titulo y fragmento.
+    """
+    consulta = _consulta_fts(termino)
+    conexion = db.session.connection()
+    if not consulta or not _habilitada(conexion) or curso_ids == []:
+        return []
+
+    filtro, parametros = "", {"consulta": consulta, "limite": limite}
+    if curso_ids is not None:
+        filtro = "AND curso_id IN (SELECT value FROM json_each(:cursos))"
+        parametros["cursos"] = "[" + ",".join(str(int(c)) for c in curso_ids) + "]"
+
+    filas = conexion.execute(
+        text(
+            f"SELECT rowid, curso_id, titulo, "
+            f"snippet({TABLA}, 1, char(2), char(3), '…', 16) AS fragmento "
+            f"FROM {TABLA} WHERE {TABLA} MATCH :consulta {filtro} "
+            f"ORDER BY bm25({TABLA}, 10.0, 1.0) LIMIT :limite"
+        ),
+        parametros,
+    )
+    return [
+        {
+            "tipo": NOMBRES_TIPO[fila.rowid % 8],
+            "id": fila.rowid // 8,
+            "curso_id": fila.curso_id,
+            "titulo": fila.titulo,
+            "fragmento": _resaltar(fila.fragmento),
+        }
+        for fila in filas
+    ]
+
+
+def reconstruir_indice():
+    """Crea la tabla si falta y reindexa todo (incluye extraer el texto de archivos)."""
+    conexion = db.session.connection()
+    if conexion.dialect.name != "sqlite":
+        raise RuntimeError("La búsqueda de texto completo requiere SQLite con FTS5")
+    conexion.execute(text(crear_tabla_sql()))
+    conexion.execute(text(f"DELETE FROM {TABLA}"))
+    current_app.extensions.get("busqueda_habilitada", {}).clear()
+
+    for curso in Curso.query.yield_per(500):
+        _guardar(conexion, TIPOS[Curso], curso.id, *_documento(conexion, curso))
+    for examen in Examen.query.yield_per(500):
+        _guardar(conexion, TIPOS[Examen], examen.id, *_documento(conexion, examen))
+    conexion.execute(text(
+        f"INSERT INTO {TABLA} (rowid, titulo, contenido, curso_id) "
+        f"SELECT pregunta.id * 8 + {TIPOS[Pregunta]}, examen.titulo, pregunta.texto, examen.curso_id "
+        "FROM pregunta JOIN examen ON examen.id = pregunta.examen_id"
+    ))
+    archivos = [(a.id, a.nombre, a.ruta, a.curso_id) for a in Archivo.query.yield_per(500)]
+    for archivo_id, nombre, ruta, curso_id in archivos:
+        contenido = extraer_texto(ruta_archivo(ruta))
+        _guardar(conexion, TIPOS[Archivo], archivo_id, nombre, contenido, curso_id)
+    db.session.commit()
+    return len(archivos)
@@ -0,0 +1,91 @@
+# cache.py
+# Cachés de la aplicación con backend intercambiable:
+#   "memoria" -> LRU dentro del proceso (por defecto)
+#   "redis"   -> compartida entre procesos/servidores (requiere el paquete redis)
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+
+class CacheMemoria:
+    """LRU en memoria, segura entre hilos, con vencimiento opcional."""
+
+    def __init__(self, maxsize=256, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            item = self._datos.get(clave)
+            if item is None:
+                return None
+            valor, vence = item
+            if vence is not None and vence < time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        vence = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._datos[clave] = (valor, vence)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def delete(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+
+
+class CacheRedis:
+    """Caché compartida en Redis; los valores se guardan serializados con pickle."""
+
+    def __init__(self, url, prefijo, ttl=None):
+        try:
+            import redis
+        except ImportError as error:
+            raise RuntimeError("CACHE_BACKEND=redis requiere instalar el paquete redis") from error
+        self._redis = redis.Redis.from_url(url)
+        self.prefijo = f"aula:{prefijo}:"
+        self.ttl = ttl
+
+    def get(self, clave):
+        datos = self._redis.get(self.prefijo + str(clave))
+        return pickle.loads(datos) if datos is not None else None
+
+    def set(self, clave, valor, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        self._redis.set(self.prefijo + str(clave), pickle.dumps(valor), ex=ttl or None)
+
+    def delete(self, clave):
+        self._redis.delete(self.prefijo + str(clave))
+
+    def clear(self):
+        for clave in self._redis.scan_iter(self.prefijo + "*"):
+            self._redis.delete(clave)
+
+
+def obtener_cache(nombre, maxsize=256, ttl=None):
+    """Devuelve la caché `nombre` de la app actual, creándola la primera vez."""
+    app = current_app._get_current_object()
+    caches = app.extensions.setdefault("aula_caches", {})
+    cache = caches.get(nombre)
+    if cache is None:
+        if app.config["CACHE_BACKEND"] == "redis":
+            cache = CacheRedis(app.config["CACHE_REDIS_URL"], nombre, ttl=ttl)
+        else:
+            cache = CacheMemoria(maxsize=maxsize, ttl=ttl)
+        cache = caches.setdefault(nombre, cache)
+    return cache
@@ -0,0 +1,102 @@
+# calificacion.py
+# Corrección automática de preguntas de opción múltiple.
+# La clave se arma una sola vez como máscara de bits por pregunta (bit i = i-ésima
+# opción en orden de id), igual que se guardan las respuestas (ver selecciones.py),
+# así que corregir es una comparación / AND de enteros, sin cargar objetos del ORM.
+from sqlalchemy import bindparam, select, update
+
+from . import db
+from .estadisticas import fijar_puntajes
+from .models import EntregaExamen, MascaraOpciones, Opcion, Pregunta, RespuestaAlumno
+
+EXACTA = "exacta"
+PARCIAL = "parcial"
+
+
+class ClaveExamen:
+    """Clave de corrección de un examen: máscara de opciones correctas por pregunta."""
+
+    __slots__ = ("correctas",)
+
+    def __init__(self, correctas):
+        self.correctas = correctas  # {pregunta_id: máscara de opciones correctas}
+
+
+def armar_clave(examen_id):
+    """Arma la clave del examen con una sola consulta a opcion."""
+    filas = db.session.execute(
+        select(Opcion.pregunta_id, Opcion.es_correcta)
+        .join(Pregunta, Pregunta.id == Opcion.pregunta_id)
+        .where(Pregunta.examen_id == examen_id, Pregunta.tipo == "multiple")
+        .order_by(Opcion.pregunta_id, Opcion.id)
+    )
+    correctas, siguiente = {}, {}
+    for pregunta_id, es_correcta in filas:
+        ordinal = siguiente.get(pregunta_id, 0)
+        siguiente[pregunta_id] = ordinal + 1
+        correctas.setdefault(pregunta_id, 0)
+        # Las opciones que no entran en la máscara tampoco se guardan al responder
+        # (selecciones.codificar): la clave las ignora igual
+        if es_correcta and ordinal < MascaraOpciones.MAX_OPCIONES:
+            correctas[pregunta_id] |= 1 << ordinal
+    return ClaveExamen(correctas)
+
+
+def puntaje_pregunta(seleccion, correcta, modo=EXACTA):
+    """Puntaje (0 a 1) de una respuesta codificada contra la máscara correcta."""
+    if modo == EXACTA or correcta == 0:
+        return 1.0 if seleccion == correcta else 0.0
+    aciertos = (seleccion & correcta).bit_count()
+    errores = (seleccion & ~correcta).bit_count()
+    return max(0.0, (aciertos - errores) / correcta.bit_count())
+
+
+def corregir_examen(examen_id, modo=EXACTA, guardar=True):
+    """Corrige todas las entregas del examen en una pasada.
+
+    Cada pregunta de opción múltiple vale 1 punto; las no respondidas valen 0.
+    Devuelve {alumno_id: puntaje} y, si guardar=True, actualiza
+    EntregaExamen.puntaje con un único UPDATE ejecutado en lote.
+    """
+    if modo not in (EXACTA, PARCIAL):
+        raise ValueError(f"Modo de corrección desconocido: {modo}")
+
+    clave = armar_clave(examen_id)
+    entregas = dict(db.session.execute(
+        select(EntregaExamen.alumno_id, EntregaExamen.id)
+        .where(EntregaExamen.examen_id == examen_id)
+    ).all())
+    puntajes = dict.fromkeys(entregas, 0.0)
+
+    if clave.correctas and entregas:
+        # Consulta Core sobre la tabla: tuplas planas, sin pasar por el ORM
+        respuestas = RespuestaAlumno.__table__.c
+        filas = db.session.execute(
+            select(respuestas.alumno_id, respuestas.pregunta_id, respuestas.respuesta_opciones)
+            .where(respuestas.pregunta_id.in_(clave.correctas))
+        )
+        # Muchos alumnos eligen la misma combinación: cada (pregunta, máscara)
+        # distinta se puntúa una sola vez
+        memo = {}
+        for alumno_id, pregunta_id, seleccion in filas:
+            if alumno_id not in puntajes:
+                continue
+            puntaje = memo.get((pregunta_id, seleccion))
+            if puntaje is None:
+                puntaje = puntaje_pregunta(seleccion or 0, clave.correctas[pregunta_id], modo)
+                memo[pregunta_id, seleccion] = puntaje
+            puntajes[alumno_id] += puntaje
+
+    if guardar and entregas:
+        tabla = EntregaExamen.__table__
+        db.session.execute(
+            update(tabla).where(tabla.c.id == bindparam("entrega_id")),
+            [
+                {"entrega_id": entregas[alumno_id], "puntaje": puntaje}
+                for alumno_id, puntaje in puntajes.items()
+            ],
+        )
+        fijar_puntajes(examen_id, list(puntajes.values()))
+        db.session.commit()
+
+    return puntajes
@@ -0,0 +1,176 @@
+# comandos.py
+# Comandos de consola: flask --app run <comando>
+import click
+
+from .models import Curso
+
+
+def registrar_comandos(app):
+
+    @app.cli.command("importar-alumnos")
+    @click.argument("curso_id", type=int)
+    @click.argument("archivo", type=click.File("r", encoding="utf-8-sig"))
+    def importar_alumnos(curso_id, archivo):
+        """Inscribe una cohorte completa desde un CSV (columna email o id)."""
+        from .inscripciones import CohorteInvalida, importar_cohorte_csv
+
+        if Curso.query.get(curso_id) is None:
+            raise click.ClickException(f"No existe el curso {curso_id}")
+
+        try:
+            agregados, desconocidos = importar_cohorte_csv(curso_id, archivo)
+        except CohorteInvalida as error:
+            for detalle in error.errores:
+                click.echo(f"  {detalle}", err=True)
+            raise click.ClickException(f"{error}; no se inscribió a nadie.")
+        click.echo(f"{agregados} alumnos inscriptos en el curso {curso_id}.")
+        for email in desconocidos:
+            click.echo(f"  Alumno no encontrado: {email}", err=True)
+
+    @app.cli.command("enviar-correos")
+    @click.option("--loop", is_flag=True, help="Seguir corriendo como worker.")
+    def enviar_correos(loop):
+        """Envía los correos pendientes de la cola de salida."""
+        from .correo import drenar_cola, procesar_cola
+
+        if loop:
+            drenar_cola(app)
+            return
+
+        total = 0
+        while True:
+            enviados, fallidos = procesar_cola()
+            total += enviados
+            if enviados == 0:
+                break
+        click.echo(f"{total} correos enviados.")
+
+    @app.cli.command("volcar-borradores")
+    @click.option("--loop", is_flag=True, help="Seguir corriendo como worker.")
+    def volcar_borradores(loop):
+        """Escribe en la base los borradores de exámenes autoguardados."""
+        from .borradores import volcar_borradores as volcar, volcar_periodicamente
+
+        if loop:
+            volcar_periodicamente(app)
+            return
+
+        total = 0
+        while True:
+            volcados = volcar()
+            total += volcados
+            if volcados == 0:
+                break
+        click.echo(f"{total} borradores volcados.")
+
+    @app.cli.command("corregir-examen")
+    @click.argument("examen_id", type=int)
+    @click.option("--modo", type=click.Choice(["exacta", "parcial"]), default="exacta",
+                  help="exacta: todo o nada; parcial: aciertos menos errores.")
+    def corregir_examen(examen_id, modo):
+        """Corrige automáticamente las preguntas de opción múltiple de un examen."""
+        from .calificacion import corregir_examen as corregir
+
+        puntajes = corregir(examen_id, modo=modo)
+        click.echo(f"{len(puntajes)} entregas corregidas (modo {modo}).")
+
+    @app.cli.command("indexar-archivos")
+    def indexar_archivos():
+        """Pasa los archivos subidos antes del almacenamiento por hash al nuevo esquema."""
+        import os
+
+        from . import db
+        from .almacenamiento import directorio_subidas, indexar_archivo_existente
+        from .models import Archivo
+
+        pendientes = Archivo.query.filter(Archivo.sha256.is_(None)).all()
+        rutas_viejas = set()
+        for archivo in pendientes:
+            try:
+                rutas_viejas.add(indexar_archivo_existente(archivo))
+            except FileNotFoundError:
+                click.echo(f"  Falta el archivo de {archivo.nombre} ({archivo.ruta})", err=True)
+        db.session.commit()
+
+        # Solo se borran los originales que estaban en uploads/
+        subidas = os.path.abspath(directorio_subidas())
+        for ruta in rutas_viejas:
+            if os.path.abspath(ruta).startswith(subidas + os.sep) and os.path.exists(ruta):
+                os.remove(ruta)
+        click.echo(f"{len(rutas_viejas)} archivos indexados.")
+
+    @app.cli.command("mover-subidas")
+    def mover_subidas():
+        """Mueve los archivos subidos de static/uploads a la carpeta privada (ARCHIVOS_RAIZ)."""
+        import os
+
+        from .almacenamiento import directorio_subidas
+
+        origen = os.path.join(app.static_folder, "uploads")
+        destino = directorio_subidas()
+        movidos = 0
+        for carpeta, _, nombres in os.walk(origen):
+            for nombre in nombres:
+                ruta = os.path.join(carpeta, nombre)
+                nueva = os.path.join(destino, os.path.relpath(ruta, origen))
+                os.makedirs(os.path.dirname(nueva), exist_ok=True)
+                if os.path.exists(nueva):
+                    click.echo(f"  Ya existe {nueva}: no se movió {ruta}", err=True)
+                    continue
+                os.replace(ruta, nueva)
+                movidos += 1
+        click.echo(f"{movidos} archivos movidos a {destino}.")
+
+    @app.cli.command("reindexar-busqueda")
+    def reindexar_busqueda():
+        """Reconstruye el índice de búsqueda (incluye el texto de los archivos)."""
+        from .busqueda import reconstruir_indice
+
+        try:
+            archivos = reconstruir_indice()
+        except RuntimeError as error:
+            raise click.ClickException(str(error))
+        click.echo(f"Índice de búsqueda reconstruido ({archivos} archivos leídos).")
+
+    @app.cli.command("reconstruir-estadisticas")
+    def reconstruir_estadisticas():
+        """Recalcula desde cero los contadores de cursos, exámenes y opciones."""
+        from .estadisticas import reconstruir_estadisticas as reconstruir
+
+        cursos, examenes, opciones = reconstruir()
+        click.echo(f"Estadísticas reconstruidas: {cursos} cursos, {examenes} exámenes, {opciones} opciones.")
+
+    @app.cli.command("construir-estaticos")
+    @click.option("--limpiar", is_flag=True, help="Borrar las versiones anteriores.")
+    def construir_estaticos(limpiar):
+        """Genera los estáticos con huella de contenido y sus versiones .br/.gz."""
+        from .estaticos import construir_estaticos as construir
+
+        archivos, comprimidos, borrados = construir(limpiar=limpiar)
+        click.echo(f"{archivos} estáticos con huella, {comprimidos} versiones comprimidas.")
+        if borrados:
+            click.echo(f"{borrados} archivos viejos borrados.")
+        click.echo("Reiniciar los workers para que usen el nuevo manifest.")
+
+    @app.cli.command("importar-preguntas")
+    @click.argument("examen_id", type=int)
+    @click.argument("archivo", type=click.File("r", encoding="utf-8-sig"))
+    @click.option("--formato", type=click.Choice(["json", "csv", "gift"]),
+                  help="Por defecto se deduce de la extensión del archivo.")
+    def importar_preguntas(examen_id, archivo, formato):
+        """Importa un banco de preguntas (JSON, CSV o GIFT) a un examen en una transacción."""
+        from . import db
+        from .banco_preguntas import BancoInvalido, formato_por_nombre, importar_banco, leer_banco
+        from .models import Examen
+
+        if db.session.get(Examen, examen_id) is None:
+            raise click.ClickException(f"No existe el examen {examen_id}")
+
+        try:
+            preguntas = leer_banco(archivo.read(), formato or formato_por_nombre(archivo.name))
+        except BancoInvalido as error:
+            for detalle in error.errores:
+                click.echo(f"  {detalle}", err=True)
+            raise click.ClickException(f"{error}; no se importó nada.")
+        cantidad = importar_banco(examen_id, preguntas)
+        click.echo(f"{cantidad} preguntas importadas en el examen {examen_id}.")
@@ -0,0 +1,79 @@
+# condicional.py
+# Respuestas condicionales (ETag débil + 304) para páginas que se leen mucho
+# y cambian poco. El ETag sale de contadores de versión (Curso.version,
+# Examen.version) más el usuario y su rol, así que se puede comparar con
+# If-None-Match con una consulta mínima, antes de cargar objetos del ORM o
+# renderizar la plantilla. Cada ruta que modifica un curso llama a
+# nueva_version_curso en la misma transacción que el cambio.
+import hashlib
+import os
+
+from flask import current_app, g, make_response, request, session
+from sqlalchemy import update
+
+from . import db
+from .estaticos import version_estaticos
+from .models import Curso
+
+
+def nueva_version_curso(curso_id):
+    """Marca el curso como modificado; se guarda con el próximo commit."""
+    db.session.execute(
+        update(Curso).where(Curso.id == curso_id).values(version=Curso.version + 1)
+    )
+
+
+def _version_plantillas():
+    # Un deploy que cambia las plantillas no debe responder 304 con HTML viejo.
+    # Se calcula una vez por proceso y es igual en todos los workers del deploy.
+    version = current_app.extensions.get("version_plantillas")
+    if version is None:
+        firma = hashlib.blake2b(digest_size=8)
+        for directorio, _, archivos in sorted(os.walk(current_app.jinja_loader.searchpath[0])):
+            for nombre in sorted(archivos):
+                datos = os.stat(os.path.join(directorio, nombre))
+                firma.update(f"{nombre}:{datos.st_size}:{datos.st_mtime_ns};".encode())
+        # Las páginas enlazan los estáticos por su huella: otro CSS, otro HTML
+        firma.update(version_estaticos().encode())
+        version = current_app.extensions["version_plantillas"] = firma.hexdigest()
+    return version
+
+
+def etag_vista(usuario, *versiones):
+    """ETag (sin comillas) de una vista para este usuario y estas versiones de datos."""
+    partes = [_version_plantillas(), request.endpoint, usuario.rol, usuario.id, request.query_string]
+    partes.extend(versiones)
+    return hashlib.blake2b(repr(partes).encode(), digest_size=12).hexdigest()
+
+
+def _cabeceras(respuesta, etag):
+    respuesta.set_etag(etag, weak=True)
+    # private: contiene datos del usuario; no-cache: revalidar siempre con el ETag
+    respuesta.headers["Cache-Control"] = "private, no-cache"
+    return respuesta
+
+
+def no_modificado(etag):
+    """La respuesta 304 si el navegador ya tiene esta versión; None si hay que renderizar."""
+    if "_flashes" in session:
+        # Hay un mensaje flash pendiente: se renderiza para mostrarlo y la
+        # respuesta sale sin ETag (ver con_etag)
+        g.vista_con_flashes = True
+        return None
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    return _cabeceras(current_app.response_class(status=304), etag)
+
+
+def con_etag(contenido, etag):
+    """Arma la respuesta (200) con el ETag y las cabeceras de caché.
+
+    Una página que mostró mensajes flash no lleva ETag: el mismo ETag que la
+    página sin mensajes haría que las visitas siguientes reciban 304 y el
+    navegador siga mostrando el mensaje viejo.
+    """
+    respuesta = make_response(contenido)
+    if g.get("vista_con_flashes") or "_flashes" in session:
+        respuesta.headers["Cache-Control"] = "private, no-store"
+        return respuesta
+    return _cabeceras(respuesta, etag)
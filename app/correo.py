@@ -0,0 +1,186 @@
+# correo.py
+# Cola de salida de correos: las vistas solo guardan una fila en CorreoPendiente
+# y un worker (hilo en segundo plano o proceso aparte) los envía en lotes,
+# reutilizando una única conexión SMTP por lote y reintentando con backoff.
+# Cada lote se reserva antes de enviarlo (varios workers no mandan el mismo
+# correo) y cada envío se confirma apenas sale.
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import or_, select, update
+
+from . import db
+from .models import CorreoPendiente
+
+_worker = None
+_despertar = threading.Event()
+_lock_worker = threading.Lock()
+
+
+def _ahora():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def encolar_correo(destinatario, asunto, cuerpo):
+    """Agrega un correo a la cola. Se envía cuando la sesión hace commit."""
+    correo = CorreoPendiente(
+        destinatario=destinatario,
+        asunto=asunto,
+        cuerpo=cuerpo,
+        proximo_intento=_ahora(),
+    )
+    db.session.add(correo)
+    return correo
+
+
+def notificar_worker():
+    """Avisa al worker que hay correos nuevos (llamar después del commit)."""
+    app = current_app._get_current_object()
+    if app.config.get("MAIL_OUTBOX_WORKER") == "thread":
+        _asegurar_worker(app)
+        _despertar.set()
+
+
+def procesar_cola(limite=None):
+    """Envía un lote de correos pendientes. Devuelve (enviados, fallidos)."""
+    config = current_app.config
+    pendientes = _reservar_lote(limite or config["MAIL_OUTBOX_BATCH"])
+    if not pendientes:
+        return 0, 0
+
+    from flask_mail import Message
+
+    enviados = fallidos = 0
+    procesados = set()
+    try:
+        with _mail().connect() as conexion:
+            for correo in pendientes:
+                try:
+                    conexion.send(Message(
+                        correo.asunto,
+                        recipients=[correo.destinatario],
+                        body=correo.cuerpo,
+                    ))
+                except Exception as error:
+                    _registrar_fallo(correo, error)
+                    fallidos += 1
+                else:
+                    correo.enviado_en = _ahora()
+                    # El cuerpo puede traer la contraseña inicial: no se guarda una vez enviado
+                    correo.cuerpo = ""
+                    correo.reservado_por = correo.reservado_hasta = None
+                    enviados += 1
+                procesados.add(correo.id)
+                # Cada correo queda registrado apenas sale: si el worker se cae, no se repite
+                db.session.commit()
+    except Exception as error:
+        # Falló la conexión SMTP (o la base): se reintenta lo que no se procesó
+        db.session.rollback()
+        for correo in pendientes:
+            if correo.id not in procesados:
+                _registrar_fallo(correo, error)
+                fallidos += 1
+        db.session.commit()
+
+    return enviados, fallidos
+
+
+def _reservar_lote(limite):
+    """Toma hasta `limite` correos para este worker y devuelve sus filas.
+
+    Varios workers (un hilo por proceso, `flask enviar-correos --loop`) miran la
+    misma cola: el UPDATE solo toma filas sin reserva vigente, así que cada
+    correo lo envía uno solo. Una reserva vencida (worker caído) se puede retomar.
+    """
+    ahora = _ahora()
+    libre = or_(CorreoPendiente.reservado_hasta.is_(None), CorreoPendiente.reservado_hasta < ahora)
+    candidatos = list(db.session.execute(
+        select(CorreoPendiente.id)
+        .where(
+            CorreoPendiente.enviado_en.is_(None),
+            CorreoPendiente.intentos < current_app.config["MAIL_OUTBOX_MAX_INTENTOS"],
+            CorreoPendiente.proximo_intento <= ahora,
+            libre,
+        )
+        .order_by(CorreoPendiente.id)
+        .limit(limite)
+        # PostgreSQL: filas que otro worker está reservando se saltean (SQLite lo ignora)
+        .with_for_update(skip_locked=True)
+    ).scalars())
+    if not candidatos:
+        db.session.commit()
+        return []
+
+    reserva = uuid.uuid4().hex
+    db.session.execute(
+        update(CorreoPendiente)
+        .where(CorreoPendiente.id.in_(candidatos), libre)
+        .values(
+            reservado_por=reserva,
+            reservado_hasta=ahora + timedelta(seconds=current_app.config["MAIL_OUTBOX_RESERVA"]),
+        )
+    )
+    db.session.commit()
+    return (
+        CorreoPendiente.query
+        .filter(CorreoPendiente.reservado_por == reserva)
+        .order_by(CorreoPendiente.id)
+        .all()
+    )
+
+
+def _mail():
+    """Estado de Flask-Mail de la app; se importa y configura con el primer envío."""
+    app = current_app._get_current_object()
+    estado = app.extensions.get("mail")
+    if estado is None:
+        from flask_mail import Mail
+
+        estado = Mail().init_app(app)
+    return estado
+
+
+def _registrar_fallo(correo, error):
+    correo.intentos += 1
+    correo.ultimo_error = str(error)[:500]
+    espera = current_app.config["MAIL_OUTBOX_BACKOFF"] * 2 ** (correo.intentos - 1)
+    correo.proximo_intento = _ahora() + timedelta(seconds=espera)
+    correo.reservado_por = correo.reservado_hasta = None
+    current_app.logger.warning(
+        "No se pudo enviar el correo %s a %s (intento %s): %s",
+        correo.id, correo.destinatario, correo.intentos, error,
+    )
+
+
+def drenar_cola(app, intervalo=None, detener=None):
+    """Bucle del worker: procesa lotes hasta vaciar la cola y luego espera."""
+    intervalo = intervalo or app.config["MAIL_OUTBOX_INTERVALO"]
+    while detener is None or not detener.is_set():
+        with app.app_context():
+            try:
+                enviados, fallidos = procesar_cola()
+            except Exception:
+                app.logger.exception("Error procesando la cola de correos")
+                db.session.rollback()
+                enviados = fallidos = 0
+            finally:
+                db.session.remove()
+        if enviados == 0 and fallidos == 0:
+            _despertar.wait(intervalo)
+            _despertar.clear()
+        elif enviados == 0:
+            # Todo el lote falló: no insistir en bucle cerrado
+            time.sleep(intervalo)
+
+
+def _asegurar_worker(app):
+    global _worker
+    with _lock_worker:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(
+                target=drenar_cola, args=(app,), name="cola-correos", daemon=True
+            )
+            _worker.start()
@@ -0,0 +1,261 @@
+# estadisticas.py
+# Contadores precalculados por curso (alumnos, archivos, exámenes) y por examen
+# (entregas, promedio, elecciones de cada opción) para que los paneles lean
+# una fila por curso/examen en vez de hacer COUNT/GROUP BY en cada visita.
+#
+# Se mantienen en la misma transacción que los datos:
+#   - after_flush: altas y bajas de Archivo, Examen y EntregaExamen (y cambios
+#     de puntaje hechos por el ORM).
+#   - llamadas explícitas desde los caminos que escriben con Core en lote:
+#     inscripciones (sumar_alumnos), entregas (sumar_elecciones) y corrección
+#     automática (fijar_puntajes).
+# `flask reconstruir-estadisticas` las recalcula desde cero.
+from collections import Counter, namedtuple
+
+from sqlalchemy import delete, event, func, insert, inspect, select, update
+
+from . import db
+from .models import (
+    Archivo, Curso, EntregaExamen, EstadisticaCurso, EstadisticaExamen, EstadisticaOpcion,
+    Examen, curso_alumno,
+)
+from .selecciones import consulta_frecuencias, decodificar
+
+ResumenCurso = namedtuple("ResumenCurso", "alumnos archivos examenes")
+ResumenExamen = namedtuple("ResumenExamen", "entregas corregidas promedio elecciones")
+
+CURSO_VACIO = ResumenCurso(0, 0, 0)
+
+
+def _sumar(conexion, modelo, claves, columnas, filas):
+    """INSERT ... ON CONFLICT DO UPDATE col = col + excluded.col, en lote."""
+    if not filas:
+        return
+    tabla = modelo.__table__
+    dialecto = conexion.dialect.name
+    if dialecto in ("sqlite", "postgresql"):
+        if dialecto == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as insert_dialecto
+        else:
+            from sqlalchemy.dialects.postgresql import insert as insert_dialecto
+        sentencia = insert_dialecto(tabla)
+        sentencia = sentencia.on_conflict_do_update(
+            index_elements=claves,
+            set_={columna: tabla.c[columna] + sentencia.excluded[columna] for columna in columnas},
+        )
+        conexion.execute(sentencia, filas)
+        return
+
+    # Otros motores: UPDATE y, si la fila no existía, INSERT
+    for fila in filas:
+        resultado = conexion.execute(
+            update(tabla)
+            .where(*(tabla.c[clave] == fila[clave] for clave in claves))
+            .values({columna: tabla.c[columna] + fila[columna] for columna in columnas})
+        )
+        if resultado.rowcount == 0:
+            conexion.execute(insert(tabla), fila)
+
+
+def _sumar_cursos(conexion, deltas):
+    """deltas: Counter {(curso_id, columna): cantidad}."""
+    por_curso = {}
+    for (curso_id, columna), cantidad in deltas.items():
+        if cantidad:
+            por_curso.setdefault(curso_id, dict(curso_id=curso_id, alumnos=0, archivos=0, examenes=0))[columna] += cantidad
+    _sumar(conexion, EstadisticaCurso, ["curso_id"], ["alumnos", "archivos", "examenes"], list(por_curso.values()))
+
+
+def _sumar_examenes(conexion, deltas):
+    """deltas: {examen_id: [entregas, corregidas, puntaje_suma]}."""
+    _sumar(conexion, EstadisticaExamen, ["examen_id"], ["entregas", "corregidas", "puntaje_suma"], [
+        dict(examen_id=examen_id, entregas=entregas, corregidas=corregidas, puntaje_suma=suma)
+        for examen_id, (entregas, corregidas, suma) in deltas.items()
+        if entregas or corregidas or suma
+    ])
+
+
+# ------------------- Actualización explícita (caminos en lote) -------------------
+
+def sumar_alumnos(curso_id, cantidad):
+    """Inscripciones agregadas (positivo) o quitadas (negativo) en el curso."""
+    if cantidad:
+        _sumar_cursos(db.session.connection(), Counter({(curso_id, "alumnos"): cantidad}))
+
+
+def sumar_elecciones(examen, filas):
+    """Cuenta las opciones elegidas en las respuestas de una entrega (examen: ExamenVista)."""
+    opciones = {pregunta.id: [opcion.id for opcion in pregunta.opciones] for pregunta in examen.preguntas}
+    elecciones = Counter()
+    for fila in filas:
+        if fila.get("respuesta_opciones"):
+            elecciones.update(decodificar(fila["respuesta_opciones"], opciones.get(fila["pregunta_id"], ())))
+    _sumar(db.session.connection(), EstadisticaOpcion, ["opcion_id"], ["elecciones"], [
+        {"opcion_id": opcion_id, "examen_id": examen.id, "elecciones": cantidad}
+        for opcion_id, cantidad in sorted(elecciones.items())
+    ])
+
+
+def fijar_puntajes(examen_id, puntajes):
+    """Tras corregir un examen completo: suma y cantidad de puntajes desde cero."""
+    conexion = db.session.connection()
+    tabla = EstadisticaExamen.__table__
+    valores = {"corregidas": len(puntajes), "puntaje_suma": float(sum(puntajes))}
+    resultado = conexion.execute(update(tabla).where(tabla.c.examen_id == examen_id).values(valores))
+    if resultado.rowcount == 0:
+        entregas = conexion.execute(
+            select(func.count()).select_from(EntregaExamen).where(EntregaExamen.examen_id == examen_id)
+        ).scalar()
+        conexion.execute(insert(tabla), dict(valores, examen_id=examen_id, entregas=entregas))
+
+
+# ------------------- Eventos de sesión -------------------
+
+def _cambio_puntaje(entrega):
+    """(corregidas, suma) que cambian por una modificación de puntaje vía ORM."""
+    historia = inspect(entrega).attrs.puntaje.history
+    if not historia.has_changes():
+        return 0, 0.0
+    anterior = historia.deleted[0] if historia.deleted else None
+    nuevo = historia.added[0] if historia.added else None
+    return (
+        (nuevo is not None) - (anterior is not None),
+        (nuevo or 0.0) - (anterior or 0.0),
+    )
+
+
+@event.listens_for(db.session, "after_flush")
+def _actualizar(session, contexto_flush):
+    cursos = Counter()
+    examenes = {}
+    examenes_borrados = set()
+    cursos_borrados = set()
+
+    def sumar_examen(examen_id, entregas, corregidas, suma):
+        actual = examenes.setdefault(examen_id, [0, 0, 0.0])
+        actual[0] += entregas
+        actual[1] += corregidas
+        actual[2] += suma
+
+    for objeto in session.new:
+        if isinstance(objeto, Archivo):
+            cursos[objeto.curso_id, "archivos"] += 1
+        elif isinstance(objeto, Examen):
+            cursos[objeto.curso_id, "examenes"] += 1
+        elif isinstance(objeto, EntregaExamen):
+            con_puntaje = objeto.puntaje is not None
+            sumar_examen(objeto.examen_id, 1, int(con_puntaje), objeto.puntaje or 0.0)
+
+    for objeto in session.dirty:
+        if isinstance(objeto, EntregaExamen):
+            corregidas, suma = _cambio_puntaje(objeto)
+            if corregidas or suma:
+                sumar_examen(objeto.examen_id, 0, corregidas, suma)
+
+    for objeto in session.deleted:
+        if isinstance(objeto, Archivo):
+            cursos[objeto.curso_id, "archivos"] -= 1
+        elif isinstance(objeto, Examen):
+            cursos[objeto.curso_id, "examenes"] -= 1
+            examenes_borrados.add(objeto.id)
+        elif isinstance(objeto, EntregaExamen):
+            con_puntaje = objeto.puntaje is not None
+            sumar_examen(objeto.examen_id, -1, -int(con_puntaje), -(objeto.puntaje or 0.0))
+        elif isinstance(objeto, Curso):
+            cursos_borrados.add(objeto.id)
+
+    if not (cursos or examenes or examenes_borrados or cursos_borrados):
+        return
+
+    conexion = session.connection()
+    # Con SQLite las FK no borran en cascada: se limpian a mano
+    if cursos_borrados:
+        conexion.execute(delete(EstadisticaCurso).where(EstadisticaCurso.curso_id.in_(cursos_borrados)))
+        for clave in [clave for clave in cursos if clave[0] in cursos_borrados]:
+            del cursos[clave]
+    if examenes_borrados:
+        conexion.execute(delete(EstadisticaExamen).where(EstadisticaExamen.examen_id.in_(examenes_borrados)))
+        conexion.execute(delete(EstadisticaOpcion).where(EstadisticaOpcion.examen_id.in_(examenes_borrados)))
+        for examen_id in examenes_borrados:
+            examenes.pop(examen_id, None)
+    _sumar_cursos(conexion, cursos)
+    _sumar_examenes(conexion, examenes)
+
+
+# ------------------- Lectura -------------------
+
+def estadisticas_cursos(curso_ids):
+    """{curso_id: ResumenCurso} en una consulta; los cursos sin fila van en 0."""
+    if not curso_ids:
+        return {}
+    resumenes = dict.fromkeys(curso_ids, CURSO_VACIO)
+    filas = db.session.execute(
+        select(EstadisticaCurso.curso_id, EstadisticaCurso.alumnos, EstadisticaCurso.archivos, EstadisticaCurso.examenes)
+        .where(EstadisticaCurso.curso_id.in_(curso_ids))
+    )
+    for curso_id, alumnos, archivos, examenes in filas:
+        resumenes[curso_id] = ResumenCurso(alumnos, archivos, examenes)
+    return resumenes
+
+
+def estadisticas_examen(examen_id):
+    """ResumenExamen con {opcion_id: elecciones}; promedio None si no hay corregidas."""
+    fila = db.session.execute(
+        select(EstadisticaExamen.entregas, EstadisticaExamen.corregidas, EstadisticaExamen.puntaje_suma)
+        .where(EstadisticaExamen.examen_id == examen_id)
+    ).first()
+    entregas, corregidas, suma = fila or (0, 0, 0.0)
+    elecciones = dict(db.session.execute(
+        select(EstadisticaOpcion.opcion_id, EstadisticaOpcion.elecciones)
+        .where(EstadisticaOpcion.examen_id == examen_id)
+    ).all())
+    return ResumenExamen(entregas, corregidas, suma / corregidas if corregidas else None, elecciones)
+
+
+# ------------------- Reconstrucción -------------------
+
+def reconstruir_estadisticas():
+    """Recalcula todas las estadísticas desde los datos y confirma.
+
+    Devuelve (cursos, examenes, opciones) con la cantidad de filas escritas.
+    """
+    conexion = db.session.connection()
+    for modelo in (EstadisticaOpcion, EstadisticaExamen, EstadisticaCurso):
+        conexion.execute(delete(modelo))
+
+    def contar(tabla, columna):
+        return (
+            select(func.count()).select_from(tabla).where(columna == Curso.id)
+            .correlate(Curso).scalar_subquery()
+        )
+
+    conexion.execute(insert(EstadisticaCurso).from_select(
+        ["curso_id", "alumnos", "archivos", "examenes"],
+        select(
+            Curso.id,
+            contar(curso_alumno, curso_alumno.c.curso_id),
+            contar(Archivo.__table__, Archivo.curso_id),
+            contar(Examen.__table__, Examen.curso_id),
+        ),
+    ))
+    conexion.execute(insert(EstadisticaExamen).from_select(
+        ["examen_id", "entregas", "corregidas", "puntaje_suma"],
+        select(
+            EntregaExamen.examen_id,
+            func.count(),
+            func.count(EntregaExamen.puntaje),
+            func.coalesce(func.sum(EntregaExamen.puntaje), 0),
+        ).group_by(EntregaExamen.examen_id),
+    ))
+
+    # Elecciones por opción contadas en la base con operadores de bits sobre las
+    # máscaras de las respuestas entregadas (ver selecciones.py)
+    conexion.execute(insert(EstadisticaOpcion).from_select(
+        ["opcion_id", "examen_id", "elecciones"], consulta_frecuencias(),
+    ))
+
+    cursos = conexion.execute(select(func.count()).select_from(EstadisticaCurso)).scalar()
+    examenes = conexion.execute(select(func.count()).select_from(EstadisticaExamen)).scalar()
+    opciones = conexion.execute(select(func.count()).select_from(EstadisticaOpcion)).scalar()
+    db.session.commit()
+    return cursos, examenes, opciones
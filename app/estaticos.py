@@ -0,0 +1,218 @@
+# estaticos.py
+# Estáticos con huella de contenido y precomprimidos.
+# `flask construir-estaticos` copia cada archivo de static/ a static/dist/ con
+# el hash del contenido en el nombre (style.3f9c0a1b2d4e.css), escribe al lado las
+# versiones .br/.gz de los archivos de texto y un manifest.json. Con el manifest:
+#   - url_for('static', filename='style.css') apunta a la versión con huella;
+#   - esas URLs se sirven con caché immutable por un año y en la codificación
+#     que acepte el navegador (br > gzip > sin comprimir).
+# Si el contenido cambia, cambia el nombre: el navegador nunca revalida y una
+# vista repetida no descarga ningún estático. Sin manifest (o en debug) todo se
+# sirve como antes desde static/. El manifest se lee al armar la app: después
+# de construir hay que reiniciar los workers.
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import tempfile
+
+from flask import current_app, request, send_from_directory
+from flask.sessions import SecureCookieSessionInterface
+
+MANIFEST = "manifest.json"
+# En orden de preferencia: (Content-Encoding, extensión del archivo)
+CODIFICACIONES = (("br", ".br"), ("gzip", ".gz"))
+TIPOS_TEXTO = {"application/javascript", "application/json", "application/xml", "image/svg+xml"}
+_URL_CSS = re.compile(r"""url\(\s*(['"]?)([^'")\s]+)\1\s*\)""")
+
+
+class Estaticos:
+    """Manifest cargado: nombre con huella y codificaciones disponibles de cada estático."""
+
+    def __init__(self, directorio, datos):
+        self.version = datos["version"]
+        self.rutas = {}     # {nombre original: nombre con huella, relativo a static/}
+        self.servidos = {}  # {nombre con huella: (mimetype, codificaciones)}
+        for original, archivo in datos["archivos"].items():
+            ruta = posixpath.join(directorio, archivo["ruta"])
+            self.rutas[original] = ruta
+            self.servidos[ruta] = (mimetypes.guess_type(original)[0], tuple(archivo["codificaciones"]))
+
+
+def registrar_estaticos(app):
+    """Carga el manifest si ya se construyó y engancha url_for y la vista de static."""
+    directorio = app.config["ESTATICOS_DIRECTORIO"]
+    try:
+        with open(os.path.join(app.static_folder, directorio, MANIFEST), encoding="utf-8") as entrada:
+            app.extensions["estaticos"] = Estaticos(directorio, json.load(entrada))
+    except FileNotFoundError:
+        return
+    app.url_defaults(_url_con_huella)
+    app.view_functions["static"] = servir_estatico
+    app.session_interface = SesionSinEstaticos()
+
+
+class SesionSinEstaticos(SecureCookieSessionInterface):
+    """Sesión en cookie que no toca las respuestas de estáticos con huella.
+
+    Flask-Login lee la sesión en cada respuesta y eso agrega Vary: Cookie: el
+    navegador volvería a pedir el CSS cada vez que cambia la cookie de sesión.
+    """
+
+    def save_session(self, app, session, response):
+        if response.cache_control.immutable and not session.modified:
+            return
+        super().save_session(app, session, response)
+
+
+def _url_con_huella(endpoint, values):
+    # En debug se sirven los originales: los cambios se ven sin reconstruir
+    if endpoint == "static" and not current_app.debug:
+        ruta = current_app.extensions["estaticos"].rutas.get(values.get("filename"))
+        if ruta:
+            values["filename"] = ruta
+
+
+def servir_estatico(filename):
+    """Vista de /static: los archivos con huella salen comprimidos y con caché immutable."""
+    servido = current_app.extensions["estaticos"].servidos.get(filename)
+    if servido is None:
+        return current_app.send_static_file(filename)
+
+    mimetype, codificaciones = servido
+    elegida = next((codificacion for codificacion in codificaciones if request.accept_encodings[codificacion]), None)
+    archivo = filename + dict(CODIFICACIONES)[elegida] if elegida else filename
+    respuesta = send_from_directory(
+        current_app.static_folder, archivo,
+        mimetype=mimetype, max_age=current_app.config["ESTATICOS_MAX_AGE"],
+    )
+    if elegida:
+        respuesta.content_encoding = elegida
+    if codificaciones:
+        respuesta.vary.add("Accept-Encoding")
+    respuesta.cache_control.immutable = True
+    return respuesta
+
+
+def version_estaticos():
+    """Versión del manifest cargado ("" si no hay): cambia con cualquier estático."""
+    estaticos = current_app.extensions.get("estaticos")
+    return estaticos.version if estaticos else ""
+
+
+# ------------------- Construcción -------------------
+
+def _es_texto(nombre):
+    tipo = mimetypes.guess_type(nombre)[0] or ""
+    return tipo.startswith("text/") or tipo in TIPOS_TEXTO
+
+
+def _comprimir(datos, brotli):
+    """{codificación: bytes} de las versiones comprimidas que ahorran al menos un 10%."""
+    variantes = {"gzip": gzip.compress(datos, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variantes["br"] = brotli.compress(datos, quality=11)
+    return {codificacion: comprimido for codificacion, comprimido in variantes.items()
+            if len(comprimido) < len(datos) * 0.9}
+
+
+def _reescribir_css(datos, nombre, rutas):
+    """Apunta los url(...) relativos de una hoja de estilos a los nombres con huella."""
+    carpeta = posixpath.dirname(nombre)
+
+    def reemplazar(coincidencia):
+        comillas, url = coincidencia.groups()
+        if url.startswith(("data:", "#", "/")) or "://" in url:
+            return coincidencia.group(0)
+        ruta, sufijo = re.match(r"([^?#]*)(.*)", url).groups()
+        objetivo = posixpath.normpath(posixpath.join(carpeta, ruta))
+        if objetivo not in rutas:
+            return coincidencia.group(0)
+        nueva = posixpath.relpath(rutas[objetivo], carpeta or ".")
+        return f"url({comillas}{nueva}{sufijo}{comillas})"
+
+    return _URL_CSS.sub(reemplazar, datos.decode("utf-8")).encode("utf-8")
+
+
+def _escribir(ruta, datos):
+    # Reemplazo atómico: los workers pueden estar sirviendo mientras se construye
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), prefix=".tmp-")
+    with os.fdopen(descriptor, "wb") as salida:
+        salida.write(datos)
+    os.replace(temporal, ruta)
+
+
+def _originales(raiz, excluidos):
+    nombres = []
+    for directorio, carpetas, archivos in os.walk(raiz):
+        relativo = os.path.relpath(directorio, raiz)
+        carpetas[:] = sorted(
+            carpeta for carpeta in carpetas
+            if os.path.normpath(os.path.join(relativo, carpeta)) not in excluidos
+        )
+        nombres.extend(
+            posixpath.normpath(posixpath.join(relativo.replace(os.sep, "/"), archivo))
+            for archivo in archivos if not archivo.startswith(".")
+        )
+    # Las hojas de estilos al final: sus url(...) usan los nombres ya calculados
+    return sorted(nombres, key=lambda nombre: (nombre.endswith(".css"), nombre))
+
+
+def construir_estaticos(limpiar=False):
+    """Genera static/<ESTATICOS_DIRECTORIO>/ con huellas, versiones comprimidas y manifest.
+
+    Devuelve (archivos, comprimidos, borrados). Las versiones anteriores se
+    conservan (páginas en caché pueden seguir pidiéndolas) salvo con limpiar=True.
+    """
+    raiz = current_app.static_folder
+    directorio = current_app.config["ESTATICOS_DIRECTORIO"]
+    destino = os.path.join(raiz, directorio)
+    # uploads/: subidas viejas que todavía no se movieron con `flask mover-subidas`
+    excluidos = {os.path.normpath(directorio), "uploads"}
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        current_app.logger.warning("brotli no está instalado: solo se generan versiones .gz")
+
+    archivos, rutas, generados = {}, {}, {MANIFEST}
+    for nombre in _originales(raiz, excluidos):
+        with open(os.path.join(raiz, *nombre.split("/")), "rb") as entrada:
+            datos = entrada.read()
+        if nombre.endswith(".css"):
+            datos = _reescribir_css(datos, nombre, rutas)
+        base, extension = posixpath.splitext(nombre)
+        ruta = rutas[nombre] = f"{base}.{hashlib.sha256(datos).hexdigest()[:12]}{extension}"
+        variantes = _comprimir(datos, brotli) if _es_texto(nombre) else {}
+        salidas = [("", datos)] + [
+            (sufijo, variantes[codificacion]) for codificacion, sufijo in CODIFICACIONES if codificacion in variantes
+        ]
+        for sufijo, contenido in salidas:
+            completa = os.path.join(destino, *(ruta + sufijo).split("/"))
+            generados.add(ruta + sufijo)
+            if not os.path.exists(completa):  # mismo nombre = mismo contenido
+                _escribir(completa, contenido)
+        archivos[nombre] = {
+            "ruta": ruta,
+            "codificaciones": [codificacion for codificacion, _ in CODIFICACIONES if codificacion in variantes],
+        }
+
+    version = hashlib.sha256(json.dumps(archivos, sort_keys=True).encode()).hexdigest()[:12]
+    _escribir(os.path.join(destino, MANIFEST), json.dumps(
+        {"version": version, "archivos": archivos}, indent=2, sort_keys=True,
+    ).encode("utf-8"))
+
+    borrados = 0
+    if limpiar:
+        for carpeta, _, nombres in os.walk(destino):
+            for nombre in nombres:
+                completa = os.path.join(carpeta, nombre)
+                if os.path.relpath(completa, destino).replace(os.sep, "/") not in generados:
+                    os.remove(completa)
+                    borrados += 1
+    comprimidos = sum(len(archivo["codificaciones"]) for archivo in archivos.values())
+    return len(archivos), comprimidos, borrados
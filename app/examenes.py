@@ -0,0 +1,237 @@
+# examenes.py
+# Carga de exámenes completos y registro de entregas de alumnos.
+# Las respuestas sin EntregaExamen son borradores autoguardados (ver borradores.py)
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+from sqlalchemy import delete, exists, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+
+from . import db
+from .cache import obtener_cache
+from .estadisticas import sumar_elecciones
+from .models import EntregaExamen, Examen, Pregunta, RespuestaAlumno
+from .selecciones import codificar
+
+# Vista inmutable de un examen tal como lo ve el alumno (sin las respuestas correctas).
+# Es igual para todos los alumnos, así que se arma una vez por versión y se cachea.
+OpcionVista = namedtuple("OpcionVista", "id texto")
+PreguntaVista = namedtuple("PreguntaVista", "id texto tipo opciones")
+ExamenVista = namedtuple("ExamenVista", "id curso_id curso_nombre titulo version preguntas")
+
+# Un lock por examen (mientras alguien lo use): armar un examen no frena al resto
+_lock_vistas = threading.Lock()
+_locks_examen = {}  # {examen_id: [lock, hilos que lo usan]}
+
+
+def cargar_examen_completo(examen_id):
+    """Trae examen, curso, preguntas y opciones en una sola consulta (o None)."""
+    return (
+        Examen.query
+        .options(
+            joinedload(Examen.curso),
+            joinedload(Examen.preguntas).joinedload(Pregunta.opciones),
+        )
+        .filter(Examen.id == examen_id)
+        .first()
+    )
+
+
+def _armar_vista(examen):
+    return ExamenVista(
+        id=examen.id,
+        curso_id=examen.curso_id,
+        curso_nombre=examen.curso.nombre,
+        titulo=examen.titulo,
+        version=examen.version,
+        preguntas=tuple(
+            PreguntaVista(
+                id=pregunta.id,
+                texto=pregunta.texto,
+                tipo=pregunta.tipo,
+                opciones=tuple(
+                    OpcionVista(id=opcion.id, texto=opcion.texto)
+                    for opcion in sorted(pregunta.opciones, key=lambda o: o.id)
+                ),
+            )
+            for pregunta in sorted(examen.preguntas, key=lambda p: p.id)
+        ),
+    )
+
+
+def obtener_vista_examen(examen_id):
+    """Devuelve la ExamenVista cacheada para la versión actual del examen (o None).
+
+    Con la caché caliente solo se consulta la columna version; el examen completo
+    se carga de la base una vez por versión.
+    """
+    version = db.session.execute(
+        select(Examen.version).where(Examen.id == examen_id)
+    ).scalar()
+    if version is None:
+        return None
+
+    cache = obtener_cache("examenes", maxsize=512)
+    clave = f"{examen_id}:{version}"
+    vista = cache.get(clave)
+    if vista is None:
+        # Un solo hilo arma la vista aunque lleguen muchos alumnos a la vez
+        with _lock_examen(examen_id):
+            vista = cache.get(clave)
+            if vista is None:
+                examen = cargar_examen_completo(examen_id)
+                if examen is None:  # se borró entre las dos consultas
+                    return None
+                vista = _armar_vista(examen)
+                # Se guarda con la versión que se cargó, que puede ser más nueva
+                cache.set(f"{examen_id}:{examen.version}", vista)
+                if examen.version > 1:
+                    cache.delete(f"{examen_id}:{examen.version - 1}")
+    return vista
+
+
+@contextmanager
+def _lock_examen(examen_id):
+    with _lock_vistas:
+        entrada = _locks_examen.setdefault(examen_id, [threading.Lock(), 0])
+        entrada[1] += 1
+    try:
+        with entrada[0]:
+            yield
+    finally:
+        with _lock_vistas:
+            entrada[1] -= 1
+            if not entrada[1]:
+                del _locks_examen[examen_id]
+
+
+def nueva_version_examen(examen_id):
+    """Marca el examen como modificado; se guarda con el próximo commit."""
+    db.session.execute(
+        update(Examen).where(Examen.id == examen_id).values(version=Examen.version + 1)
+    )
+
+
+def ya_entregado(examen_id, alumno_id):
+    return db.session.query(
+        EntregaExamen.query.filter_by(examen_id=examen_id, alumno_id=alumno_id).exists()
+    ).scalar()
+
+
+def fila_respuesta(pregunta, valor):
+    """Fila de RespuestaAlumno (sin alumno_id) para una PreguntaVista.
+
+    valor: el texto de una pregunta abierta o los ids de opción elegidos
+    (lista, o un único id), que se guardan como máscara de bits (ver
+    selecciones.py). Devuelve None si el tipo de pregunta no se responde.
+    """
+    if pregunta.tipo == "abierta":
+        return {
+            "pregunta_id": pregunta.id,
+            "respuesta_texto": None if valor is None else str(valor),
+            "respuesta_opciones": None,
+        }
+    if pregunta.tipo == "multiple":
+        if valor is None:
+            valor = ()
+        elif isinstance(valor, (str, int)):
+            valor = (valor,)
+        elegidos = {int(o_id) for o_id in valor if str(o_id).isdigit()}
+        return {
+            "pregunta_id": pregunta.id,
+            "respuesta_texto": None,
+            "respuesta_opciones": codificar(elegidos, [opcion.id for opcion in pregunta.opciones]),
+        }
+    return None
+
+
+def respuestas_desde_formulario(examen, form):
+    """Arma las filas de RespuestaAlumno a partir del formulario enviado."""
+    filas = []
+    for pregunta in examen.preguntas:
+        campo = f"pregunta_{pregunta.id}"
+        valor = form.get(campo) if pregunta.tipo == "abierta" else form.getlist(campo)
+        fila = fila_respuesta(pregunta, valor)
+        if fila is not None:
+            filas.append(fila)
+    return filas
+
+
+def guardar_respuestas(filas, solo_borradores=False):
+    """Inserta o reemplaza respuestas (alumno_id, pregunta_id) en lote.
+
+    Un borrador autoguardado ya puede tener su fila: se pisa con la nueva.
+    Con solo_borradores=True (volcado del autoguardado) no se tocan las
+    respuestas de exámenes que el alumno ya entregó; la condición se evalúa en
+    la misma sentencia, así que vale aunque la entrega se confirme mientras tanto.
+    """
+    tabla = RespuestaAlumno.__table__
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto in ("sqlite", "postgresql"):
+        if dialecto == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as insert_dialecto
+        else:
+            from sqlalchemy.dialects.postgresql import insert as insert_dialecto
+        sentencia = insert_dialecto(tabla)
+        condicion = None
+        if solo_borradores:
+            # La entrega escribe todas las preguntas, así que alcanza con no pisar
+            condicion = ~exists().where(
+                EntregaExamen.alumno_id == sentencia.excluded.alumno_id,
+                EntregaExamen.examen_id == select(Pregunta.examen_id)
+                .where(Pregunta.id == sentencia.excluded.pregunta_id)
+                .scalar_subquery(),
+            )
+        sentencia = sentencia.on_conflict_do_update(
+            index_elements=["alumno_id", "pregunta_id"],
+            set_={
+                "respuesta_texto": sentencia.excluded.respuesta_texto,
+                "respuesta_opciones": sentencia.excluded.respuesta_opciones,
+            },
+            where=condicion,
+        )
+        db.session.execute(sentencia, filas)
+        return
+
+    # Otros motores: se borran las que existan y se insertan todas
+    if solo_borradores:
+        entregadas = set(db.session.execute(
+            select(EntregaExamen.alumno_id, Pregunta.id)
+            .join(Pregunta, Pregunta.examen_id == EntregaExamen.examen_id)
+            .where(
+                EntregaExamen.alumno_id.in_({fila["alumno_id"] for fila in filas}),
+                Pregunta.id.in_({fila["pregunta_id"] for fila in filas}),
+            )
+        ).tuples())
+        filas = [fila for fila in filas if (fila["alumno_id"], fila["pregunta_id"]) not in entregadas]
+        if not filas:
+            return
+    por_alumno = {}
+    for fila in filas:
+        por_alumno.setdefault(fila["alumno_id"], []).append(fila["pregunta_id"])
+    for alumno_id, pregunta_ids in por_alumno.items():
+        db.session.execute(
+            delete(tabla).where(tabla.c.alumno_id == alumno_id, tabla.c.pregunta_id.in_(pregunta_ids))
+        )
+    db.session.execute(insert(tabla), filas)
+
+
+def registrar_entrega(examen, alumno_id, filas):
+    """Guarda la entrega y todas sus respuestas en una única transacción.
+
+    Devuelve False si el alumno ya había entregado este examen (no escribe nada).
+    """
+    try:
+        db.session.add(EntregaExamen(examen_id=examen.id, alumno_id=alumno_id))
+        db.session.flush()
+        if filas:
+            guardar_respuestas([dict(fila, alumno_id=alumno_id) for fila in filas])
+            sumar_elecciones(examen, filas)
+        db.session.commit()
+    except IntegrityError:
+        # Otra petición del mismo alumno ya registró la entrega
+        db.session.rollback()
+        return False
+    return True
@@ -0,0 +1,150 @@
+# exportacion.py
+# Exportación de respuestas y notas de un curso a CSV o XLSX sin cargar todo
+# en memoria: las filas salen de consultas Core leídas por lotes (yield_per,
+# cursor del lado del servidor en PostgreSQL) y se escriben a medida que llegan.
+# El CSV se envía en streaming (el encabezado sale antes de consultar);
+# el XLSX se arma con XlsxWriter en modo constant_memory sobre un temporal.
+import csv
+import io
+
+from sqlalchemy import and_, select
+
+from . import db
+from .models import EntregaExamen, Examen, Opcion, Pregunta, RespuestaAlumno, User
+from .selecciones import decodificar
+
+TAMANO_LOTE = 1000           # filas por lote leído de la base
+TAMANO_BLOQUE_CSV = 64 * 1024  # caracteres acumulados antes de enviar un bloque
+
+ENCABEZADOS = {
+    "respuestas": (
+        "examen_id", "examen", "alumno_id", "alumno", "email", "pregunta_id", "pregunta",
+        "tipo", "respuesta", "opciones_ids", "entregado_en", "puntaje_examen",
+    ),
+    "notas": ("examen_id", "examen", "alumno_id", "alumno", "email", "entregado_en", "puntaje"),
+}
+
+
+def _opciones_por_pregunta(curso_id):
+    """{pregunta_id: ([opcion_id, ...], [texto, ...])} en orden de id (una consulta)."""
+    opciones = {}
+    for pregunta_id, opcion_id, texto in db.session.execute(
+        select(Opcion.pregunta_id, Opcion.id, Opcion.texto)
+        .join(Pregunta, Pregunta.id == Opcion.pregunta_id)
+        .join(Examen, Examen.id == Pregunta.examen_id)
+        .where(Examen.curso_id == curso_id)
+        .order_by(Opcion.pregunta_id, Opcion.id)
+    ):
+        ids, textos = opciones.setdefault(pregunta_id, ([], []))
+        ids.append(opcion_id)
+        textos.append(texto)
+    return opciones
+
+
+def filas_respuestas(curso_id):
+    """Una fila por respuesta entregada del curso, ordenadas por examen, alumno y pregunta.
+
+    Los borradores autoguardados (respuestas sin EntregaExamen) no se exportan.
+    """
+    opciones = _opciones_por_pregunta(curso_id)
+    respuesta, pregunta, examen = RespuestaAlumno.__table__, Pregunta.__table__, Examen.__table__
+    alumno, entrega = User.__table__, EntregaExamen.__table__
+    consulta = (
+        select(
+            examen.c.id, examen.c.titulo, alumno.c.id, alumno.c.nombre, alumno.c.email,
+            pregunta.c.id, pregunta.c.texto, pregunta.c.tipo,
+            respuesta.c.respuesta_texto, respuesta.c.respuesta_opciones,
+            entrega.c.entregado_en, entrega.c.puntaje,
+        )
+        .select_from(
+            respuesta
+            .join(pregunta, pregunta.c.id == respuesta.c.pregunta_id)
+            .join(examen, examen.c.id == pregunta.c.examen_id)
+            .join(alumno, alumno.c.id == respuesta.c.alumno_id)
+            .join(entrega, and_(
+                entrega.c.examen_id == examen.c.id, entrega.c.alumno_id == respuesta.c.alumno_id
+            ))
+        )
+        .where(examen.c.curso_id == curso_id)
+        .order_by(examen.c.id, alumno.c.id, pregunta.c.id)
+    )
+    for (examen_id, titulo, alumno_id, nombre, email, pregunta_id, texto, tipo,
+         respuesta_texto, respuesta_opciones, entregado_en, puntaje) in db.session.execute(
+            consulta, execution_options={"yield_per": TAMANO_LOTE}):
+        opciones_ids = None
+        if tipo == "multiple":
+            # La máscara se traduce a los ids y textos de las opciones elegidas
+            ids, textos = opciones.get(pregunta_id, ((), ()))
+            respuesta_texto = " | ".join(decodificar(respuesta_opciones, textos))
+            opciones_ids = ",".join(str(o_id) for o_id in decodificar(respuesta_opciones, ids))
+        yield (examen_id, titulo, alumno_id, nombre, email, pregunta_id, texto, tipo,
+               respuesta_texto, opciones_ids, entregado_en, puntaje)
+
+
+def filas_notas(curso_id):
+    """Una fila por EntregaExamen del curso (la planilla de notas)."""
+    consulta = (
+        select(
+            Examen.id, Examen.titulo, User.id, User.nombre, User.email,
+            EntregaExamen.entregado_en, EntregaExamen.puntaje,
+        )
+        .join(Examen, Examen.id == EntregaExamen.examen_id)
+        .join(User, User.id == EntregaExamen.alumno_id)
+        .where(Examen.curso_id == curso_id)
+        .order_by(Examen.id, User.id)
+    )
+    yield from db.session.execute(consulta, execution_options={"yield_per": TAMANO_LOTE})
+
+
+FILAS = {"respuestas": filas_respuestas, "notas": filas_notas}
+
+
+# Una celda de texto que empieza así la toma Excel como fórmula (=HYPERLINK(...), etc.)
+_INICIO_FORMULA = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _celda_segura(valor):
+    """Texto que no se puede interpretar como fórmula: se le antepone una comilla."""
+    if isinstance(valor, str) and valor.startswith(_INICIO_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def generar_csv(encabezados, filas):
+    """Genera el CSV en bloques de texto; el primero (BOM + encabezado) sale enseguida."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    buffer.write("\ufeff")  # para que Excel lo abra como UTF-8
+    escritor.writerow(encabezados)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for fila in filas:
+        escritor.writerow([_celda_segura(valor) for valor in fila])
+        if buffer.tell() >= TAMANO_BLOQUE_CSV:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def escribir_xlsx(encabezados, filas, destino):
+    """Escribe la planilla en destino (ruta o archivo binario) con memoria constante."""
+    try:
+        import xlsxwriter
+    except ImportError as error:
+        raise RuntimeError("La exportación XLSX requiere instalar el paquete XlsxWriter") from error
+
+    libro = xlsxwriter.Workbook(destino, {
+        "constant_memory": True,  # cada fila se baja a disco al pasar a la siguiente
+        "default_date_format": "yyyy-mm-dd hh:mm",
+        # Las respuestas abiertas se escriben como texto, nunca como fórmula o link
+        "strings_to_formulas": False,
+        "strings_to_urls": False,
+    })
+    hoja = libro.add_worksheet("Datos")
+    hoja.write_row(0, 0, encabezados, libro.add_format({"bold": True}))
+    for numero, fila in enumerate(filas, start=1):
+        hoja.write_row(numero, 0, fila)
+    libro.close()
@@ -0,0 +1,145 @@
+# inscripciones.py
+# Altas y bajas de alumnos en cursos trabajando con conjuntos de ids,
+# directamente sobre la tabla curso_alumno (sin cargar objetos User uno por uno)
+import csv
+
+from sqlalchemy import select
+
+from . import db
+from .condicional import nueva_version_curso
+from .estadisticas import sumar_alumnos
+from .models import User, curso_alumno
+
+
+class CohorteInvalida(ValueError):
+    """El CSV de la cohorte tiene filas inválidas; `errores` lista cada una."""
+
+    def __init__(self, errores):
+        super().__init__(f"{len(errores)} filas inválidas en el CSV")
+        self.errores = errores
+
+
+def ids_inscriptos(curso_id, entre=None):
+    """Devuelve el conjunto de ids de alumnos inscriptos en el curso (1 consulta).
+
+    Con `entre` solo se consideran esos ids (por ejemplo, los de una página).
+    """
+    consulta = select(curso_alumno.c.alumno_id).where(curso_alumno.c.curso_id == curso_id)
+    if entre is not None:
+        if not entre:
+            return set()
+        consulta = consulta.where(curso_alumno.c.alumno_id.in_(entre))
+    return {alumno_id for (alumno_id,) in db.session.execute(consulta)}
+
+
+def ids_cursos_del_alumno(alumno_id):
+    filas = db.session.execute(
+        select(curso_alumno.c.curso_id).where(curso_alumno.c.alumno_id == alumno_id)
+    )
+    return [curso_id for (curso_id,) in filas]
+
+
+def esta_inscripto(curso_id, alumno_id):
+    return db.session.execute(
+        select(curso_alumno.c.alumno_id).where(
+            curso_alumno.c.curso_id == curso_id,
+            curso_alumno.c.alumno_id == alumno_id,
+        )
+    ).first() is not None
+
+
+def _ids_alumnos_validos(alumno_ids):
+    # Descarta ids inexistentes o que no pertenecen a un alumno
+    if not alumno_ids:
+        return set()
+    filas = db.session.execute(
+        select(User.id).where(User.rol == "alumno", User.id.in_(alumno_ids))
+    )
+    return {alumno_id for (alumno_id,) in filas}
+
+
+def sincronizar_alumnos(curso_id, alumno_ids, quitar_ausentes=True, alcance=None):
+    """Deja inscriptos en el curso exactamente los alumnos indicados.
+
+    Calcula la diferencia contra los inscriptos actuales y la aplica con un
+    INSERT y un DELETE masivos en una sola transacción. Con
+    quitar_ausentes=False solo agrega (útil para importar cohortes). Con
+    `alcance` (ids de una página del formulario) solo se quitan alumnos de ese
+    conjunto. Devuelve (cantidad_agregados, cantidad_quitados).
+    """
+    deseados = _ids_alumnos_validos({int(a_id) for a_id in alumno_ids})
+    if alcance is not None:
+        alcance = {int(a_id) for a_id in alcance}
+        deseados &= alcance
+    actuales = ids_inscriptos(curso_id, entre=alcance)
+
+    agregar = deseados - actuales
+    quitar = actuales - deseados if quitar_ausentes else set()
+
+    try:
+        if agregar:
+            db.session.execute(
+                curso_alumno.insert(),
+                [{"curso_id": curso_id, "alumno_id": a_id} for a_id in sorted(agregar)],
+            )
+        if quitar:
+            db.session.execute(
+                curso_alumno.delete().where(
+                    curso_alumno.c.curso_id == curso_id,
+                    curso_alumno.c.alumno_id.in_(quitar),
+                )
+            )
+        sumar_alumnos(curso_id, len(agregar) - len(quitar))
+        if agregar or quitar:
+            nueva_version_curso(curso_id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return len(agregar), len(quitar)
+
+
+def importar_cohorte_csv(curso_id, archivo_csv):
+    """Inscribe en el curso a los alumnos listados en un CSV.
+
+    El CSV debe tener una columna "email" (o "id"). Los alumnos ya inscriptos
+    se mantienen. Devuelve (cantidad_agregados, emails_desconocidos). Si alguna
+    fila es inválida lanza CohorteInvalida sin inscribir a nadie.
+    """
+    lector = csv.DictReader(archivo_csv)
+    ids, emails, errores = {}, set(), []  # ids: {alumno_id: línea donde aparece}
+    for fila in lector:
+        origen = f"Línea {lector.line_num}"
+        alumno_id = (fila.get("id") or "").strip()
+        email = (fila.get("email") or "").strip()
+        if alumno_id:
+            if not alumno_id.isdigit():
+                errores.append(f"{origen}: id '{alumno_id}' no es un número")
+                continue
+            ids.setdefault(int(alumno_id), origen)
+        elif email:
+            emails.add(email.lower())
+        else:
+            errores.append(f"{origen}: falta el id o el email")
+    validos = _ids_alumnos_validos(set(ids))
+    errores.extend(
+        f"{origen}: el id {alumno_id} no es de un alumno"
+        for alumno_id, origen in ids.items() if alumno_id not in validos
+    )
+    if errores:
+        raise CohorteInvalida(errores)
+    ids = set(ids)
+
+    desconocidos = set()
+    if emails:
+        filas = db.session.execute(
+            select(User.id, User.email).where(
+                User.rol == "alumno", db.func.lower(User.email).in_(emails)
+            )
+        ).all()
+        ids.update(alumno_id for alumno_id, _ in filas)
+        desconocidos = emails - {email.lower() for _, email in filas}
+
+    agregados, _ = sincronizar_alumnos(curso_id, ids, quitar_ausentes=False)
+    return agregados, sorted(desconocidos)
@@ -0,0 +1,172 @@
+# limites.py
+# Control de admisión para los picos de login y de entregas de exámenes.
+#   - Login: token buckets por IP y por cuenta. Pasado el límite se responde
+#     429 con Retry-After en vez de seguir encolando hash de contraseñas.
+#   - Entregas: cupo de entregas simultáneas por proceso con una cola de
+#     espera corta. Si la cola está llena o la espera vence, 503 con Retry-After.
+# Los buckets se guardan con GCRA (un solo número por clave: el instante en
+# que el bucket vuelve a estar lleno), así que el backend en memoria no usa
+# locks: cada consulta es un get y un set de diccionario, atómicos en CPython.
+# Dos pedidos simultáneos de la misma clave pueden pasar los dos cuando quedaba
+# un solo token; a cambio, ningún hilo espera a otro.
+#   "memoria" -> por proceso (por defecto)
+#   "redis"   -> compartido entre procesos/servidores (script Lua atómico)
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, request
+
+
+class Rechazado(RuntimeError):
+    """El pedido no se atiende ahora: reintentar en `reintentar_en` segundos."""
+
+    codigo = 429
+
+    def __init__(self, mensaje, reintentar_en):
+        super().__init__(mensaje)
+        self.reintentar_en = reintentar_en
+
+    @property
+    def retry_after(self):
+        """Valor de la cabecera Retry-After (segundos enteros, al menos 1)."""
+        return str(max(1, math.ceil(self.reintentar_en)))
+
+
+class SinCupo(Rechazado):
+    """El servidor está al máximo de trabajo admitido."""
+
+    codigo = 503
+
+
+class LimitadorMemoria:
+    """Token buckets (GCRA) dentro del proceso, sin locks."""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._lleno_en = {}  # {clave: instante en que el bucket vuelve a estar lleno}
+
+    def consumir(self, clave, capacidad, por_segundo):
+        """Toma un token; devuelve 0 si hay, o los segundos hasta el próximo."""
+        ahora = time.monotonic()
+        intervalo = 1.0 / por_segundo
+        nuevo = max(self._lleno_en.get(clave, ahora), ahora) + intervalo
+        espera = nuevo - capacidad * intervalo - ahora
+        if espera > 0:
+            return espera
+        self._lleno_en[clave] = nuevo
+        if len(self._lleno_en) > self.maxsize:
+            self._purgar(ahora)
+        return 0.0
+
+    def _purgar(self, ahora):
+        # Los buckets ya llenos equivalen a no tener entrada
+        for clave, lleno_en in self._lleno_en.copy().items():
+            if lleno_en <= ahora:
+                self._lleno_en.pop(clave, None)
+
+
+class LimitadorRedis:
+    """Token buckets (GCRA) compartidos en Redis; cada consumo es un script atómico."""
+
+    SCRIPT = """
+    local ahora = tonumber(ARGV[1])
+    local intervalo = tonumber(ARGV[2])
+    local capacidad = tonumber(ARGV[3])
+    local lleno_en = tonumber(redis.call('GET', KEYS[1]) or ahora)
+    local nuevo = math.max(lleno_en, ahora) + intervalo
+    local espera = nuevo - capacidad * intervalo - ahora
+    if espera > 0 then
+        return tostring(espera)
+    end
+    redis.call('SET', KEYS[1], tostring(nuevo), 'PX', math.ceil((nuevo - ahora) * 1000))
+    return '0'
+    """
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as error:
+            raise RuntimeError("LIMITES_BACKEND=redis requiere instalar el paquete redis") from error
+        self._redis = redis.Redis.from_url(url)
+        self._script = self._redis.register_script(self.SCRIPT)
+
+    def consumir(self, clave, capacidad, por_segundo):
+        return float(self._script(
+            keys=[f"aula:limite:{clave}"], args=[time.time(), 1.0 / por_segundo, capacidad]
+        ))
+
+
+class Admision:
+    """Cupo de trabajos simultáneos con una cola de espera acotada."""
+
+    def __init__(self, concurrentes, en_espera, espera):
+        self.espera = espera
+        self._cupos = threading.BoundedSemaphore(concurrentes)
+        self._lugares = threading.BoundedSemaphore(concurrentes + en_espera)
+
+    @contextmanager
+    def admitir(self):
+        if not self._lugares.acquire(blocking=False):
+            raise SinCupo("Cola de espera llena", self.espera)
+        try:
+            if not self._cupos.acquire(timeout=self.espera):
+                raise SinCupo("Se agotó la espera por un cupo", self.espera)
+            try:
+                yield
+            finally:
+                self._cupos.release()
+        finally:
+            self._lugares.release()
+
+
+def _limitador():
+    app = current_app._get_current_object()
+    limitador = app.extensions.get("limitador")
+    if limitador is None:
+        if app.config["LIMITES_BACKEND"] == "redis":
+            limitador = LimitadorRedis(app.config["CACHE_REDIS_URL"])
+        else:
+            limitador = LimitadorMemoria()
+        limitador = app.extensions.setdefault("limitador", limitador)
+    return limitador
+
+
+def consumir(nombre, clave):
+    """Toma un token del bucket `nombre` (config LIMITE_<NOMBRE>) para `clave`.
+
+    Lanza Rechazado si no quedan; no hace nada con LIMITES_HABILITADOS apagado.
+    """
+    config = current_app.config
+    if not config["LIMITES_HABILITADOS"]:
+        return
+    capacidad, por_segundo = config[f"LIMITE_{nombre.upper()}"]
+    espera = _limitador().consumir(f"{nombre}:{clave}", capacidad, por_segundo)
+    if espera > 0:
+        current_app.logger.info("Límite %s excedido para %s", nombre, clave)
+        raise Rechazado(f"Límite {nombre} excedido", espera)
+
+
+def limitar_login(email):
+    """Buckets de intentos de login por IP y por cuenta."""
+    consumir("login_ip", request.remote_addr or "-")
+    consumir("login_usuario", (email or "").strip().lower())
+
+
+@contextmanager
+def admitir_entrega():
+    """Cupo de entregas de exámenes simultáneas en este proceso (SinCupo si no hay)."""
+    app = current_app._get_current_object()
+    if not app.config["LIMITES_HABILITADOS"]:
+        yield
+        return
+    admision = app.extensions.get("admision_entregas")
+    if admision is None:
+        admision = app.extensions.setdefault("admision_entregas", Admision(
+            app.config["LIMITE_ENTREGAS_CONCURRENTES"],
+            app.config["LIMITE_ENTREGAS_EN_ESPERA"],
+            app.config["LIMITE_ENTREGAS_ESPERA"],
+        ))
+    with admision.admitir():
+        yield
@@ -0,0 +1,246 @@
+# metricas.py
+# Instrumentación opcional (METRICAS_HABILITADAS) de cada request:
+# tiempo total, tiempo de render de plantillas, cantidad y tiempo de SQL
+# (eventos before/after_cursor_execute del engine) y detección de N+1
+# cuando la misma forma de sentencia se repite muchas veces en un request.
+# Todo queda en histogramas de buckets fijos por endpoint: la memoria no
+# crece con el tráfico y registrar un request es un bisect y unas sumas.
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+
+from flask import before_render_template, request, template_rendered
+from sqlalchemy import event
+
+# Límites superiores de cada bucket (el último implícito es +Inf)
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_SENTENCIAS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Formas sospechosas guardadas por endpoint (las primeras que aparecen)
+MAX_FORMAS_N_MAS_1 = 5
+
+_request_actual = ContextVar("metricas_request", default=None)
+
+
+class Histograma:
+    """Conteos acumulados por bucket, como los histogramas de Prometheus."""
+
+    __slots__ = ("limites", "conteos", "suma", "total")
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.conteos = [0] * (len(limites) + 1)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.conteos[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+    def acumulados(self):
+        acumulado = 0
+        for limite, conteo in zip(self.limites + (float("inf"),), self.conteos):
+            acumulado += conteo
+            yield limite, acumulado
+
+    def percentil(self, p):
+        """Aproximación: el límite del bucket donde cae el percentil p (0-100)."""
+        if not self.total:
+            return None
+        objetivo = self.total * p / 100
+        for limite, acumulado in self.acumulados():
+            if acumulado >= objetivo:
+                return limite
+        return float("inf")
+
+
+class MetricasEndpoint:
+    __slots__ = ("duracion", "render", "sql_tiempo", "sql_sentencias", "n_mas_1", "formas_n_mas_1")
+
+    def __init__(self):
+        self.duracion = Histograma(BUCKETS_SEGUNDOS)
+        self.render = Histograma(BUCKETS_SEGUNDOS)
+        self.sql_tiempo = Histograma(BUCKETS_SEGUNDOS)
+        self.sql_sentencias = Histograma(BUCKETS_SENTENCIAS)
+        self.n_mas_1 = 0
+        self.formas_n_mas_1 = {}  # forma -> veces que se repitió en el peor request
+
+
+class _MedicionRequest:
+    """Lo que se va juntando durante un request (solo lo toca su propio hilo)."""
+
+    __slots__ = ("inicio", "render", "inicio_render", "sql_tiempo", "sql_sentencias", "formas")
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.render = 0.0
+        self.inicio_render = None
+        self.sql_tiempo = 0.0
+        self.sql_sentencias = 0
+        self.formas = Counter()
+
+
+_LISTA_PARAMETROS = re.compile(r"\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)")
+_NUMEROS = re.compile(r"\b\d+\b")
+_ESPACIOS = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def forma_sentencia(sentencia):
+    """SQL sin valores: las listas IN (?, ?, ...) y los números literales se colapsan."""
+    forma = _LISTA_PARAMETROS.sub("(?)", sentencia)
+    forma = _NUMEROS.sub("N", forma)
+    return _ESPACIOS.sub(" ", forma).strip()
+
+
+class Metricas:
+    def __init__(self, umbral_n_mas_1):
+        self.umbral_n_mas_1 = umbral_n_mas_1
+        self.desde = time.time()
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, endpoint, medicion, duracion):
+        repetidas = [
+            (forma, veces) for forma, veces in medicion.formas.items()
+            if veces >= self.umbral_n_mas_1
+        ]
+        with self._lock:
+            metricas = self.endpoints.get(endpoint)
+            if metricas is None:
+                metricas = self.endpoints[endpoint] = MetricasEndpoint()
+            metricas.duracion.observar(duracion)
+            metricas.render.observar(medicion.render)
+            metricas.sql_tiempo.observar(medicion.sql_tiempo)
+            metricas.sql_sentencias.observar(medicion.sql_sentencias)
+            nuevas = []
+            if repetidas:
+                metricas.n_mas_1 += 1
+                for forma, veces in repetidas:
+                    anterior = metricas.formas_n_mas_1.get(forma)
+                    if anterior is None and len(metricas.formas_n_mas_1) >= MAX_FORMAS_N_MAS_1:
+                        continue
+                    if anterior is None:
+                        nuevas.append((forma, veces))
+                    metricas.formas_n_mas_1[forma] = max(veces, anterior or 0)
+        return nuevas
+
+    def resumen(self):
+        """Filas para la página de métricas, los endpoints más lentos primero."""
+        with self._lock:
+            filas = [
+                {
+                    "endpoint": endpoint,
+                    "requests": m.duracion.total,
+                    "promedio_ms": 1000 * m.duracion.suma / m.duracion.total,
+                    "p50_ms": 1000 * m.duracion.percentil(50),
+                    "p95_ms": 1000 * m.duracion.percentil(95),
+                    "p99_ms": 1000 * m.duracion.percentil(99),
+                    "render_ms": 1000 * m.render.suma / m.duracion.total,
+                    "sql_ms": 1000 * m.sql_tiempo.suma / m.duracion.total,
+                    "sentencias": m.sql_sentencias.suma / m.duracion.total,
+                    "n_mas_1": m.n_mas_1,
+                    "formas_n_mas_1": sorted(m.formas_n_mas_1.items(), key=lambda item: -item[1]),
+                }
+                for endpoint, m in self.endpoints.items()
+                if m.duracion.total
+            ]
+        filas.sort(key=lambda fila: -fila["promedio_ms"] * fila["requests"])
+        return filas
+
+    def prometheus(self):
+        """Formato de texto de Prometheus (text/plain; version=0.0.4)."""
+        series = (
+            ("aula_request_duracion_segundos", "Tiempo total del request", "duracion"),
+            ("aula_render_segundos", "Tiempo de render de plantillas por request", "render"),
+            ("aula_sql_segundos", "Tiempo en SQL por request", "sql_tiempo"),
+            ("aula_sql_sentencias", "Sentencias SQL por request", "sql_sentencias"),
+        )
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+            lineas = []
+            for nombre, ayuda, atributo in series:
+                lineas.append(f"# HELP {nombre} {ayuda}")
+                lineas.append(f"# TYPE {nombre} histogram")
+                for endpoint, metricas in endpoints:
+                    histograma = getattr(metricas, atributo)
+                    for limite, acumulado in histograma.acumulados():
+                        le = "+Inf" if limite == float("inf") else repr(float(limite))
+                        lineas.append(f'{nombre}_bucket{{endpoint="{endpoint}",le="{le}"}} {acumulado}')
+                    lineas.append(f'{nombre}_sum{{endpoint="{endpoint}"}} {histograma.suma!r}')
+                    lineas.append(f'{nombre}_count{{endpoint="{endpoint}"}} {histograma.total}')
+            lineas.append("# HELP aula_n_mas_1_total Requests con una sentencia repetida sobre el umbral")
+            lineas.append("# TYPE aula_n_mas_1_total counter")
+            for endpoint, metricas in endpoints:
+                lineas.append(f'aula_n_mas_1_total{{endpoint="{endpoint}"}} {metricas.n_mas_1}')
+        return "\n".join(lineas) + "\n"
+
+
+# ------------------- Enganche con Flask y SQLAlchemy -------------------
+def _antes_de_sentencia(conexion, cursor, sentencia, parametros, contexto, executemany):
+    medicion = _request_actual.get()
+    if medicion is not None:
+        conexion.info.setdefault("metricas_inicio", []).append(time.perf_counter())
+
+
+def _despues_de_sentencia(conexion, cursor, sentencia, parametros, contexto, executemany):
+    medicion = _request_actual.get()
+    if medicion is None:
+        return
+    inicios = conexion.info.get("metricas_inicio")
+    if not inicios:
+        return
+    medicion.sql_tiempo += time.perf_counter() - inicios.pop()
+    medicion.sql_sentencias += 1
+    medicion.formas[forma_sentencia(sentencia)] += 1
+
+
+def _antes_de_render(app, template, context, **extra):
+    medicion = _request_actual.get()
+    if medicion is not None:
+        medicion.inicio_render = time.perf_counter()
+
+
+def _despues_de_render(app, template, context, **extra):
+    medicion = _request_actual.get()
+    if medicion is not None and medicion.inicio_render is not None:
+        medicion.render += time.perf_counter() - medicion.inicio_render
+        medicion.inicio_render = None
+
+
+def obtener_metricas(app):
+    """Las métricas de la app, o None si la instrumentación está apagada."""
+    return app.extensions.get("metricas")
+
+
+def registrar_metricas(app, engine):
+    if not app.config["METRICAS_HABILITADAS"]:
+        return
+    metricas = app.extensions["metricas"] = Metricas(app.config["METRICAS_UMBRAL_N_MAS_1"])
+
+    event.listen(engine, "before_cursor_execute", _antes_de_sentencia)
+    event.listen(engine, "after_cursor_execute", _despues_de_sentencia)
+    before_render_template.connect(_antes_de_render, app, weak=False)
+    template_rendered.connect(_despues_de_render, app, weak=False)
+
+    @app.before_request
+    def _iniciar_medicion():
+        if request.endpoint != "static":
+            request.environ["metricas.token"] = _request_actual.set(_MedicionRequest())
+
+    @app.teardown_request
+    def _cerrar_medicion(error=None):
+        token = request.environ.pop("metricas.token", None)
+        if token is None:
+            return
+        medicion = _request_actual.get()
+        _request_actual.reset(token)
+        duracion = time.perf_counter() - medicion.inicio
+        endpoint = request.endpoint or "sin_ruta"
+        for forma, veces in metricas.registrar(endpoint, medicion, duracion):
+            app.logger.warning("Posible N+1 en %s: %d veces %s", endpoint, veces, forma)
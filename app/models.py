@@ -1,4 +1,8 @@
 # models.py
+from datetime import datetime, timezone
+
+from sqlalchemy.types import BigInteger, TypeDecorator
+
 from . import db
 from flask_login import UserMixin
 
@@ -6,8 +10,8 @@ class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(150))
     email = db.Column(db.String(150), unique=True)
-    password = db.Column(db.String(150))
-    rol = db.Column(db.String(50))  # admin, profesor, alumno
+    password = db.Column(db.String(255))  # hash (ver seguridad.py)
+    rol = db.Column(db.String(50), index=True)  # admin, profesor, alumno
     cursos = db.relationship("Curso", backref="profesor", lazy=True)
 
 
@@ -15,19 +19,32 @@ class Archivo(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(255), nullable=False)
     ruta = db.Column(db.String(255), nullable=False)
-    curso_id = db.Column(db.Integer, db.ForeignKey("curso.id"), nullable=False)
+    curso_id = db.Column(db.Integer, db.ForeignKey("curso.id"), nullable=False, index=True)
+    # Contenido en BlobArchivo (None en archivos subidos antes de guardarlos por hash)
+    sha256 = db.Column(db.String(64), db.ForeignKey("blob_archivo.sha256"), nullable=True)
+    tamano = db.Column(db.Integer, nullable=True)  # bytes
+
+
+# Contenido físico de los archivos, guardado una sola vez aunque se suba varias veces
+class BlobArchivo(db.Model):
+    sha256 = db.Column(db.String(64), primary_key=True)
+    ruta = db.Column(db.String(255), nullable=False)
+    tamano = db.Column(db.Integer, nullable=False)
+    referencias = db.Column(db.Integer, nullable=False, default=0)
 
 
 class Examen(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    curso_id = db.Column(db.Integer, db.ForeignKey("curso.id"), nullable=False)
+    curso_id = db.Column(db.Integer, db.ForeignKey("curso.id"), nullable=False, index=True)
     titulo = db.Column(db.String(255), nullable=False)
+    # Se incrementa con cada cambio en preguntas/opciones (invalida la caché del examen)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
     preguntas = db.relationship("Pregunta", backref="examen", lazy=True)
 
 class Pregunta(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    examen_id = db.Column(db.Integer, db.ForeignKey("examen.id"), nullable=False)
+    examen_id = db.Column(db.Integer, db.ForeignKey("examen.id"), nullable=False, index=True)
     texto = db.Column(db.Text, nullable=False)
     tipo = db.Column(db.String(50), nullable=False)  # 'abierta' o 'multiple'
 
@@ -35,27 +52,66 @@ class Pregunta(db.Model):
 
 class Opcion(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    pregunta_id = db.Column(db.Integer, db.ForeignKey("pregunta.id"), nullable=False)
+    pregunta_id = db.Column(db.Integer, db.ForeignKey("pregunta.id"), nullable=False, index=True)
     texto = db.Column(db.String(255), nullable=False)
     es_correcta = db.Column(db.Boolean, default=False)
 
+class MascaraOpciones(TypeDecorator):
+    """Opciones elegidas en una pregunta como máscara de bits (entero de 64 bits).
+
+    El bit i corresponde a la i-ésima opción de la pregunta en orden de id
+    (ver selecciones.py); 0 = ninguna elegida. Sobre la columna,
+    `incluye(ordinal)` arma la condición en SQL.
+    """
+
+    impl = BigInteger
+    cache_ok = True
+    MAX_OPCIONES = 63  # bits disponibles sin usar el de signo
+
+    class comparator_factory(BigInteger.Comparator):
+        def incluye(self, ordinal):
+            return self.expr.bitwise_rshift(ordinal).bitwise_and(1) == 1
+
+
 class RespuestaAlumno(db.Model):
+    # Una respuesta por alumno y pregunta; también sirve para buscar por alumno
+    __table_args__ = (
+        db.Index("ix_respuesta_alumno_alumno_pregunta", "alumno_id", "pregunta_id", unique=True),
+        db.Index("ix_respuesta_alumno_pregunta_id", "pregunta_id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     alumno_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     pregunta_id = db.Column(db.Integer, db.ForeignKey("pregunta.id"), nullable=False)
     respuesta_texto = db.Column(db.String, nullable=True)
-    respuesta_opciones = db.Column(db.String, nullable=True)
+    respuesta_opciones = db.Column(MascaraOpciones, nullable=True)  # None en preguntas abiertas
+
+
+# Una entrega por alumno y examen: un segundo envío no vuelve a escribir respuestas
+class EntregaExamen(db.Model):
+    __table_args__ = (db.UniqueConstraint("examen_id", "alumno_id"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    examen_id = db.Column(db.Integer, db.ForeignKey("examen.id"), nullable=False)
+    alumno_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    entregado_en = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    puntaje = db.Column(db.Float, nullable=True)  # lo completa calificacion.corregir_examen
 
 curso_alumno = db.Table(
     "curso_alumno",
     db.Column("curso_id", db.Integer, db.ForeignKey("curso.id"), primary_key=True),
-    db.Column("alumno_id", db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    db.Column("alumno_id", db.Integer, db.ForeignKey("user.id"), primary_key=True),
+    # La PK (curso_id, alumno_id) no sirve para "cursos de un alumno"
+    db.Index("ix_curso_alumno_alumno_id", "alumno_id"),
 )
 class Curso(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(255), nullable=False)
     descripcion = db.Column(db.Text, nullable=True)
-    profesor_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    profesor_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+    # Se incrementa con cada cambio visible del curso (archivos, exámenes, datos,
+    # inscripciones): es la base del ETag de sus páginas (ver condicional.py)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
     archivos = db.relationship("Archivo", backref="curso", lazy=True)
     examenes = db.relationship("Examen", backref="curso", lazy=True)
@@ -69,4 +125,44 @@ class Curso(db.Model):
     )
 
     def __repr__(self):
-        return f"<Curso {self.nombre}>"
\ No newline at end of file
+        return f"<Curso {self.nombre}>"
+
+
+# Cola de salida de correos (ver correo.py)
+class CorreoPendiente(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    destinatario = db.Column(db.String(150), nullable=False)
+    asunto = db.Column(db.String(255), nullable=False)
+    cuerpo = db.Column(db.Text, nullable=False)
+    creado_en = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    proximo_intento = db.Column(db.DateTime, nullable=False, index=True)
+    enviado_en = db.Column(db.DateTime, nullable=True)
+    ultimo_error = db.Column(db.String(500), nullable=True)
+    # Worker que tomó el correo y hasta cuándo (si se cae, otro lo retoma al vencer)
+    reservado_por = db.Column(db.String(64), nullable=True)
+    reservado_hasta = db.Column(db.DateTime, nullable=True)
+
+
+# Contadores precalculados para los paneles (ver estadisticas.py). Se mantienen
+# en la misma transacción que los cambios y se pueden reconstruir con
+# `flask reconstruir-estadisticas`. Un curso o examen sin fila tiene todo en 0.
+class EstadisticaCurso(db.Model):
+    curso_id = db.Column(db.Integer, db.ForeignKey("curso.id", ondelete="CASCADE"), primary_key=True)
+    alumnos = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    archivos = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    examenes = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+
+class EstadisticaExamen(db.Model):
+    examen_id = db.Column(db.Integer, db.ForeignKey("examen.id", ondelete="CASCADE"), primary_key=True)
+    entregas = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Promedio = puntaje_suma / corregidas (entregas con puntaje)
+    corregidas = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    puntaje_suma = db.Column(db.Float, nullable=False, default=0, server_default="0")
+
+
+class EstadisticaOpcion(db.Model):
+    opcion_id = db.Column(db.Integer, db.ForeignKey("opcion.id", ondelete="CASCADE"), primary_key=True)
+    examen_id = db.Column(db.Integer, db.ForeignKey("examen.id", ondelete="CASCADE"), nullable=False, index=True)
+    elecciones = db.Column(db.Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,64 @@
+# motor.py
+# Perfil del motor de base de datos según la URL configurada.
+# SQLite: WAL + pragmas en cada conexión nueva y espera ante bloqueos.
+# PostgreSQL (u otro servidor): pool con pre_ping y reciclado de conexiones.
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def normalizar_url(url):
+    # Heroku y otros servicios todavía entregan "postgres://"
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def _es_sqlite_en_memoria(url):
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def opciones_motor(config):
+    """Arma SQLALCHEMY_ENGINE_OPTIONS sin pisar lo que ya venga configurado."""
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    opciones = dict(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    if _es_sqlite_en_memoria(url):
+        return opciones
+
+    opciones.setdefault("pool_size", config["DB_POOL_SIZE"])
+    opciones.setdefault("max_overflow", config["DB_MAX_OVERFLOW"])
+    opciones.setdefault("pool_timeout", config["DB_POOL_TIMEOUT"])
+
+    if url.get_backend_name() == "sqlite":
+        connect_args = dict(opciones.get("connect_args") or {})
+        # Espera del driver ante "database is locked" (además del busy_timeout)
+        connect_args.setdefault("timeout", config["SQLITE_BUSY_TIMEOUT_MS"] / 1000)
+        opciones["connect_args"] = connect_args
+    else:
+        opciones.setdefault("pool_pre_ping", True)
+        opciones.setdefault("pool_recycle", config["DB_POOL_RECYCLE"])
+    return opciones
+
+
+def registrar_pragmas(engine, config):
+    """Aplica los PRAGMA de SQLite a cada conexión que abra el pool."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA cache_size = {int(config['SQLITE_CACHE_SIZE'])}",
+        f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_SIZE'])}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if not _es_sqlite_en_memoria(engine.url):
+        pragmas.insert(0, f"PRAGMA journal_mode = {config['SQLITE_JOURNAL_MODE']}")
+
+    @event.listens_for(engine, "connect")
+    def _aplicar_pragmas(conexion_dbapi, registro):
+        cursor = conexion_dbapi.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
@@ -0,0 +1,46 @@
+# paginacion.py
+# Paginación por clave (keyset): en vez de OFFSET se pide "los siguientes N con
+# id mayor al último visto", así cada página cuesta lo mismo sin importar cuántas
+# filas haya antes y nunca se materializa la tabla completa.
+from collections import namedtuple
+
+from flask import current_app, has_request_context, request
+
+Pagina = namedtuple("Pagina", "items siguiente limite")
+
+
+def parametros_pagina():
+    """Lee ?despues=<id>&limite=<n> del request, acotando el tamaño de página."""
+    config = current_app.config
+    despues = request.args.get("despues", type=int)
+    limite = request.args.get("limite", default=config["PAGINA_TAMANO"], type=int)
+    return despues, max(1, min(limite, config["PAGINA_MAX"]))
+
+
+def paginar(consulta, columna_id, despues=None, limite=None):
+    """Devuelve una Pagina con hasta `limite` filas ordenadas por columna_id.
+
+    `siguiente` es el valor de `despues` para pedir la página siguiente,
+    o None si esta es la última. Cada parámetro que no se pasa sale del request.
+    """
+    if limite is None:
+        limite = parametros_pagina()[1]
+    if despues is None and has_request_context():
+        despues = parametros_pagina()[0]
+    if despues is not None:
+        consulta = consulta.filter(columna_id > despues)
+    # Se pide una fila de más solo para saber si hay otra página
+    filas = consulta.order_by(columna_id).limit(limite + 1).all()
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = filas[-1].id
+    return Pagina(filas, siguiente, limite)
+
+
+def pagina_json(pagina, serializar):
+    return {
+        "items": [serializar(item) for item in pagina.items],
+        "siguiente": pagina.siguiente,
+        "limite": pagina.limite,
+    }
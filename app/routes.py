@@ -1,14 +1,41 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash
+from flask import (
+    Blueprint, render_template, redirect, url_for, request, flash, abort, current_app, send_file, jsonify,
+    stream_with_context,
+)
 from flask_login import login_user, logout_user, login_required, current_user
-from .models import User, Curso, Archivo, Examen, Pregunta, Opcion
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, selectinload
+from .models import User, Curso, Archivo, Examen, Pregunta, Opcion, MascaraOpciones, curso_alumno
 from . import db, login_manager
-import os
+from .almacenamiento import borrar_fisico, guardar_subida, liberar_blob, ruta_archivo
+from .correo import encolar_correo, notificar_worker
+from .examenes import (
+    nueva_version_examen, obtener_vista_examen, registrar_entrega,
+    respuestas_desde_formulario, ya_entregado,
+)
+from .borradores import descartar_borrador, entregar_borrador, guardar_borrador, respuestas_borrador
+from .estadisticas import estadisticas_cursos, estadisticas_examen
+from .exportacion import ENCABEZADOS, FILAS, escribir_xlsx, generar_csv
+from .banco_preguntas import BancoInvalido, formato_por_nombre, importar_banco, leer_banco
+from .busqueda import buscar as buscar_documentos
+from .condicional import con_etag, etag_vista, no_modificado, nueva_version_curso
+from .limites import Rechazado, SinCupo, admitir_entrega, limitar_login
+from .metricas import obtener_metricas
+from .inscripciones import esta_inscripto, ids_cursos_del_alumno, ids_inscriptos, sincronizar_alumnos
+from .paginacion import pagina_json, paginar
+from .seguridad import HashingSaturado, hashear_password, verificar_password
+from .usuarios import cargar_usuario_sesion
+from urllib.parse import quote
+import hmac
+import mimetypes
+import tempfile
 
 main = Blueprint("main", __name__)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Sale de la caché de sesiones; el User completo se carga solo si hace falta
+    return cargar_usuario_sesion(int(user_id))
 
 #  ------------------------DASHBOARD ADMIN ------------------------
 @main.route("/admin/crear_usuario", methods=["GET", "POST"])
@@ -24,23 +51,28 @@ def crear_usuario():
         password = request.form.get("password")
         rol = request.form.get("rol")  # "profesor" o "alumno"
 
+        if not (nombre and email and password and rol):
+            flash("Completa todos los campos.", "warning")
+            return render_template("crear_usuario.html"), 400
+
         # Validar que no exista ya ese correo
         if User.query.filter_by(email=email).first():
             flash("El email ya está registrado.", "warning")
         else:
-            nuevo_usuario = User(nombre=nombre, email=email, password=password, rol=rol)
+            try:
+                password_hash = hashear_password(password)
+            except HashingSaturado:
+                flash("El servidor está ocupado, intenta de nuevo en unos segundos.", "warning")
+                return render_template("crear_usuario.html"), 503, {"Retry-After": "5"}
+            nuevo_usuario = User(nombre=nombre, email=email, password=password_hash, rol=rol)
             db.session.add(nuevo_usuario)
-            db.session.commit()
 
-            # 🚀 Enviar email con credenciales
-            from flask_mail import Message
-            from . import mail
-
-            msg = Message(
+            # 🚀 Encolar email con credenciales (se guarda en el mismo commit
+            # que el usuario y lo envía el worker de correos)
+            encolar_correo(
+                email,
                 "Tus credenciales de Aula Virtual",
-                recipients=[email]
-            )
-            msg.body = f"""
+                f"""
             Hola {nombre},
 
             Tu cuenta en el Aula Virtual ha sido creada.
@@ -50,15 +82,43 @@ def crear_usuario():
             Rol: {rol}
 
             Inicia sesión en: http://127.0.0.1:5000/login
-            """
-            mail.send(msg)
+            """,
+            )
+            db.session.commit()
+            notificar_worker()
 
-            flash(f"Usuario {rol} creado y correo enviado a {email}.", "success")
+            flash(f"Usuario {rol} creado y correo encolado para {email}.", "success")
             return redirect(url_for("main.dashboard"))
 
     return render_template("crear_usuario.html")
 
 
+@main.route("/admin/metrics")
+@login_required
+def metricas():
+    if current_user.rol != "admin":
+        abort(403)
+    registro = obtener_metricas(current_app)
+    if registro is None:
+        abort(404)
+    return render_template("metricas.html", filas=registro.resumen(),
+                           desde=registro.desde, umbral=registro.umbral_n_mas_1)
+
+
+@main.route("/admin/metrics/prometheus")
+def metricas_prometheus():
+    registro = obtener_metricas(current_app)
+    if registro is None:
+        abort(404)
+    # Prometheus no tiene sesión: se acepta un admin logueado o el token configurado
+    token = current_app.config["METRICAS_TOKEN"]
+    autorizacion = request.headers.get("Authorization", "")
+    con_token = bool(token) and hmac.compare_digest(autorizacion, f"Bearer {token}")
+    if not con_token and not (current_user.is_authenticated and current_user.rol == "admin"):
+        abort(403)
+    return registro.prometheus(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+
 # ------------------- LOGIN -------------------
 
 # Ahora "/" redirige directo a /login
@@ -71,8 +131,18 @@ def login():
     if request.method == "POST":
         email = request.form.get("email")
         password = request.form.get("password")
+        try:
+            limitar_login(email)
+        except Rechazado as error:
+            flash("Demasiados intentos de ingreso, espera unos segundos y vuelve a intentar.", "warning")
+            return render_template("login.html"), error.codigo, {"Retry-After": error.retry_after}
         user = User.query.filter_by(email=email).first()
-        if user and user.password == password:  
+        try:
+            valido = user is not None and verificar_password(user, password)
+        except HashingSaturado:
+            flash("Hay muchos ingresos en este momento, intenta de nuevo en unos segundos.", "warning")
+            return render_template("login.html"), 503, {"Retry-After": "5"}
+        if valido:
             login_user(user)
             return redirect(url_for("main.dashboard"))
         else:
@@ -85,15 +155,47 @@ def login():
 @main.route("/dashboard")
 @login_required
 def dashboard():
+    # Cada rol carga sus cursos en un número fijo de consultas,
+    # sin importar cuántos cursos haya (nada de consultas perezosas por curso)
     if current_user.rol == "admin":
-        cursos = Curso.query.all()
-        return render_template("dashboard_admin.html", cursos=cursos)
+        pagina = paginar(Curso.query, Curso.id)
+        # Contadores precalculados (estadisticas.py): una consulta para toda la página
+        estadisticas = estadisticas_cursos([curso.id for curso in pagina.items])
+        return render_template(
+            "dashboard_admin.html", cursos=pagina.items, pagina=pagina, estadisticas=estadisticas
+        )
     elif current_user.rol == "profesor":
-        cursos = Curso.query.filter_by(profesor_id=current_user.id).all()
-        return render_template("dashboard_profesor.html", cursos=cursos)
+        cursos = Curso.query.filter_by(profesor_id=current_user.id).order_by(Curso.id).all()
+        estadisticas = estadisticas_cursos([curso.id for curso in cursos])
+        return render_template("dashboard_profesor.html", cursos=cursos, estadisticas=estadisticas)
     elif current_user.rol == "alumno":
-        cursos = Curso.query.all()  # ⚠️ luego filtrar solo cursos asignados
-        return render_template("dashboard_alumno.html", cursos=cursos)
+        # Versiones de sus cursos: si nada cambió, 304 sin cargar ni renderizar
+        versiones = db.session.execute(
+            select(Curso.id, Curso.version)
+            .join(curso_alumno, curso_alumno.c.curso_id == Curso.id)
+            .where(curso_alumno.c.alumno_id == current_user.id)
+            .order_by(Curso.id)
+        ).all()
+        etag = etag_vista(current_user, [tuple(fila) for fila in versiones])
+        respuesta = no_modificado(etag)
+        if respuesta is not None:
+            return respuesta
+
+        # Solo los cursos asignados al alumno; profesor, archivos y exámenes
+        # se traen de una vez (1 consulta de cursos + 2 selectin)
+        cursos = (
+            Curso.query
+            .join(curso_alumno, curso_alumno.c.curso_id == Curso.id)
+            .filter(curso_alumno.c.alumno_id == current_user.id)
+            .options(
+                joinedload(Curso.profesor),
+                selectinload(Curso.archivos),
+                selectinload(Curso.examenes),
+            )
+            .order_by(Curso.id)
+            .all()
+        )
+        return con_etag(render_template("dashboard_alumno.html", cursos=cursos), etag)
 
     # fallback
     return redirect(url_for("main.login"))
@@ -144,6 +246,7 @@ def editar_curso(curso_id):
     if request.method == "POST":
         curso.nombre = request.form.get("nombre")
         curso.descripcion = request.form.get("descripcion")
+        nueva_version_curso(curso.id)
         db.session.commit()
 
         flash("Curso actualizado correctamente", "success")
@@ -173,35 +276,62 @@ def eliminar_curso(curso_id):
 @login_required
 def asignar_alumnos(curso_id):
     curso = Curso.query.get_or_404(curso_id)
-    alumnos = User.query.filter_by(rol="alumno").all()
 
     if request.method == "POST":
-        seleccionados = request.form.getlist("alumnos_seleccionados")
-        curso.alumnos = [User.query.get(int(a_id)) for a_id in seleccionados]
-        db.session.commit()
+        seleccionados = request.form.getlist("alumnos_seleccionados", type=int)
+        # Solo se tocan los alumnos de la página que se estaba viendo
+        en_pagina = request.form.getlist("alumnos_en_pagina", type=int)
+        sincronizar_alumnos(curso.id, seleccionados, alcance=en_pagina)
         flash("Alumnos asignados correctamente.")
         return redirect(url_for("main.dashboard"))
 
-    return render_template("asignar_alumnos.html", curso=curso, alumnos=alumnos)
+    pagina = paginar(User.query.filter_by(rol="alumno"), User.id)
+    # Conjunto de ids para marcar los checkboxes sin una consulta por alumno
+    inscriptos = ids_inscriptos(curso.id, entre=[alumno.id for alumno in pagina.items])
+    return render_template(
+        "asignar_alumnos.html", curso=curso, alumnos=pagina.items, inscriptos=inscriptos, pagina=pagina
+    )
 
 # ------------------- CONTENIDOS -------------------
 @main.route("/curso/<int:curso_id>/contenido", methods=["GET", "POST"])
 @login_required
 def contenido(curso_id):
+    etag = None
+    if request.method in ("GET", "HEAD"):
+        version = db.session.execute(select(Curso.version).where(Curso.id == curso_id)).scalar()
+        if version is None:
+            abort(404)
+        etag = etag_vista(current_user, curso_id, version)
+        respuesta = no_modificado(etag)
+        if respuesta is not None:
+            return respuesta
+
     curso = Curso.query.get_or_404(curso_id)
 
     if request.method == "POST" and current_user.rol == "profesor":
         archivo = request.files["archivo"]
-        ruta_guardado = f"uploads/{archivo.filename}"
-        archivo.save(os.path.join("app", "static", ruta_guardado))
-
-        nuevo_archivo = Archivo(nombre=archivo.filename, ruta=ruta_guardado, curso_id=curso.id)
+        # Se guarda por contenido (SHA-256): si ya estaba subido no se duplica
+        blob = guardar_subida(archivo)
+
+        nuevo_archivo = Archivo(
+            nombre=archivo.filename,
+            ruta=blob.ruta,
+            sha256=blob.sha256,
+            tamano=blob.tamano,
+            curso_id=curso.id,
+        )
         db.session.add(nuevo_archivo)
+        nueva_version_curso(curso.id)
         db.session.commit()
         flash("Archivo subido con éxito", "success")
         return redirect(url_for("main.contenido", curso_id=curso.id))
 
-    return render_template("contenido.html", curso=curso, archivos=curso.archivos, examenes=curso.examenes)
+    pagina = paginar(Archivo.query.filter_by(curso_id=curso.id), Archivo.id)
+    html = render_template(
+        "contenido.html", curso=curso, archivos=pagina.items, examenes=curso.examenes, pagina=pagina
+    )
+    # Un POST que no sube nada (alumno) muestra la página sin ETag
+    return con_etag(html, etag) if etag else html
 
 
 @main.route("/archivo/<int:archivo_id>/eliminar", methods=["POST"])
@@ -213,16 +343,109 @@ def eliminar_archivo(archivo_id):
         flash("No tienes permisos para eliminar este archivo", "danger")
         return redirect(url_for("main.dashboard"))
 
-    ruta_completa = os.path.join("app", "static", archivo.ruta)
-    if os.path.exists(ruta_completa):
-        os.remove(ruta_completa)
+    if archivo.sha256:
+        # El contenido solo se borra cuando ningún otro archivo lo usa
+        ruta_a_borrar = liberar_blob(archivo.sha256)
+    else:
+        ruta_a_borrar = archivo.ruta
 
     db.session.delete(archivo)
+    nueva_version_curso(archivo.curso_id)
     db.session.commit()
+    if ruta_a_borrar:
+        borrar_fisico(ruta_a_borrar)
     flash("Archivo eliminado con éxito", "success")
     return redirect(url_for("main.contenido", curso_id=archivo.curso_id))
 
 
+def _puede_ver_archivos(curso):
+    # Solo el profesor del curso, sus alumnos inscriptos y el admin
+    if current_user.rol == "alumno":
+        return esta_inscripto(curso.id, current_user.id)
+    if current_user.rol == "profesor":
+        return curso.profesor_id == current_user.id
+    return current_user.rol == "admin"
+
+
+@main.route("/archivo/<int:archivo_id>/descargar")
+@login_required
+def descargar_archivo(archivo_id):
+    archivo = Archivo.query.get_or_404(archivo_id)
+    if not _puede_ver_archivos(archivo.curso):
+        abort(403)
+
+    # Mismo hash = mismo contenido: se responde 304 sin abrir el archivo
+    if archivo.sha256 and archivo.sha256 in request.if_none_match:
+        respuesta = current_app.response_class(status=304)
+        respuesta.set_etag(archivo.sha256)
+        return _cache_privada(respuesta)
+
+    prefijo_accel = current_app.config.get("ARCHIVOS_X_ACCEL_PREFIX")
+    if prefijo_accel:
+        # nginx sirve el archivo (incluye Range) desde una location internal
+        respuesta = current_app.response_class()
+        respuesta.headers["X-Accel-Redirect"] = f"{prefijo_accel.rstrip('/')}/{archivo.ruta}"
+        respuesta.headers["Content-Disposition"] = f"inline; filename*=UTF-8''{quote(archivo.nombre)}"
+        respuesta.content_type = mimetypes.guess_type(archivo.nombre)[0] or "application/octet-stream"
+        if archivo.sha256:
+            respuesta.set_etag(archivo.sha256)
+        return _cache_privada(respuesta)
+
+    # send_file resuelve Range/If-Range y If-None-Match; con USE_X_SENDFILE
+    # delega el envío al servidor web
+    return _cache_privada(send_file(
+        ruta_archivo(archivo.ruta),
+        download_name=archivo.nombre,
+        etag=archivo.sha256 or True,
+        conditional=True,
+    ))
+
+
+def _cache_privada(respuesta):
+    # Descarga con control de acceso: solo la caché del navegador, nunca un proxy compartido
+    respuesta.cache_control.public = False
+    respuesta.cache_control.no_cache = None
+    respuesta.cache_control.private = True
+    respuesta.cache_control.max_age = current_app.config["ARCHIVOS_MAX_AGE"]
+    return respuesta
+
+
+# ------------------- EXPORTACIÓN -------------------
+@main.route("/curso/<int:curso_id>/exportar/<any(respuestas, notas):datos>.<any(csv, xlsx):formato>")
+@login_required
+def exportar_curso(curso_id, datos, formato):
+    curso = Curso.query.get_or_404(curso_id)
+    if not (current_user.rol == "admin" or (current_user.rol == "profesor" and curso.profesor_id == current_user.id)):
+        abort(403)
+
+    nombre = f"{curso.nombre}-{datos}.{formato}"
+    filas = FILAS[datos](curso.id)
+    if formato == "csv":
+        # Las filas se consultan y envían mientras se genera la respuesta
+        respuesta = current_app.response_class(
+            stream_with_context(generar_csv(ENCABEZADOS[datos], filas)), mimetype="text/csv"
+        )
+        respuesta.headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{quote(nombre)}"
+        respuesta.headers["X-Accel-Buffering"] = "no"  # que nginx no acumule el stream
+        return respuesta
+
+    # XLSX: el zip recién se puede cerrar al final, así que se arma en un
+    # temporal anónimo (constant_memory) y se envía desde disco en bloques
+    temporal = tempfile.TemporaryFile()
+    try:
+        escribir_xlsx(ENCABEZADOS[datos], filas, temporal)
+    except RuntimeError as error:
+        temporal.close()
+        abort(501, str(error))
+    temporal.seek(0)
+    return send_file(
+        temporal,
+        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        as_attachment=True,
+        download_name=nombre,
+    )
+
+
 # ------------------- EXÁMENES -------------------
 @main.route("/curso/<int:curso_id>/crear_examen", methods=["GET", "POST"])
 @login_required
@@ -237,6 +460,7 @@ def crear_examen(curso_id):
         titulo = request.form.get("titulo")
         examen = Examen(titulo=titulo, curso_id=curso.id)
         db.session.add(examen)
+        nueva_version_curso(curso.id)
         db.session.commit()
 
         flash("Examen creado. Ahora añade preguntas.")
@@ -256,10 +480,13 @@ def editar_examen(examen_id):
     if request.method == "POST":
         texto_pregunta = request.form.get("pregunta")
         tipo = request.form.get("tipo")
+        if tipo == "multiple" and len(request.form.getlist("opciones[]")) > MascaraOpciones.MAX_OPCIONES:
+            flash(f"Una pregunta puede tener como máximo {MascaraOpciones.MAX_OPCIONES} opciones.")
+            return redirect(url_for("main.editar_examen", examen_id=examen.id))
 
         nueva_pregunta = Pregunta(texto=texto_pregunta, tipo=tipo, examen_id=examen.id)
         db.session.add(nueva_pregunta)
-        db.session.commit()
+        db.session.flush()
 
         if tipo == "multiple":
             opciones = request.form.getlist("opciones[]")
@@ -271,13 +498,60 @@ def editar_examen(examen_id):
                     pregunta_id=nueva_pregunta.id
                 )
                 db.session.add(opcion)
-            db.session.commit()
+
+        # Pregunta, opciones y nueva versión (invalida la caché) en un solo commit
+        nueva_version_examen(examen.id)
+        db.session.commit()
 
         flash("Pregunta añadida correctamente.")
         return redirect(url_for("main.editar_examen", examen_id=examen.id))
 
     return render_template("editar_examen.html", examen=examen)
 
+# Profesor: importar un banco de preguntas completo (JSON, CSV o GIFT)
+@main.route("/examen/<int:examen_id>/importar", methods=["GET", "POST"])
+@login_required
+def importar_preguntas(examen_id):
+    examen = Examen.query.options(joinedload(Examen.curso)).get_or_404(examen_id)
+    if current_user.rol != "profesor" or examen.curso.profesor_id != current_user.id:
+        flash("No tienes permisos para editar exámenes.")
+        return redirect(url_for("main.dashboard"))
+
+    errores = []
+    if request.method == "POST":
+        archivo = request.files.get("banco")
+        formato = request.form.get("formato") or formato_por_nombre(archivo.filename if archivo else None)
+        try:
+            if not archivo or not archivo.filename:
+                raise BancoInvalido(["Selecciona un archivo con las preguntas"])
+            try:
+                texto = archivo.read().decode("utf-8")
+            except UnicodeDecodeError:
+                raise BancoInvalido(["El archivo debe estar en UTF-8"])
+            preguntas = leer_banco(texto, formato)
+        except BancoInvalido as error:
+            errores = error.errores
+        else:
+            cantidad = importar_banco(examen.id, preguntas)
+            flash(f"{cantidad} preguntas importadas.")
+            return redirect(url_for("main.editar_examen", examen_id=examen.id))
+
+    return render_template("importar_preguntas.html", examen=examen, errores=errores), 400 if errores else 200
+
+
+@main.route("/examen/<int:examen_id>/estadisticas")
+@login_required
+def estadisticas_de_examen(examen_id):
+    vista = obtener_vista_examen(examen_id)
+    if vista is None:
+        abort(404)
+    profesor_id = db.session.execute(
+        db.select(Curso.profesor_id).where(Curso.id == vista.curso_id)
+    ).scalar()
+    if not (current_user.rol == "admin" or (current_user.rol == "profesor" and profesor_id == current_user.id)):
+        abort(403)
+    return render_template("estadisticas_examen.html", examen=vista, resumen=estadisticas_examen(examen_id))
+
 # Alumno: resolver examen
 @main.route("/curso/<int:curso_id>/examen/<int:examen_id>/resolver", methods=["GET", "POST"])
 @login_required
@@ -286,19 +560,172 @@ def resolver_examen(curso_id, examen_id):
         flash("No tienes permisos para acceder a este examen.", "danger")
         return redirect(url_for("main.dashboard"))
 
-    examen = Examen.query.get_or_404(examen_id)
+    if request.method in ("GET", "HEAD"):
+        # El formulario depende solo de la versión del examen
+        fila = db.session.execute(
+            select(Examen.version, Examen.curso_id).where(Examen.id == examen_id)
+        ).first()
+        if fila is None or fila.curso_id != curso_id:
+            abort(404)
+        etag = etag_vista(current_user, examen_id, fila.version)
+        respuesta = no_modificado(etag)
+        if respuesta is not None:
+            return respuesta
+
+    # Vista cacheada del examen: se carga de la base una vez por versión
+    examen = obtener_vista_examen(examen_id)
+    if examen is None or examen.curso_id != curso_id:
+        abort(404)
 
     if request.method == "POST":
-        for pregunta in examen.preguntas:
-            if pregunta.tipo == "abierta":
-                respuesta_texto = request.form.get(f"pregunta_{pregunta.id}")
-                print(f"Respuesta abierta: {respuesta_texto}")  # acá luego guardás en la DB
+        # Cupo de entregas simultáneas: con el cupo lleno se responde 503 enseguida
+        # (o tras una espera corta) en vez de encolar sin límite
+        try:
+            with admitir_entrega():
+                return _entregar_examen(examen)
+        except SinCupo as error:
+            mensaje = "Hay muchas entregas en este momento, intenta de nuevo en unos segundos."
+            cabeceras = {"Retry-After": error.retry_after}
+            if request.is_json:
+                return jsonify({"error": mensaje}), error.codigo, cabeceras
+            flash(mensaje, "warning")
+            return render_template("resolver_examen.html", examen=examen), error.codigo, cabeceras
+
+    return con_etag(render_template("resolver_examen.html", examen=examen), etag)
+
+
+def _entregar_examen(examen):
+    destino = url_for("main.contenido", curso_id=examen.curso_id)
+    if ya_entregado(examen.id, current_user.id):
+        flash("Ya habías enviado este examen.", "warning")
+        return jsonify({"entregado": False, "redirect": destino}) if request.is_json else redirect(destino)
+
+    if request.is_json:
+        # Con autoguardado: el borrador ya tiene casi todo, llegan solo los últimos cambios
+        try:
+            entregado = entregar_borrador(examen, current_user.id, _respuestas_json(requeridas=False))
+        except ValueError as error:
+            return jsonify({"error": str(error)}), 400
+    else:
+        descartar_borrador(examen.id, current_user.id)
+        entregado = registrar_entrega(examen, current_user.id, respuestas_desde_formulario(examen, request.form))
+    if entregado:
+        flash("Examen enviado correctamente.")
+    else:
+        flash("Ya habías enviado este examen.", "warning")
+    return jsonify({"entregado": entregado, "redirect": destino}) if request.is_json else redirect(destino)
 
-            elif pregunta.tipo == "multiple":
-                seleccionadas = request.form.getlist(f"pregunta_{pregunta.id}")
-                print(f"Respuestas multiple: {seleccionadas}")  # acá luego guardás en la DB
 
-        flash("Examen enviado correctamente.")
-        return redirect(url_for("main.contenido", curso_id=curso_id))
+def _respuestas_json(requeridas=True):
+    datos = request.get_json(silent=True)
+    if not isinstance(datos, dict) or (requeridas and "respuestas" not in datos):
+        raise ValueError('Se esperaba un JSON {"respuestas": {pregunta_id: respuesta}}')
+    return datos.get("respuestas") or {}
+
+
+# Alumno: autoguardado del examen en curso (GET devuelve el borrador, PUT agrega cambios)
+@main.route("/api/curso/<int:curso_id>/examen/<int:examen_id>/borrador", methods=["GET", "PUT"])
+@login_required
+def borrador_examen(curso_id, examen_id):
+    if current_user.rol != "alumno" or not esta_inscripto(curso_id, current_user.id):
+        abort(403)
+    examen = obtener_vista_examen(examen_id)
+    if examen is None or examen.curso_id != curso_id:
+        abort(404)
+    if ya_entregado(examen.id, current_user.id):
+        return jsonify({"error": "El examen ya fue entregado"}), 409
+
+    if request.method == "PUT":
+        try:
+            guardadas = guardar_borrador(examen, current_user.id, _respuestas_json())
+        except ValueError as error:
+            return jsonify({"error": str(error)}), 400
+        return jsonify({"guardadas": guardadas})
+
+    return jsonify({"respuestas": {
+        str(pregunta_id): respuesta for pregunta_id, respuesta in respuestas_borrador(examen, current_user.id).items()
+    }})
+
+
+# ------------------- BÚSQUEDA -------------------
+def _cursos_visibles():
+    # None = todos los cursos (admin)
+    if current_user.rol == "alumno":
+        return ids_cursos_del_alumno(current_user.id)
+    if current_user.rol == "profesor":
+        return [curso_id for (curso_id,) in db.session.query(Curso.id).filter_by(profesor_id=current_user.id)]
+    return None
+
+
+def _url_resultado(resultado):
+    if resultado["tipo"] == "archivo":
+        return url_for("main.descargar_archivo", archivo_id=resultado["id"])
+    return url_for("main.contenido", curso_id=resultado["curso_id"])
+
+
+@main.route("/buscar")
+@login_required
+def buscar():
+    termino = request.args.get("q", "").strip()
+    resultados = buscar_documentos(termino, _cursos_visibles()) if termino else []
+    for resultado in resultados:
+        resultado["url"] = _url_resultado(resultado)
+    return render_template("buscar.html", termino=termino, resultados=resultados)
+
+
+# ------------------- API JSON (listados paginados) -------------------
+@main.route("/api/cursos")
+@login_required
+def api_cursos():
+    if current_user.rol != "admin":
+        abort(403)
+    pagina = paginar(Curso.query, Curso.id)
+    return jsonify(pagina_json(pagina, lambda curso: {
+        "id": curso.id,
+        "nombre": curso.nombre,
+        "descripcion": curso.descripcion,
+        "profesor_id": curso.profesor_id,
+    }))
+
+
+@main.route("/api/curso/<int:curso_id>/alumnos")
+@login_required
+def api_alumnos(curso_id):
+    if current_user.rol != "admin":
+        abort(403)
+    curso = Curso.query.get_or_404(curso_id)
+    pagina = paginar(User.query.filter_by(rol="alumno"), User.id)
+    inscriptos = ids_inscriptos(curso.id, entre=[alumno.id for alumno in pagina.items])
+    return jsonify(pagina_json(pagina, lambda alumno: {
+        "id": alumno.id,
+        "nombre": alumno.nombre,
+        "email": alumno.email,
+        "inscripto": alumno.id in inscriptos,
+    }))
+
 
-    return render_template("resolver_examen.html", examen=examen)
+@main.route("/api/curso/<int:curso_id>/archivos")
+@login_required
+def api_archivos(curso_id):
+    curso = Curso.query.get_or_404(curso_id)
+    if not _puede_ver_archivos(curso):
+        abort(403)
+    pagina = paginar(Archivo.query.filter_by(curso_id=curso.id), Archivo.id)
+    return jsonify(pagina_json(pagina, lambda archivo: {
+        "id": archivo.id,
+        "nombre": archivo.nombre,
+        "tamano": archivo.tamano,
+        "url": url_for("main.descargar_archivo", archivo_id=archivo.id),
+    }))
+
+
+@main.route("/api/buscar")
+@login_required
+def api_buscar():
+    termino = request.args.get("q", "").strip()
+    limite = max(1, min(request.args.get("limite", default=20, type=int), 100))
+    resultados = buscar_documentos(termino, _cursos_visibles(), limite=limite) if termino else []
+    return jsonify({"items": [
+        dict(resultado, fragmento=str(resultado["fragmento"]), url=_url_resultado(resultado))
+        for resultado in resultados
+    ]})
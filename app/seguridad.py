@@ -0,0 +1,108 @@
+# seguridad.py
+# Hash de contraseñas fuera del hilo del request: el cálculo (scrypt/pbkdf2, de
+# decenas a cientos de ms de CPU) corre en un pool de procesos acotado, así un
+# pico de logins no bloquea los hilos que atienden el resto de las páginas.
+import hmac
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from . import db
+
+_pool = None
+_cupos = None
+_lock_pool = threading.Lock()
+
+
+class HashingSaturado(RuntimeError):
+    """Hay demasiados hash de contraseñas pendientes; conviene reintentar."""
+
+
+def _obtener_pool(config):
+    global _pool, _cupos
+    with _lock_pool:
+        if _pool is None:
+            workers = config["PASSWORD_HASH_WORKERS"] or os.cpu_count() or 1
+            # "spawn": no se hace fork de un proceso con hilos y conexiones abiertas
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            _cupos = threading.BoundedSemaphore(workers + config["PASSWORD_HASH_MAX_EN_ESPERA"])
+    return _pool, _cupos
+
+
+def _ejecutar(funcion, *args):
+    config = current_app.config
+    if not config["PASSWORD_HASH_EN_POOL"]:
+        return funcion(*args)
+
+    pool, cupos = _obtener_pool(config)
+    espera = config["PASSWORD_HASH_TIMEOUT"]
+    if not cupos.acquire(timeout=espera):
+        raise HashingSaturado("Demasiados inicios de sesión simultáneos")
+    try:
+        futuro = pool.submit(funcion, *args)
+        return futuro.result(timeout=espera)
+    except TimeoutError as error:
+        futuro.cancel()
+        raise HashingSaturado("El cálculo del hash tardó demasiado") from error
+    except BrokenProcessPool as error:
+        # Murió un proceso del pool (OOM, kill): se descarta y el próximo pedido arma otro
+        _descartar_pool(pool)
+        raise HashingSaturado("El pool de hash de contraseñas se reinicia") from error
+    finally:
+        cupos.release()
+
+
+def es_hash(guardado):
+    metodo, _, resto = (guardado or "").partition("$")
+    return metodo.startswith(("scrypt", "pbkdf2")) and resto.count("$") == 1
+
+
+def hashear_password(password):
+    return _ejecutar(generate_password_hash, password, current_app.config["PASSWORD_HASH_METODO"])
+
+
+def necesita_rehash(guardado):
+    """True si la contraseña está en texto plano o con otro método/costo."""
+    if not es_hash(guardado):
+        return True
+    return guardado.partition("$")[0] != current_app.config["PASSWORD_HASH_METODO"]
+
+
+def verificar_password(usuario, password):
+    """Verifica la contraseña y, si es correcta, la migra al hash configurado.
+
+    Las filas viejas guardadas en texto plano se comparan en tiempo constante y
+    se reemplazan por su hash en el primer login exitoso.
+    """
+    if not password:
+        return False
+    guardado = usuario.password or ""
+    if es_hash(guardado):
+        correcta = _ejecutar(check_password_hash, guardado, password)
+    else:
+        correcta = hmac.compare_digest(guardado.encode(), password.encode())
+
+    if correcta and necesita_rehash(guardado):
+        usuario.password = hashear_password(password)
+        db.session.commit()
+    return correcta
+
+
+def cerrar_pool():
+    _descartar_pool(None)
+
+
+def _descartar_pool(pool):
+    """Cierra el pool actual (o solo `pool`, si otro hilo no lo reemplazó ya)."""
+    global _pool, _cupos
+    with _lock_pool:
+        if _pool is not None and pool in (None, _pool):
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = _cupos = None
@@ -0,0 +1,99 @@
+# selecciones.py
+# Respuestas de opción múltiple guardadas como máscara de bits
+# (RespuestaAlumno.respuesta_opciones, tipo MascaraOpciones): el bit i es la
+# i-ésima opción de la pregunta en orden de id. Corregir es comparar enteros y
+# "quién eligió la opción X" o "cuántas veces se eligió cada opción" se
+# resuelven en SQL con operadores de bits, sin leer ni parsear respuestas.
+from sqlalchemy import and_, func, select
+
+from . import db
+from .models import EntregaExamen, MascaraOpciones, Opcion, Pregunta, RespuestaAlumno
+
+
+def codificar(ids_elegidos, ids_opciones):
+    """Máscara de los ids elegidos; ids_opciones son los de la pregunta en orden de id.
+
+    Los ids que no son de la pregunta se ignoran.
+    """
+    elegidos = set(ids_elegidos)
+    mascara = 0
+    for ordinal, opcion_id in enumerate(ids_opciones[:MascaraOpciones.MAX_OPCIONES]):
+        if opcion_id in elegidos:
+            mascara |= 1 << ordinal
+    return mascara
+
+
+def decodificar(mascara, ids_opciones):
+    """Ids de opción elegidos según la máscara (en orden de id)."""
+    return [opcion_id for ordinal, opcion_id in enumerate(ids_opciones) if (mascara or 0) >> ordinal & 1]
+
+
+# ------------------- Consultas con operadores de bits -------------------
+
+def ordinales_opciones(*condiciones):
+    """Subconsulta (opcion_id, pregunta_id, examen_id, ordinal) de las preguntas de opción múltiple.
+
+    Las condiciones filtran preguntas (nunca opciones sueltas: el ordinal se
+    calcula sobre todas las opciones de la pregunta).
+    """
+    return (
+        select(
+            Opcion.id.label("opcion_id"),
+            Opcion.pregunta_id,
+            Pregunta.examen_id,
+            (func.row_number().over(partition_by=Opcion.pregunta_id, order_by=Opcion.id) - 1).label("ordinal"),
+        )
+        .join(Pregunta, Pregunta.id == Opcion.pregunta_id)
+        .where(Pregunta.tipo == "multiple", *condiciones)
+        .subquery()
+    )
+
+
+def _elegidas(orden, solo_entregadas):
+    """Pares (respuesta, opción) donde la opción está marcada en la máscara."""
+    consulta = (
+        select()
+        .select_from(RespuestaAlumno)
+        .join(orden, orden.c.pregunta_id == RespuestaAlumno.pregunta_id)
+        .where(RespuestaAlumno.respuesta_opciones.incluye(orden.c.ordinal))
+    )
+    if solo_entregadas:
+        # Sin EntregaExamen la respuesta es un borrador autoguardado
+        consulta = consulta.join(EntregaExamen, and_(
+            EntregaExamen.examen_id == orden.c.examen_id,
+            EntregaExamen.alumno_id == RespuestaAlumno.alumno_id,
+        ))
+    return consulta
+
+
+def alumnos_que_eligieron(opcion_id, solo_entregadas=True):
+    """Ids de los alumnos que marcaron la opción, ordenados."""
+    pregunta_id = select(Opcion.pregunta_id).where(Opcion.id == opcion_id).scalar_subquery()
+    orden = ordinales_opciones(Pregunta.id == pregunta_id)
+    consulta = (
+        _elegidas(orden, solo_entregadas)
+        .add_columns(RespuestaAlumno.alumno_id)
+        .where(orden.c.opcion_id == opcion_id)
+        .order_by(RespuestaAlumno.alumno_id)
+    )
+    return list(db.session.execute(consulta).scalars())
+
+
+def consulta_frecuencias(*condiciones, solo_entregadas=True):
+    """SELECT opcion_id, examen_id, elecciones agrupado por opción (las no elegidas no aparecen)."""
+    orden = ordinales_opciones(*condiciones)
+    return (
+        _elegidas(orden, solo_entregadas)
+        .add_columns(orden.c.opcion_id, orden.c.examen_id, func.count().label("elecciones"))
+        .group_by(orden.c.opcion_id, orden.c.examen_id)
+    )
+
+
+def frecuencia_opciones(examen_id, solo_entregadas=True):
+    """{opcion_id: veces elegida} en el examen, contado en la base."""
+    return {
+        opcion_id: elecciones
+        for opcion_id, _, elecciones in db.session.execute(
+            consulta_frecuencias(Pregunta.examen_id == examen_id, solo_entregadas=solo_entregadas)
+        )
+    }
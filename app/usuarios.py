@@ -0,0 +1,109 @@
+# usuarios.py
+# Identidad del usuario logueado sin ir a la base en cada request: Flask-Login
+# recibe una UsuarioSesion cacheada (id, nombre, email, rol) y el objeto User
+# completo solo se carga si una vista pide algún otro atributo. Ese User vive en
+# flask.g (uno por request y por sesión de la base), nunca en la foto cacheada,
+# que comparten todos los hilos del worker.
+from flask import current_app, g, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import object_session
+
+from . import db
+from .cache import obtener_cache
+from .models import User
+
+
+class UsuarioSesion:
+    """Foto liviana de un User, suficiente para current_user en casi todas las vistas."""
+
+    __slots__ = ("id", "nombre", "email", "rol")
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(self, id, nombre, email, rol):
+        self.id = id
+        self.nombre = nombre
+        self.email = email
+        self.rol = rol
+
+    def get_id(self):
+        return str(self.id)
+
+    @property
+    def usuario(self):
+        """El User del ORM, cargado recién la primera vez que se necesita en el request."""
+        cargados = g.setdefault("usuarios_orm", {})
+        if self.id not in cargados:
+            cargados[self.id] = db.session.get(User, self.id)
+        return cargados[self.id]
+
+    def __getattr__(self, nombre):
+        # Atributos que no están en la foto (relaciones, password, ...)
+        if nombre.startswith("_"):
+            raise AttributeError(nombre)
+        return getattr(self.usuario, nombre)
+
+    def __getstate__(self):
+        return (self.id, self.nombre, self.email, self.rol)
+
+    def __setstate__(self, estado):
+        self.id, self.nombre, self.email, self.rol = estado
+
+    def __repr__(self):
+        return f"<UsuarioSesion {self.id} {self.rol}>"
+
+
+def _cache_usuarios():
+    return obtener_cache(
+        "usuarios",
+        maxsize=current_app.config["USER_CACHE_MAXSIZE"],
+        ttl=current_app.config["USER_CACHE_TTL"],
+    )
+
+
+def cargar_usuario_sesion(user_id):
+    """user_loader de Flask-Login: caché primero, una consulta liviana si no está."""
+    cache = _cache_usuarios()
+    # Flask-Login pasa el id como texto; invalidar_usuario recibe el entero
+    clave = str(user_id)
+    usuario = cache.get(clave)
+    if usuario is not None:
+        return usuario
+
+    fila = db.session.execute(
+        select(User.id, User.nombre, User.email, User.rol).where(User.id == user_id)
+    ).first()
+    if fila is None:
+        return None
+    usuario = UsuarioSesion(*fila)
+    cache.set(clave, usuario)
+    return usuario
+
+
+def invalidar_usuario(user_id):
+    if has_app_context():
+        _cache_usuarios().delete(str(user_id))
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _marcar_cambiado(mapper, conexion, usuario):
+    # Se invalida recién después del commit: antes, otro request podría volver
+    # a cachear los datos viejos que todavía ve la base
+    session = object_session(usuario)
+    if session is not None:
+        session.info.setdefault("usuarios_cambiados", set()).add(usuario.id)
+
+
+@event.listens_for(db.session, "after_commit")
+def _invalidar_cambiados(session):
+    for user_id in session.info.pop("usuarios_cambiados", ()):
+        invalidar_usuario(user_id)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _descartar_cambiados(session):
+    session.info.pop("usuarios_cambiados", None)
@@ -0,0 +1,152 @@
+# arranque.py
+# Tiempo de arranque de un worker: proceso nuevo que importa y arma la app
+# (lo que hace cada worker sin preload) vs. fork de un padre con la app ya
+# armada (gunicorn con preload_app), con y sin precalentar.
+#
+#   python benchmarks/arranque.py --repeticiones 10
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Hash barato: el benchmark mide el arranque, no scrypt
+METODO = "pbkdf2:sha256:1000"
+MODULOS_PESADOS = ("flask_mail", "flask_migrate", "alembic", "smtplib")
+
+
+def configuracion(uri):
+    return {
+        "SQLALCHEMY_DATABASE_URI": uri,
+        "TESTING": True,
+        "MAIL_OUTBOX_WORKER": "proceso",
+        "LIMITES_HABILITADOS": False,
+        "PASSWORD_HASH_EN_POOL": False,
+        "PASSWORD_HASH_METODO": METODO,
+    }
+
+
+def ronda(app, email, password):
+    """Login de un alumno y su dashboard; devuelve los ms de cada request."""
+    cliente = app.test_client()
+    tiempos = []
+    for metodo, ruta, datos in (
+        ("get", "/login", None),
+        ("post", "/login", {"email": email, "password": password}),
+        ("get", "/dashboard", None),
+    ):
+        inicio = time.perf_counter()
+        respuesta = getattr(cliente, metodo)(ruta, data=datos)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        assert respuesta.status_code in (200, 302), (ruta, respuesta.status_code)
+    return tiempos
+
+
+def medir_hijo(uri, email, password):
+    """Corre dentro de un proceso nuevo: import, create_app y dos rondas."""
+    inicio = time.perf_counter()
+    from app import create_app
+
+    importado = time.perf_counter()
+    app = create_app(configuracion(uri))
+    creado = time.perf_counter()
+    resultado = {
+        "import": (importado - inicio) * 1000,
+        "create_app": (creado - importado) * 1000,
+        "pesados": [nombre for nombre in MODULOS_PESADOS if nombre in sys.modules],
+    }
+    resultado["primera"] = ronda(app, email, password)
+    resultado["segunda"] = ronda(app, email, password)
+    return resultado
+
+
+def en_frio(uri, email, password):
+    inicio = time.perf_counter()
+    salida = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--hijo", uri, email, password],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    resultado = json.loads(salida.splitlines()[-1])
+    resultado["proceso"] = (time.perf_counter() - inicio) * 1000
+    return resultado
+
+
+def con_fork(app, email, password):
+    from app.arranque import despues_de_fork
+
+    lectura, escritura = os.pipe()
+    inicio = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        os.close(lectura)
+        try:
+            despues_de_fork(app)
+            datos = {"primera": ronda(app, email, password), "segunda": ronda(app, email, password)}
+            os.write(escritura, json.dumps(datos).encode())
+        finally:
+            os._exit(0)
+    os.close(escritura)
+    with os.fdopen(lectura) as canal:
+        resultado = json.loads(canal.read())
+    os.waitpid(pid, 0)
+    resultado["proceso"] = (time.perf_counter() - inicio) * 1000
+    return resultado
+
+
+def mostrar(nombre, corridas):
+    def mediana(clave):
+        valores = [c[clave] for c in corridas if clave in c]
+        return f"{statistics.median(valores):8.1f}" if valores else f"{'-':>8}"
+
+    primera = [sum(c["primera"]) for c in corridas]
+    segunda = [sum(c["segunda"]) for c in corridas]
+    print(
+        f"{nombre:>20} {mediana('import')} {mediana('create_app')}"
+        f" {statistics.median(primera):8.1f} {statistics.median(segunda):8.1f} {mediana('proceso')}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de arranque de un worker")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--hijo", nargs=3, metavar=("URI", "EMAIL", "PASSWORD"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        sys.path.insert(0, RAIZ)
+        print(json.dumps(medir_hijo(*args.hijo)))
+        return
+
+    from comun import PASSWORD, crear_app_temporal, db, sembrar_escuela
+
+    from app import create_app
+    from app.arranque import precalentar
+
+    semilla = crear_app_temporal(PASSWORD_HASH_METODO=METODO)
+    with semilla.app_context():
+        escuela = sembrar_escuela(profesores=5, cursos=20, alumnos=200, archivos_por_curso=0)
+        db.engine.dispose()
+    uri = semilla.config["SQLALCHEMY_DATABASE_URI"]
+    email = f"alumno{len(escuela.alumnos) // 2}@bench.local"
+
+    frias = [en_frio(uri, email, PASSWORD) for _ in range(args.repeticiones)]
+    if frias[0]["pesados"]:
+        print(f"Módulos cargados sin usarse: {', '.join(frias[0]['pesados'])}")
+
+    padre = create_app(configuracion(uri))
+    forks = [con_fork(padre, email, PASSWORD) for _ in range(args.repeticiones)]
+    precalentar(padre)
+    precalentados = [con_fork(padre, email, PASSWORD) for _ in range(args.repeticiones)]
+
+    print("Medianas en ms (1ra/2da ronda = GET /login + POST /login + GET /dashboard)")
+    print(f"{'':>20} {'import':>8} {'app':>8} {'1ra':>8} {'2da':>8} {'proceso':>8}")
+    mostrar("proceso nuevo", frias)
+    mostrar("fork", forks)
+    mostrar("fork + precalentar", precalentados)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+# comun.py
+# Utilidades compartidas por los scripts de benchmarks: app sobre una base
+# temporal y carga de datos sintéticos usando los modelos de la aplicación.
+import io
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+from collections import namedtuple
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select  # noqa: E402
+from flask import current_app  # noqa: E402
+from werkzeug.datastructures import FileStorage  # noqa: E402
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.almacenamiento import guardar_subida  # noqa: E402
+from app.estadisticas import reconstruir_estadisticas  # noqa: E402
+from app.models import Archivo, Curso, Examen, Opcion, Pregunta, User, curso_alumno  # noqa: E402
+
+PASSWORD = "1234"
+
+
+def crear_app_temporal(**config):
+    """Crea la app sobre una base SQLite descartable (o DATABASE_URL si se pasa)."""
+    directorio = tempfile.mkdtemp(prefix="aula-bench-")
+    opciones = {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directorio, 'bench.db')}",
+        "ARCHIVOS_RAIZ": directorio,
+        "TESTING": True,
+        "MAIL_SUPPRESS_SEND": True,
+        "MAIL_OUTBOX_WORKER": "proceso",
+        # Todo el tráfico sale de una IP: los límites de login cortarían la carga
+        "LIMITES_HABILITADOS": False,
+    }
+    opciones.update(config)
+    app = create_app(opciones)
+    app.static_folder = os.path.join(directorio, "static")
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def crear_usuarios(rol, cantidad, prefijo=None, password=PASSWORD):
+    """Inserta usuarios en lote y devuelve sus ids.
+
+    password es lo que se guarda tal cual: texto plano (se migra al primer login)
+    o un hash ya calculado para medir logins sin esa migración.
+    """
+    prefijo = prefijo or rol
+    db.session.execute(insert(User), [
+        {"nombre": f"{prefijo} {i}", "email": f"{prefijo}{i}@bench.local", "password": password, "rol": rol}
+        for i in range(cantidad)
+    ])
+    db.session.commit()
+    return list(db.session.execute(
+        select(User.id).where(User.email.like(f"{prefijo}%@bench.local")).order_by(User.id)
+    ).scalars())
+
+
+def crear_examen(curso_id, preguntas=20, opciones=4):
+    """Crea un examen con preguntas de opción múltiple (la opción 0 es la correcta)."""
+    examen = Examen(titulo="Examen de prueba", curso_id=curso_id)
+    db.session.add(examen)
+    db.session.flush()
+    for i in range(preguntas):
+        pregunta = Pregunta(texto=f"Pregunta {i}", tipo="multiple", examen_id=examen.id)
+        db.session.add(pregunta)
+        db.session.flush()
+        db.session.add_all(
+            Opcion(texto=f"Opción {j}", es_correcta=(j == 0), pregunta_id=pregunta.id)
+            for j in range(opciones)
+        )
+    db.session.commit()
+    return examen.id
+
+
+def crear_curso(profesor_id, alumno_ids, nombre="Curso de prueba"):
+    curso = Curso(nombre=nombre, descripcion="Generado por benchmarks", profesor_id=profesor_id)
+    db.session.add(curso)
+    db.session.flush()
+    if alumno_ids:
+        db.session.execute(curso_alumno.insert(), [
+            {"curso_id": curso.id, "alumno_id": alumno_id} for alumno_id in alumno_ids
+        ])
+    db.session.commit()
+    return curso.id
+
+
+def iniciar_sesion(cliente, email, password=PASSWORD):
+    respuesta = cliente.post("/login", data={"email": email, "password": password})
+    if respuesta.status_code != 302:
+        raise RuntimeError(f"No se pudo iniciar sesión como {email}")
+
+
+Escuela = namedtuple("Escuela", "profesores cursos alumnos examenes inscripciones")
+
+
+def sembrar_escuela(profesores, cursos, alumnos, examenes_por_curso=1, preguntas=10, opciones=4,
+                    archivos_por_curso=3, cursos_por_alumno=2, semilla=0):
+    """Carga una escuela sintética completa y devuelve sus ids.
+
+    examenes: {curso_id: [examen_id, ...]}; inscripciones: {alumno_id: [curso_id, ...]}.
+    Los archivos se suben con guardar_subida (un puñado de contenidos distintos
+    compartidos entre cursos, como pasa con los apuntes reales).
+    """
+    azar = random.Random(semilla)
+    # Un solo hash para todos: los logins del benchmark no pagan la migración de contraseñas
+    hash_comun = generate_password_hash(PASSWORD, current_app.config["PASSWORD_HASH_METODO"])
+    profesor_ids = crear_usuarios("profesor", profesores, password=hash_comun)
+    alumno_ids = crear_usuarios("alumno", alumnos, password=hash_comun)
+
+    db.session.execute(insert(Curso), [
+        {"nombre": f"Curso {i}", "descripcion": "Generado por benchmarks", "profesor_id": azar.choice(profesor_ids)}
+        for i in range(cursos)
+    ])
+    curso_ids = list(db.session.execute(select(Curso.id).order_by(Curso.id)).scalars())
+
+    db.session.execute(insert(Examen), [
+        {"titulo": f"Examen {i}", "curso_id": curso_id}
+        for curso_id in curso_ids for i in range(examenes_por_curso)
+    ])
+    examenes = {}
+    for examen_id, curso_id in db.session.execute(select(Examen.id, Examen.curso_id).order_by(Examen.id)):
+        examenes.setdefault(curso_id, []).append(examen_id)
+    if preguntas and examenes:
+        db.session.execute(insert(Pregunta), [
+            {"texto": f"Pregunta {i}", "tipo": "multiple", "examen_id": examen_id}
+            for ids in examenes.values() for examen_id in ids for i in range(preguntas)
+        ])
+        db.session.execute(insert(Opcion), [
+            {"texto": f"Opción {j}", "es_correcta": j == 0, "pregunta_id": pregunta_id}
+            for pregunta_id in db.session.execute(select(Pregunta.id)).scalars() for j in range(opciones)
+        ])
+
+    if archivos_por_curso:
+        blobs = [
+            guardar_subida(FileStorage(io.BytesIO(os.urandom(64 * 1024)), filename=f"apunte{i}.pdf"))
+            for i in range(min(archivos_por_curso, 10))
+        ]
+        db.session.execute(insert(Archivo), [
+            {"nombre": f"apunte{i}.pdf", "ruta": blob.ruta, "sha256": blob.sha256,
+             "tamano": blob.tamano, "curso_id": curso_id}
+            for curso_id in curso_ids
+            for i, blob in ((i, blobs[i % len(blobs)]) for i in range(archivos_por_curso))
+        ])
+        for indice, blob in enumerate(blobs):
+            usos = sum(1 for i in range(archivos_por_curso) if i % len(blobs) == indice)
+            blob.referencias = usos * len(curso_ids)
+
+    inscripciones = {
+        alumno_id: azar.sample(curso_ids, min(cursos_por_alumno, len(curso_ids)))
+        for alumno_id in alumno_ids
+    }
+    db.session.execute(curso_alumno.insert(), [
+        {"curso_id": curso_id, "alumno_id": alumno_id}
+        for alumno_id, ids in inscripciones.items() for curso_id in ids
+    ])
+    db.session.commit()
+    # Los inserts en lote no pasan por los eventos de sesión
+    reconstruir_estadisticas()
+    return Escuela(profesor_ids, curso_ids, alumno_ids, examenes, inscripciones)
+
+
+def percentiles(valores, puntos=(50, 95, 99)):
+    """Percentiles por rango más cercano; valores en cualquier orden."""
+    ordenados = sorted(valores)
+    if not ordenados:
+        return {f"p{p}": None for p in puntos}
+    return {
+        f"p{p}": ordenados[min(len(ordenados) - 1, max(0, math.ceil(len(ordenados) * p / 100) - 1))]
+        for p in puntos
+    }
+
+
+def guardar_resultados(ruta, datos):
+    """Escribe los resultados en JSON junto con datos del entorno para comparar corridas."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    datos = dict(datos, entorno={
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    })
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as salida:
+        json.dump(datos, salida, indent=2, ensure_ascii=False)
+    return ruta
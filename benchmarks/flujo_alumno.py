@@ -0,0 +1,239 @@
+# flujo_alumno.py
+# Prueba de carga del recorrido completo de un alumno sobre una escuela sintética:
+# login -> dashboard -> contenido del curso -> resolver examen -> enviar.
+# Reporta p50/p95/p99 por paso, throughput y sentencias SQL por request
+# (con la instrumentación de metricas.py) y guarda todo en JSON.
+#
+#   python benchmarks/flujo_alumno.py --alumnos 500 --concurrencia 16
+#   python benchmarks/flujo_alumno.py --servidor            # HTTP real contra un servidor local
+#   python benchmarks/flujo_alumno.py --comparar benchmarks/resultados/anterior.json
+#   DATABASE_URL=postgresql://... python benchmarks/flujo_alumno.py
+import argparse
+import http.cookiejar
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from comun import PASSWORD, crear_app_temporal, db, guardar_resultados, percentiles, sembrar_escuela
+from sqlalchemy import func, select
+from werkzeug.serving import make_server
+
+from app.metricas import obtener_metricas
+from app.models import Opcion, Pregunta
+
+PASOS = ("login", "dashboard", "contenido", "ver_examen", "enviar")
+# Código esperado en cada paso (los POST redirigen)
+ESPERADOS = {"login": 302, "dashboard": 200, "contenido": 200, "ver_examen": 200, "enviar": 302}
+RECHAZOS = (429, 503)  # control de admisión (--limites): no cuentan como errores
+
+
+class ClientePrueba:
+    """Va directo a la app con el test client de Flask (sin red)."""
+
+    def __init__(self, app):
+        self._cliente = app.test_client()
+
+    def get(self, url):
+        return self._cliente.get(url).status_code
+
+    def post(self, url, datos):
+        return self._cliente.post(url, data=datos).status_code
+
+
+class _SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class ClienteHttp:
+    """HTTP real contra el servidor local, con cookies y sin seguir redirecciones."""
+
+    def __init__(self, base):
+        self._base = base
+        self._abridor = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _SinRedirecciones()
+        )
+
+    def _pedir(self, url, datos=None):
+        cuerpo = urllib.parse.urlencode(datos, doseq=True).encode() if datos is not None else None
+        try:
+            with self._abridor.open(self._base + url, cuerpo) as respuesta:
+                respuesta.read()
+                return respuesta.status
+        except urllib.error.HTTPError as error:
+            error.read()
+            return error.code
+
+    def get(self, url):
+        return self._pedir(url)
+
+    def post(self, url, datos):
+        return self._pedir(url, datos)
+
+
+def formularios_por_examen(examen_ids):
+    """Respuestas a enviar por examen: la primera opción de cada pregunta."""
+    formularios = {}
+    for examen_id, pregunta_id, opcion_id in db.session.execute(
+        select(Pregunta.examen_id, Opcion.pregunta_id, func.min(Opcion.id))
+        .join(Pregunta)
+        .where(Pregunta.examen_id.in_(examen_ids))
+        .group_by(Pregunta.examen_id, Opcion.pregunta_id)
+    ):
+        formularios.setdefault(examen_id, {})[f"pregunta_{pregunta_id}"] = str(opcion_id)
+    return formularios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga sobre el recorrido del alumno")
+    parser.add_argument("--profesores", type=int, default=20)
+    parser.add_argument("--cursos", type=int, default=50)
+    parser.add_argument("--alumnos", type=int, default=300)
+    parser.add_argument("--examenes-por-curso", type=int, default=2)
+    parser.add_argument("--preguntas", type=int, default=20)
+    parser.add_argument("--archivos-por-curso", type=int, default=5)
+    parser.add_argument("--cursos-por-alumno", type=int, default=3)
+    parser.add_argument("--concurrencia", type=int, default=8, help="alumnos recorriendo el flujo a la vez")
+    parser.add_argument("--servidor", action="store_true", help="HTTP real contra un servidor local con hilos")
+    parser.add_argument("--limites", action="store_true",
+                        help="con control de admisión (limites.py); los 429/503 se reportan aparte")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="JSON de resultados (por defecto benchmarks/resultados/flujo-<fecha>.json)")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para mostrar diferencias")
+    args = parser.parse_args()
+
+    config = {"METRICAS_HABILITADAS": True, "METRICAS_UMBRAL_N_MAS_1": args.preguntas,
+              "LIMITES_HABILITADOS": args.limites}
+    if os.environ.get("DATABASE_URL"):
+        config["SQLALCHEMY_DATABASE_URI"] = os.environ["DATABASE_URL"]
+    app = crear_app_temporal(**config)
+
+    inicio = time.perf_counter()
+    with app.app_context():
+        escuela = sembrar_escuela(
+            args.profesores, args.cursos, args.alumnos,
+            examenes_por_curso=args.examenes_por_curso, preguntas=args.preguntas,
+            archivos_por_curso=args.archivos_por_curso, cursos_por_alumno=args.cursos_por_alumno,
+            semilla=args.semilla,
+        )
+        formularios = formularios_por_examen([i for ids in escuela.examenes.values() for i in ids])
+        motor = db.engine.dialect.name
+    print(f"Escuela sembrada en {time.perf_counter() - inicio:.1f} s ({motor}): "
+          f"{args.profesores} profesores, {args.cursos} cursos, {args.alumnos} alumnos")
+
+    servidor = None
+    if args.servidor:
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        servidor = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{servidor.server_port}"
+        nuevo_cliente = lambda: ClienteHttp(base)  # noqa: E731
+    else:
+        nuevo_cliente = lambda: ClientePrueba(app)  # noqa: E731
+
+    def recorrer(indice):
+        alumno_id = escuela.alumnos[indice]
+        curso_id = escuela.inscripciones[alumno_id][0]
+        examen_id = escuela.examenes[curso_id][0]
+        url_examen = f"/curso/{curso_id}/examen/{examen_id}/resolver"
+        cliente = nuevo_cliente()
+        pasos = (
+            ("login", lambda: cliente.post("/login", {"email": f"alumno{indice}@bench.local", "password": PASSWORD})),
+            ("dashboard", lambda: cliente.get("/dashboard")),
+            ("contenido", lambda: cliente.get(f"/curso/{curso_id}/contenido")),
+            ("ver_examen", lambda: cliente.get(url_examen)),
+            ("enviar", lambda: cliente.post(url_examen, formularios[examen_id])),
+        )
+        medidos = []
+        for paso, pedir in pasos:
+            comienzo = time.perf_counter()
+            codigo = pedir()
+            medidos.append((paso, time.perf_counter() - comienzo, codigo))
+        return medidos
+
+    tiempos = {paso: [] for paso in PASOS}
+    errores = {paso: 0 for paso in PASOS}
+    rechazados = {paso: 0 for paso in PASOS}
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrencia) as pool:
+        for medidos in pool.map(recorrer, range(args.alumnos)):
+            for paso, segundos, codigo in medidos:
+                tiempos[paso].append(segundos)
+                if codigo in RECHAZOS:
+                    rechazados[paso] += 1
+                elif codigo != ESPERADOS[paso]:
+                    errores[paso] += 1
+    duracion = time.perf_counter() - inicio
+    if servidor is not None:
+        servidor.shutdown()
+
+    # Sentencias SQL por request, medidas del lado de la app
+    sentencias = {}
+    registro = obtener_metricas(app)
+    for endpoint, metricas in registro.endpoints.items():
+        if metricas.sql_sentencias.total:
+            sentencias[endpoint] = {
+                "por_request": metricas.sql_sentencias.suma / metricas.sql_sentencias.total,
+                "n_mas_1": metricas.n_mas_1,
+            }
+
+    requests = sum(len(valores) for valores in tiempos.values())
+    resultados = {
+        "parametros": vars(args),
+        "motor": motor,
+        "modo": "servidor" if args.servidor else "test_client",
+        "duracion_s": duracion,
+        "requests_por_s": requests / duracion,
+        "flujos_por_s": args.alumnos / duracion,
+        "pasos": {
+            paso: dict(
+                {clave: valor * 1000 for clave, valor in percentiles(tiempos[paso]).items()},
+                promedio=1000 * sum(tiempos[paso]) / len(tiempos[paso]),
+                requests=len(tiempos[paso]),
+                errores=errores[paso],
+                rechazados=rechazados[paso],
+            )
+            for paso in PASOS
+        },
+        "sentencias_sql": sentencias,
+    }
+
+    print(f"{requests} requests en {duracion:.2f} s: {resultados['requests_por_s']:.0f} req/s, "
+          f"{resultados['flujos_por_s']:.1f} flujos/s, concurrencia {args.concurrencia}")
+    print(f"{'paso':<12}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errores':>9}{'429/503':>9}")
+    for paso, datos in resultados["pasos"].items():
+        print(f"{paso:<12}{datos['p50']:>9.1f}{datos['p95']:>9.1f}{datos['p99']:>9.1f}"
+              f"{datos['errores']:>9}{datos['rechazados']:>9}")
+    print("Sentencias SQL por request:")
+    for endpoint, datos in sorted(sentencias.items()):
+        print(f"  {endpoint:<24}{datos['por_request']:>6.1f}" + (f"  (N+1 en {datos['n_mas_1']})" if datos["n_mas_1"] else ""))
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            anterior = json.load(archivo)
+        print(f"Comparación con {args.comparar} ({anterior.get('entorno', {}).get('commit')}):")
+        for paso, datos in resultados["pasos"].items():
+            previo = anterior["pasos"].get(paso)
+            if previo and previo.get("p95"):
+                cambio = 100 * (datos["p95"] - previo["p95"]) / previo["p95"]
+                print(f"  {paso:<12}p95 {previo['p95']:.1f} -> {datos['p95']:.1f} ms ({cambio:+.0f}%)")
+        cambio = 100 * (resultados["requests_por_s"] - anterior["requests_por_s"]) / anterior["requests_por_s"]
+        print(f"  throughput {anterior['requests_por_s']:.0f} -> {resultados['requests_por_s']:.0f} req/s ({cambio:+.0f}%)")
+
+    salida = args.salida or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "resultados", time.strftime("flujo-%Y%m%d-%H%M%S.json")
+    )
+    print(f"Resultados guardados en {guardar_resultados(salida, resultados)}")
+
+    fallidos = sum(errores.values())
+    raise SystemExit(1 if fallidos else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# indices.py
+# Carga volúmenes realistas y compara plan de consulta y tiempos de las
+# búsquedas más frecuentes de routes.py sin y con los índices secundarios.
+#
+#   python benchmarks/indices.py --profesores 200 --cursos 2000 --alumnos 20000
+import argparse
+import random
+import time
+
+from comun import crear_app_temporal, crear_usuarios, db
+from sqlalchemy import insert, select, text
+
+from app.models import Archivo, Curso, Examen, Opcion, Pregunta, RespuestaAlumno, curso_alumno
+
+# Índices declarados en los modelos que agrega la migración 7a1d5c3e9b28
+INDICES = {
+    "ix_curso_profesor_id": "curso (profesor_id)",
+    "ix_user_rol": "user (rol)",
+    "ix_archivo_curso_id": "archivo (curso_id)",
+    "ix_examen_curso_id": "examen (curso_id)",
+    "ix_pregunta_examen_id": "pregunta (examen_id)",
+    "ix_opcion_pregunta_id": "opcion (pregunta_id)",
+    "ix_respuesta_alumno_alumno_pregunta": "respuesta_alumno (alumno_id, pregunta_id)",
+    "ix_respuesta_alumno_pregunta_id": "respuesta_alumno (pregunta_id)",
+    "ix_curso_alumno_alumno_id": "curso_alumno (alumno_id)",
+}
+
+CONSULTAS = {
+    "cursos del profesor": "SELECT * FROM curso WHERE profesor_id = :profesor_id",
+    "listado de alumnos": "SELECT id, nombre, email FROM user WHERE rol = 'alumno'",
+    "listado de profesores": "SELECT id, nombre, email FROM user WHERE rol = 'profesor'",
+    "archivos del curso": "SELECT * FROM archivo WHERE curso_id = :curso_id",
+    "exámenes del curso": "SELECT * FROM examen WHERE curso_id = :curso_id",
+    "preguntas del examen": "SELECT * FROM pregunta WHERE examen_id = :examen_id",
+    "opciones de la pregunta": "SELECT * FROM opcion WHERE pregunta_id = :pregunta_id",
+    "respuesta del alumno": (
+        "SELECT * FROM respuesta_alumno WHERE alumno_id = :alumno_id AND pregunta_id = :pregunta_id"
+    ),
+    "cursos del alumno": (
+        "SELECT curso.* FROM curso JOIN curso_alumno ON curso_alumno.curso_id = curso.id "
+        "WHERE curso_alumno.alumno_id = :alumno_id"
+    ),
+}
+
+
+def sembrar(args):
+    profesores = crear_usuarios("profesor", args.profesores)
+    alumnos = crear_usuarios("alumno", args.alumnos)
+
+    db.session.execute(insert(Curso), [
+        {"nombre": f"Curso {i}", "profesor_id": random.choice(profesores)} for i in range(args.cursos)
+    ])
+    cursos = list(db.session.execute(select(Curso.id)).scalars())
+    db.session.execute(insert(Archivo), [
+        {"nombre": f"apunte{i}.pdf", "ruta": f"uploads/apunte{i}.pdf", "curso_id": curso_id}
+        for curso_id in cursos for i in range(args.archivos_por_curso)
+    ])
+    db.session.execute(insert(Examen), [
+        {"titulo": f"Examen {i}", "curso_id": curso_id}
+        for curso_id in cursos for i in range(args.examenes_por_curso)
+    ])
+    examenes = list(db.session.execute(select(Examen.id)).scalars())
+    db.session.execute(insert(Pregunta), [
+        {"texto": f"Pregunta {i}", "tipo": "multiple", "examen_id": examen_id}
+        for examen_id in examenes for i in range(args.preguntas_por_examen)
+    ])
+    preguntas = list(db.session.execute(select(Pregunta.id)).scalars())
+    db.session.execute(insert(Opcion), [
+        {"texto": f"Opción {j}", "es_correcta": j == 0, "pregunta_id": pregunta_id}
+        for pregunta_id in preguntas for j in range(4)
+    ])
+
+    inscripciones = set()
+    for alumno_id in alumnos:
+        for curso_id in random.sample(cursos, min(args.cursos_por_alumno, len(cursos))):
+            inscripciones.add((curso_id, alumno_id))
+    db.session.execute(curso_alumno.insert(), [
+        {"curso_id": curso_id, "alumno_id": alumno_id} for curso_id, alumno_id in inscripciones
+    ])
+
+    respuestas = set()
+    while len(respuestas) < args.respuestas:
+        respuestas.add((random.choice(alumnos), random.choice(preguntas)))
+    db.session.execute(insert(RespuestaAlumno.__table__), [
+        {"alumno_id": alumno_id, "pregunta_id": pregunta_id, "respuesta_opciones": 1}
+        for alumno_id, pregunta_id in respuestas
+    ])
+    db.session.commit()
+    return {
+        "profesor_id": profesores, "curso_id": cursos, "examen_id": examenes,
+        "pregunta_id": preguntas, "alumno_id": alumnos,
+    }
+
+
+def medir(conexion, valores, repeticiones):
+    resultados = {}
+    for nombre, sql in CONSULTAS.items():
+        consulta = text(sql)
+        parametros = [
+            {clave: random.choice(valores[clave]) for clave in valores if f":{clave}" in sql}
+            for _ in range(repeticiones)
+        ]
+        plan = " | ".join(
+            fila[-1] for fila in conexion.execute(text("EXPLAIN QUERY PLAN " + sql), parametros[0])
+        )
+        inicio = time.perf_counter()
+        for p in parametros:
+            conexion.execute(consulta, p).fetchall()
+        resultados[nombre] = (plan, (time.perf_counter() - inicio) / repeticiones * 1000)
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan y tiempos de consultas sin/con índices")
+    parser.add_argument("--profesores", type=int, default=200)
+    parser.add_argument("--cursos", type=int, default=2000)
+    parser.add_argument("--alumnos", type=int, default=20000)
+    parser.add_argument("--cursos-por-alumno", type=int, default=6)
+    parser.add_argument("--archivos-por-curso", type=int, default=10)
+    parser.add_argument("--examenes-por-curso", type=int, default=3)
+    parser.add_argument("--preguntas-por-examen", type=int, default=10)
+    parser.add_argument("--respuestas", type=int, default=200000)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args()
+
+    random.seed(1234)
+    app = crear_app_temporal()
+    with app.app_context():
+        print("Cargando datos...")
+        valores = sembrar(args)
+
+        with db.engine.connect() as conexion:
+            for indice in INDICES:
+                conexion.execute(text(f"DROP INDEX IF EXISTS {indice}"))
+            conexion.execute(text("ANALYZE"))
+            antes = medir(conexion, valores, args.repeticiones)
+
+            for indice, definicion in INDICES.items():
+                unico = "UNIQUE " if indice == "ix_respuesta_alumno_alumno_pregunta" else ""
+                conexion.execute(text(f"CREATE {unico}INDEX {indice} ON {definicion}"))
+            conexion.execute(text("ANALYZE"))
+            despues = medir(conexion, valores, args.repeticiones)
+
+    for nombre in CONSULTAS:
+        plan_antes, ms_antes = antes[nombre]
+        plan_despues, ms_despues = despues[nombre]
+        print(f"\n{nombre}: {ms_antes:.3f} ms -> {ms_despues:.3f} ms ({ms_antes / max(ms_despues, 1e-6):.0f}x)")
+        print(f"  sin índices: {plan_antes}")
+        print(f"  con índices: {plan_despues}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# logins.py
+# Inicios de sesión por segundo con el hash de contraseñas en el hilo del
+# request vs. en el pool de procesos de seguridad.py.
+#
+#   python benchmarks/logins.py --usuarios 200 --hilos 16 --metodo scrypt:32768:8:1
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from comun import PASSWORD, crear_app_temporal, db
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+from app.models import User
+from app.seguridad import cerrar_pool
+
+
+def medir(app, usuarios, hilos):
+    def login(i):
+        cliente = app.test_client()
+        inicio = time.perf_counter()
+        respuesta = cliente.post("/login", data={"email": f"bench{i}@bench.local", "password": PASSWORD})
+        assert respuesta.status_code == 302, respuesta.status_code
+        return time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        tiempos = sorted(pool.map(login, range(usuarios)))
+    total = time.perf_counter() - inicio
+    return usuarios / total, tiempos[len(tiempos) // 2] * 1000, tiempos[int(len(tiempos) * 0.95)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Logins por segundo bajo concurrencia")
+    parser.add_argument("--usuarios", type=int, default=200)
+    parser.add_argument("--hilos", type=int, default=16)
+    parser.add_argument("--metodo", default="scrypt:32768:8:1")
+    parser.add_argument("--workers", type=int, default=0, help="procesos del pool (0 = uno por CPU)")
+    args = parser.parse_args()
+
+    app = crear_app_temporal(PASSWORD_HASH_METODO=args.metodo, PASSWORD_HASH_WORKERS=args.workers)
+    hash_comun = generate_password_hash(PASSWORD, args.metodo)
+    with app.app_context():
+        db.session.execute(insert(User), [
+            {"nombre": f"bench {i}", "email": f"bench{i}@bench.local", "password": hash_comun, "rol": "alumno"}
+            for i in range(args.usuarios)
+        ])
+        db.session.commit()
+
+    inicio = time.perf_counter()
+    generate_password_hash(PASSWORD, args.metodo)
+    print(f"Método {args.metodo}: {(time.perf_counter() - inicio) * 1000:.0f} ms por hash")
+
+    for en_pool in (False, True):
+        app.config["PASSWORD_HASH_EN_POOL"] = en_pool
+        if en_pool:
+            # Arranque del pool fuera de la medición
+            with app.app_context():
+                from app.seguridad import hashear_password
+                hashear_password("calentar")
+        por_segundo, p50, p95 = medir(app, args.usuarios, args.hilos)
+        modo = "pool de procesos" if en_pool else "hilo del request"
+        print(f"{modo:>17}: {por_segundo:6.1f} logins/s  p50 {p50:6.0f} ms  p95 {p95:6.0f} ms")
+
+    cerrar_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 from app import db, create_app
 from app.models import User
+from app.seguridad import hashear_password
 
-app = create_app()
+# Script de un solo uso: el hash se calcula acá mismo, sin pool de procesos
+app = create_app({"PASSWORD_HASH_EN_POOL": False})
 with app.app_context():
     db.create_all()
-    admin = User(nombre="Admin", email="admin@aula.com", password="1234", rol="admin")
+    admin = User(nombre="Admin", email="admin@aula.com", password=hashear_password("1234"), rol="admin")
     db.session.add(admin)
     db.session.commit()
     print("Admin creado: admin@aula.com / 1234")
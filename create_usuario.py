@@ -1,9 +1,10 @@
-from app import db, create_app, mail
+from app import db, create_app
+from app.correo import encolar_correo, procesar_cola
 from app.models import User
-from flask_mail import Message
+from app.seguridad import hashear_password
 
-app = create_app()
-mail.init_app(app)
+# Script de un solo uso: el hash se calcula acá mismo, sin pool de procesos
+app = create_app({"PASSWORD_HASH_EN_POOL": False})
 
 with app.app_context():
     nombre = input("Nombre completo: ")
@@ -11,14 +12,9 @@ with app.app_context():
     rol = input("Rol (profesor/alumno): ").lower()
     password = "1234"  # Puede generarse aleatorio
 
-    usuario = User(nombre=nombre, email=email, password=password, rol=rol)
+    usuario = User(nombre=nombre, email=email, password=hashear_password(password), rol=rol)
     db.session.add(usuario)
-    db.session.commit()
-
-    msg = Message("Tus credenciales de Aula Virtual",
-                  sender=app.config["MAIL_USERNAME"],
-                  recipients=[email])
-    msg.body = f"""
+    encolar_correo(email, "Tus credenciales de Aula Virtual", f"""
 Hola {nombre},
 
 Has sido habilitado como {rol.upper()} en el Aula Virtual.
@@ -30,6 +26,13 @@ Inicia sesión en http://127.0.0.1:5000/login
 
 Saludos,
 El Administrador
-    """
-    mail.send(msg)
-    print(f"{rol.capitalize()} creado y mail enviado a {email}")
+    """)
+    db.session.commit()
+
+    # El script termina enseguida, así que vaciamos la cola acá mismo;
+    # si falla queda pendiente para el worker (flask enviar-correos)
+    enviados, _ = procesar_cola()
+    if enviados:
+        print(f"{rol.capitalize()} creado y mail enviado a {email}")
+    else:
+        print(f"{rol.capitalize()} creado; el mail a {email} quedó en la cola de salida")
@@ -0,0 +1,42 @@
+# gunicorn.conf.py
+# gunicorn -c gunicorn.conf.py wsgi:app
+# La app se arma una vez en el proceso padre (preload_app) y los workers se
+# crean con fork(): arrancan en milisegundos y comparten en memoria (copy-on-write)
+# el código, las plantillas compiladas y los mappers.
+# Con más de un worker, los buffers, límites y cachés en memoria serían uno por
+# proceso: el arranque falla salvo con BORRADORES_BACKEND, LIMITES_BACKEND y
+# CACHE_BACKEND en redis (ver app/config.py).
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND") or "0.0.0.0:8000"
+workers = int(os.environ.get("GUNICORN_WORKERS") or multiprocessing.cpu_count() * 2 + 1)
+# Hilos por worker: los requests esperan sobre todo a la base y al hash de contraseñas
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS") or 4)
+preload_app = True
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
+
+
+def on_starting(server):
+    from wsgi import app
+    from app.arranque import verificar_backends
+
+    verificar_backends(app, server.cfg.workers)
+
+
+def post_fork(server, worker):
+    # Con preload_app el módulo ya está importado en el padre: esto no vuelve a armar la app
+    from wsgi import app
+    from app.arranque import despues_de_fork
+
+    despues_de_fork(app)
+
+
+def worker_exit(server, worker):
+    from app.seguridad import cerrar_pool
+
+    cerrar_pool()
@@ -0,0 +1,53 @@
+"""Agregar tabla de busqueda FTS5
+
+Revision ID: f3c7a9e1b054
+Revises: b2e8d4f6a173
+Create Date: 2026-10-18 16:02:13.904552
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c7a9e1b054'
+down_revision = 'b2e8d4f6a173'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Solo SQLite: en otros motores la búsqueda queda deshabilitada
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS busqueda USING fts5("
+        "titulo, contenido, curso_id UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    # rowid = id * 8 + tipo (1 curso, 2 examen, 3 pregunta, 4 archivo).
+    # El texto de los archivos se agrega con `flask reindexar-busqueda`.
+    op.execute(
+        "INSERT INTO busqueda (rowid, titulo, contenido, curso_id) "
+        "SELECT id * 8 + 1, nombre, coalesce(descripcion, ''), id FROM curso"
+    )
+    op.execute(
+        "INSERT INTO busqueda (rowid, titulo, contenido, curso_id) "
+        "SELECT id * 8 + 2, titulo, '', curso_id FROM examen"
+    )
+    op.execute(
+        "INSERT INTO busqueda (rowid, titulo, contenido, curso_id) "
+        "SELECT pregunta.id * 8 + 3, examen.titulo, pregunta.texto, examen.curso_id "
+        "FROM pregunta JOIN examen ON examen.id = pregunta.examen_id"
+    )
+    op.execute(
+        "INSERT INTO busqueda (rowid, titulo, contenido, curso_id) "
+        "SELECT id * 8 + 4, nombre, '', curso_id FROM archivo"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TABLE IF EXISTS busqueda")
@@ -3,4 +3,5 @@ from app import create_app
 app = create_app()
 
 if __name__ == "__main__":
+    # Servidor de desarrollo; en producción ver wsgi.py y gunicorn.conf.py
     app.run(debug=True)
@@ -0,0 +1,102 @@
+# conftest.py
+# App sobre una base SQLite descartable por test, una escuela mínima cargada y
+# clientes con sesión iniciada.
+from collections import namedtuple
+
+import pytest
+
+from app import create_app, db
+from app.models import Curso, Examen, Opcion, Pregunta, User
+
+PASSWORD = "1234"
+
+# Ids de la escuela de prueba. El curso es del profesor y tiene inscripto solo
+# a `alumno`. El examen tiene una pregunta de opción múltiple (4 opciones, la
+# 1ra y la 3ra correctas) y una abierta.
+Escuela = namedtuple(
+    "Escuela", "admin profesor otro_profesor alumno otro_alumno curso examen multiple abierta opciones"
+)
+
+
+@pytest.fixture
+def crear_app(tmp_path):
+    """Fábrica de apps: cada llamada arma una app nueva con su propia base."""
+    creadas = 0
+
+    def crear(**config):
+        nonlocal creadas
+        creadas += 1
+        directorio = tmp_path / f"app{creadas}"
+        directorio.mkdir()
+        opciones = {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{directorio / 'test.db'}",
+            "ARCHIVOS_RAIZ": str(directorio),
+            "TESTING": True,
+            "MAIL_SUPPRESS_SEND": True,
+            "MAIL_OUTBOX_WORKER": "proceso",
+            # Los tests vuelcan los borradores a mano (borradores.volcar_borradores)
+            "BORRADORES_WORKER": "proceso",
+            "LIMITES_HABILITADOS": False,
+            "PASSWORD_HASH_EN_POOL": False,
+            # Hash barato: los tests no miden scrypt
+            "PASSWORD_HASH_METODO": "pbkdf2:sha256:1000",
+        }
+        opciones.update(config)
+        app = create_app(opciones)
+        with app.app_context():
+            db.create_all()
+        return app
+
+    return crear
+
+
+@pytest.fixture
+def app(crear_app):
+    return crear_app()
+
+
+@pytest.fixture
+def escuela(app):
+    with app.app_context():
+        return sembrar_escuela()
+
+
+def crear_usuario(nombre, rol):
+    usuario = User(nombre=nombre, email=f"{nombre}@test.local", password=PASSWORD, rol=rol)
+    db.session.add(usuario)
+    db.session.flush()
+    return usuario.id
+
+
+def sembrar_escuela():
+    admin = crear_usuario("admin", "admin")
+    profesor = crear_usuario("profesor", "profesor")
+    otro_profesor = crear_usuario("otro_profesor", "profesor")
+    alumno = crear_usuario("alumno", "alumno")
+    otro_alumno = crear_usuario("otro_alumno", "alumno")
+
+    curso = Curso(nombre="Curso", descripcion="", profesor_id=profesor)
+    curso.alumnos.append(db.session.get(User, alumno))
+    db.session.add(curso)
+    db.session.flush()
+    examen = Examen(titulo="Examen", curso_id=curso.id)
+    db.session.add(examen)
+    db.session.flush()
+    multiple = Pregunta(texto="¿Cuáles?", tipo="multiple", examen_id=examen.id)
+    abierta = Pregunta(texto="¿Por qué?", tipo="abierta", examen_id=examen.id)
+    db.session.add_all([multiple, abierta])
+    db.session.flush()
+    opciones = [Opcion(texto=f"Opción {i}", es_correcta=i in (0, 2), pregunta_id=multiple.id) for i in range(4)]
+    db.session.add_all(opciones)
+    db.session.commit()
+    return Escuela(
+        admin, profesor, otro_profesor, alumno, otro_alumno, curso.id, examen.id,
+        multiple.id, abierta.id, tuple(opcion.id for opcion in opciones),
+    )
+
+
+def iniciar_sesion(app, email, password=PASSWORD):
+    cliente = app.test_client()
+    respuesta = cliente.post("/login", data={"email": email, "password": password})
+    assert respuesta.status_code == 302, respuesta.status_code
+    return cliente
@@ -0,0 +1,89 @@
+# test_almacenamiento.py
+# Archivos guardados por contenido: una sola copia por SHA-256 y un contador de
+# referencias que decide cuándo se borra el archivo físico.
+import io
+import os
+
+from sqlalchemy import text
+from werkzeug.datastructures import FileStorage
+
+from app import db
+from app.almacenamiento import guardar_subida, ruta_archivo
+from app.models import Archivo, BlobArchivo
+
+from conftest import iniciar_sesion
+
+
+def subir(cliente, curso_id, datos, nombre="apunte.txt"):
+    respuesta = cliente.post(f"/curso/{curso_id}/contenido", data={"archivo": (io.BytesIO(datos), nombre)})
+    assert respuesta.status_code == 302
+
+
+def archivos_en_disco(app):
+    raiz = os.path.join(app.config["ARCHIVOS_RAIZ"], "uploads")
+    return sorted(
+        os.path.relpath(os.path.join(carpeta, nombre), raiz)
+        for carpeta, _, nombres in os.walk(raiz) for nombre in nombres
+    )
+
+
+def test_mismo_contenido_se_guarda_una_vez(app, escuela):
+    cliente = iniciar_sesion(app, "profesor@test.local")
+    subir(cliente, escuela.curso, b"contenido repetido", "uno.txt")
+    subir(cliente, escuela.curso, b"contenido repetido", "dos.txt")
+
+    with app.app_context():
+        blob = BlobArchivo.query.one()
+        assert blob.referencias == 2
+        assert {archivo.sha256 for archivo in Archivo.query} == {blob.sha256}
+    assert len(archivos_en_disco(app)) == 1
+
+
+def test_el_archivo_se_borra_con_la_ultima_referencia(app, escuela):
+    cliente = iniciar_sesion(app, "profesor@test.local")
+    subir(cliente, escuela.curso, b"apunte compartido")
+    subir(cliente, escuela.curso, b"apunte compartido")
+    with app.app_context():
+        primero, segundo = [archivo.id for archivo in Archivo.query.order_by(Archivo.id)]
+        ruta = ruta_archivo(BlobArchivo.query.one().ruta)
+
+    cliente.post(f"/archivo/{primero}/eliminar")
+    with app.app_context():
+        assert BlobArchivo.query.one().referencias == 1
+    assert os.path.exists(ruta)
+
+    cliente.post(f"/archivo/{segundo}/eliminar")
+    with app.app_context():
+        assert BlobArchivo.query.count() == 0
+    assert not os.path.exists(ruta)
+
+
+def test_blob_borrado_entre_la_lectura_y_el_update(app, escuela):
+    with app.test_request_context():
+        blob = guardar_subida(FileStorage(io.BytesIO(b"se borra"), "nota.txt"))
+        db.session.commit()
+        ruta = ruta_archivo(blob.ruta)
+        # Otro request libera la última referencia: la fila y el archivo desaparecen,
+        # pero el blob sigue en el identity map de esta sesión
+        db.session.get(BlobArchivo, blob.sha256)
+        db.session.execute(text("DELETE FROM blob_archivo"))
+        os.remove(ruta)
+
+        nuevo = guardar_subida(FileStorage(io.BytesIO(b"se borra"), "nota.txt"))
+        db.session.commit()
+
+        assert db.session.get(BlobArchivo, nuevo.sha256).referencias == 1
+        with open(ruta, "rb") as entrada:
+            assert entrada.read() == b"se borra"
+
+
+def test_subida_sin_commit_no_deja_archivos(app, escuela):
+    with app.test_request_context():
+        guardar_subida(FileStorage(io.BytesIO(b"nunca se confirma"), "borrador.txt"))
+        assert len(archivos_en_disco(app)) == 1
+        db.session.rollback()
+    assert archivos_en_disco(app) == []
+
+    with app.test_request_context():
+        guardar_subida(FileStorage(io.BytesIO(b"la vista falla antes del commit"), "otro.txt"))
+    assert archivos_en_disco(app) == []
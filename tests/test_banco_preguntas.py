@@ -0,0 +1,116 @@
+# test_banco_preguntas.py
+# Importación de bancos de preguntas (JSON, CSV y GIFT): todo o nada.
+import io
+import json
+
+import pytest
+
+from app import banco_preguntas, db
+from app.banco_preguntas import BancoInvalido, importar_banco, leer_banco, leer_json
+from app.models import Opcion, Pregunta
+
+from conftest import iniciar_sesion
+
+JSON = json.dumps([
+    {"texto": "¿2 + 2?", "opciones": [
+        {"texto": "4", "correcta": True},
+        {"texto": "5", "correcta": "false"},
+        {"texto": "22", "correcta": 0},
+    ]},
+    {"texto": "Explica la suma", "tipo": "abierta"},
+])
+CSV = (
+    "pregunta,tipo,opciones,correctas\n"
+    "¿Capital de Francia?,multiple,Roma|París|Madrid,2\n"
+    "Describe París,abierta,,\n"
+)
+GIFT = (
+    "// Comentario\n"
+    "::V/F:: El Sol es una estrella {T}\n"
+    "\n"
+    "¿Color del cielo? {=Azul ~Verde ~%50%Celeste}\n"
+    "\n"
+    "Opina sobre el cielo {}\n"
+)
+
+
+def importar(app, escuela, contenido, nombre):
+    cliente = iniciar_sesion(app, "profesor@test.local")
+    return cliente.post(
+        f"/examen/{escuela.examen}/importar",
+        data={"banco": (io.BytesIO(contenido.encode("utf-8")), nombre)},
+    )
+
+
+def importadas(app, escuela):
+    """[(texto, tipo, ((opción, correcta), ...)), ...] de lo agregado al examen."""
+    with app.app_context():
+        preguntas = (
+            Pregunta.query.filter(Pregunta.examen_id == escuela.examen, Pregunta.id > escuela.abierta)
+            .order_by(Pregunta.id).all()
+        )
+        return [
+            (p.texto, p.tipo, tuple((o.texto, o.es_correcta) for o in sorted(p.opciones, key=lambda o: o.id)))
+            for p in preguntas
+        ]
+
+
+@pytest.mark.parametrize("contenido, nombre, esperadas", [
+    (JSON, "banco.json", [
+        ("¿2 + 2?", "multiple", (("4", True), ("5", False), ("22", False))),
+        ("Explica la suma", "abierta", ()),
+    ]),
+    (CSV, "banco.csv", [
+        ("¿Capital de Francia?", "multiple", (("Roma", False), ("París", True), ("Madrid", False))),
+        ("Describe París", "abierta", ()),
+    ]),
+    (GIFT, "banco.gift", [
+        ("El Sol es una estrella", "multiple", (("Verdadero", True), ("Falso", False))),
+        ("¿Color del cielo?", "multiple", (("Azul", True), ("Verde", False), ("Celeste", True))),
+        ("Opina sobre el cielo", "abierta", ()),
+    ]),
+])
+def test_importa_cada_formato(app, escuela, contenido, nombre, esperadas):
+    respuesta = importar(app, escuela, contenido, nombre)
+
+    assert respuesta.status_code == 302
+    assert importadas(app, escuela) == esperadas
+
+
+@pytest.mark.parametrize("opciones", ["abc", {"texto": "4", "correcta": True}, [["4"]], [{"texto": 4}]])
+def test_json_con_opciones_mal_formadas(opciones):
+    with pytest.raises(BancoInvalido) as error:
+        leer_json(json.dumps([{"texto": "¿2 + 2?", "opciones": opciones}]))
+    assert len(error.value.errores) == 1
+    assert error.value.errores[0].startswith("Pregunta 1")
+
+
+@pytest.mark.parametrize("correcta", ["quizás", 2, [True]])
+def test_json_con_correcta_invalida(correcta):
+    with pytest.raises(BancoInvalido):
+        leer_json(json.dumps([{"texto": "¿2 + 2?", "opciones": [
+            {"texto": "4", "correcta": correcta}, {"texto": "5"},
+        ]}]))
+
+
+def test_una_fila_mala_no_importa_nada(app, escuela):
+    csv = CSV + "¿Otra?,multiple,Sí|No,5\n"
+
+    respuesta = importar(app, escuela, csv, "banco.csv")
+
+    assert respuesta.status_code == 400
+    assert "Línea 4: correcta &#39;5&#39; no es una opción".encode() in respuesta.data
+    assert importadas(app, escuela) == []
+
+
+def test_error_al_escribir_revierte_todo(app, escuela, monkeypatch):
+    def fallar(pregunta_ids):
+        raise RuntimeError("sin índice")
+
+    monkeypatch.setattr(banco_preguntas, "indexar_preguntas", fallar)
+    with app.app_context():
+        preguntas = leer_banco(JSON, "json")
+        with pytest.raises(RuntimeError):
+            importar_banco(escuela.examen, preguntas)
+        assert db.session.query(Pregunta).count() == 2
+        assert db.session.query(Opcion).count() == 4
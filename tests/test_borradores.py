@@ -0,0 +1,104 @@
+# test_borradores.py
+# Autoguardado de exámenes: los PUT se acumulan en el buffer, el volcado los
+# escribe en la base y la entrega arma la versión final con todo.
+import pytest
+
+from app import db
+from app.borradores import guardar_borrador, obtener_buffer, volcar_borradores
+from app.examenes import obtener_vista_examen
+from app.models import EntregaExamen, RespuestaAlumno
+from app.selecciones import decodificar
+
+from conftest import iniciar_sesion
+
+
+@pytest.fixture
+def alumno(app, escuela):
+    return iniciar_sesion(app, "alumno@test.local")
+
+
+def url_borrador(escuela):
+    return f"/api/curso/{escuela.curso}/examen/{escuela.examen}/borrador"
+
+
+def borrador(cliente, escuela):
+    respuesta = cliente.get(url_borrador(escuela))
+    assert respuesta.status_code == 200
+    return respuesta.get_json()["respuestas"]
+
+
+def volcar(app):
+    with app.app_context():
+        return volcar_borradores()
+
+
+def test_put_repetidos_se_combinan(app, escuela, alumno):
+    multiple, abierta = str(escuela.multiple), str(escuela.abierta)
+    uno, dos, tres = escuela.opciones[:3]
+    alumno.put(url_borrador(escuela), json={"respuestas": {multiple: [uno]}})
+    alumno.put(url_borrador(escuela), json={"respuestas": {abierta: "Borrador"}})
+    alumno.put(url_borrador(escuela), json={"respuestas": {multiple: [dos, tres]}})
+    assert borrador(alumno, escuela) == {multiple: [dos, tres], abierta: "Borrador"}
+
+    assert volcar(app) == 1
+    with app.app_context():
+        assert RespuestaAlumno.query.count() == 2
+        assert obtener_buffer().ver(escuela.alumno, escuela.examen) == {}
+
+    # Lo volcado y lo nuevo del buffer se ven juntos
+    alumno.put(url_borrador(escuela), json={"respuestas": {abierta: "Corregido"}})
+    assert borrador(alumno, escuela) == {multiple: [dos, tres], abierta: "Corregido"}
+
+
+@pytest.mark.parametrize("pregunta, valor", [
+    ("multiple", "abc"),
+    ("multiple", 3),
+    ("multiple", ["1"]),
+    ("multiple", [999]),
+    ("abierta", 5),
+    ("abierta", ["texto"]),
+])
+def test_put_con_valor_de_otro_tipo_responde_400(app, escuela, alumno, pregunta, valor):
+    multiple = str(escuela.multiple)
+    alumno.put(url_borrador(escuela), json={"respuestas": {multiple: [escuela.opciones[0]]}})
+
+    respuesta = alumno.put(url_borrador(escuela), json={"respuestas": {str(getattr(escuela, pregunta)): valor}})
+
+    assert respuesta.status_code == 400
+    assert borrador(alumno, escuela) == {multiple: [escuela.opciones[0]]}
+
+
+def test_entrega_usa_borrador_volcado_pendiente_y_cambios(app, escuela, alumno):
+    multiple, abierta = str(escuela.multiple), str(escuela.abierta)
+    alumno.put(url_borrador(escuela), json={"respuestas": {multiple: [escuela.opciones[1]], abierta: "Volcado"}})
+    volcar(app)
+    alumno.put(url_borrador(escuela), json={"respuestas": {multiple: [escuela.opciones[2]]}})
+
+    respuesta = alumno.post(
+        f"/curso/{escuela.curso}/examen/{escuela.examen}/resolver",
+        json={"respuestas": {abierta: "Final"}},
+    )
+
+    assert respuesta.get_json()["entregado"] is True
+    with app.app_context():
+        assert EntregaExamen.query.count() == 1
+        filas = {fila.pregunta_id: fila for fila in RespuestaAlumno.query}
+        assert decodificar(filas[escuela.multiple].respuesta_opciones, escuela.opciones) == [escuela.opciones[2]]
+        assert filas[escuela.abierta].respuesta_texto == "Final"
+        assert obtener_buffer().ver(escuela.alumno, escuela.examen) == {}
+    assert alumno.get(url_borrador(escuela)).status_code == 409
+
+
+def test_volcado_no_pisa_un_examen_entregado(app, escuela, alumno):
+    alumno.post(
+        f"/curso/{escuela.curso}/examen/{escuela.examen}/resolver",
+        json={"respuestas": {str(escuela.abierta): "Entregada"}},
+    )
+    with app.test_request_context():
+        # Un borrador que llegó tarde (por ejemplo, desde otra pestaña)
+        examen = obtener_vista_examen(escuela.examen)
+        guardar_borrador(examen, escuela.alumno, {str(escuela.abierta): "Tarde"})
+        assert volcar_borradores() == 1
+        assert obtener_buffer().ver(escuela.alumno, escuela.examen) == {}
+        texto = db.session.query(RespuestaAlumno.respuesta_texto).filter_by(pregunta_id=escuela.abierta).scalar()
+        assert texto == "Entregada"
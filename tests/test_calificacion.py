@@ -0,0 +1,76 @@
+# test_calificacion.py
+# Corrección de opción múltiple en modo exacto y parcial. En la escuela de
+# prueba son correctas la 1ra y la 3ra opción.
+import pytest
+
+from app import db
+from app.calificacion import EXACTA, PARCIAL, armar_clave, corregir_examen
+from app.examenes import fila_respuesta, obtener_vista_examen, registrar_entrega
+from app.models import EntregaExamen, Examen, Opcion, Pregunta
+
+from conftest import crear_usuario
+
+# Ordinales elegidos -> (puntaje exacto, puntaje parcial)
+CASOS = {
+    (0, 2): (1.0, 1.0),
+    (0,): (0.0, 0.5),
+    (0, 1): (0.0, 0.0),
+    (0, 1, 2): (0.0, 0.5),
+    (1, 3): (0.0, 0.0),
+    (): (0.0, 0.0),
+}
+
+
+def entregar(examen_id, alumno_id, pregunta_id, elegidos):
+    examen = obtener_vista_examen(examen_id)
+    pregunta = next(pregunta for pregunta in examen.preguntas if pregunta.id == pregunta_id)
+    assert registrar_entrega(examen, alumno_id, [fila_respuesta(pregunta, list(elegidos))])
+
+
+@pytest.fixture
+def entregas(app, escuela):
+    """{ordinales elegidos: alumno_id}, un alumno por caso."""
+    with app.app_context():
+        alumnos = {}
+        for i, ordinales in enumerate(CASOS):
+            alumnos[ordinales] = crear_usuario(f"caso{i}", "alumno")
+            db.session.commit()
+            entregar(escuela.examen, alumnos[ordinales], escuela.multiple,
+                     [escuela.opciones[ordinal] for ordinal in ordinales])
+        return alumnos
+
+
+@pytest.mark.parametrize("modo, columna", [(EXACTA, 0), (PARCIAL, 1)])
+def test_puntajes_por_modo(app, escuela, entregas, modo, columna):
+    with app.app_context():
+        puntajes = corregir_examen(escuela.examen, modo=modo)
+        guardados = dict(db.session.query(EntregaExamen.alumno_id, EntregaExamen.puntaje))
+
+    esperados = {entregas[ordinales]: valores[columna] for ordinales, valores in CASOS.items()}
+    assert puntajes == esperados
+    assert guardados == esperados
+
+
+def test_modo_desconocido(app, escuela):
+    with app.app_context(), pytest.raises(ValueError):
+        corregir_examen(escuela.examen, modo="total")
+
+
+def test_clave_ignora_opciones_fuera_de_la_mascara(app, escuela):
+    with app.app_context():
+        examen = Examen(titulo="Muchas opciones", curso_id=escuela.curso)
+        db.session.add(examen)
+        db.session.flush()
+        pregunta = Pregunta(texto="¿Cuál?", tipo="multiple", examen_id=examen.id)
+        db.session.add(pregunta)
+        db.session.flush()
+        opciones = [
+            Opcion(texto=f"Opción {i}", es_correcta=i in (0, 65), pregunta_id=pregunta.id) for i in range(70)
+        ]
+        db.session.add_all(opciones)
+        db.session.commit()
+
+        # La 66ª opción no entra en la máscara: ni en la clave ni en la respuesta
+        assert armar_clave(examen.id).correctas == {pregunta.id: 1}
+        entregar(examen.id, escuela.alumno, pregunta.id, [opciones[0].id, opciones[65].id])
+        assert corregir_examen(examen.id) == {escuela.alumno: 1.0}
@@ -0,0 +1,49 @@
+# test_concurrencia_entregas.py
+# Muchos alumnos enviando el mismo examen a la vez desde varios hilos (cada uno
+# dos veces, en paralelo): sin "database is locked" y una entrega por alumno.
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func, select
+
+from app import db
+from app.models import Curso, EntregaExamen, RespuestaAlumno, User
+
+from conftest import crear_usuario, iniciar_sesion, sembrar_escuela
+
+ALUMNOS = 40
+HILOS = 16
+
+
+def test_envios_simultaneos_dejan_una_entrega_por_alumno(crear_app):
+    app = crear_app(SQLITE_BUSY_TIMEOUT_MS=15000)
+    with app.app_context():
+        escuela = sembrar_escuela()
+        curso = db.session.get(Curso, escuela.curso)
+        for i in range(ALUMNOS):
+            curso.alumnos.append(db.session.get(User, crear_usuario(f"alumno{i}", "alumno")))
+        db.session.commit()
+
+    url = f"/curso/{escuela.curso}/examen/{escuela.examen}/resolver"
+    respuestas = {
+        f"pregunta_{escuela.multiple}": [str(escuela.opciones[0]), str(escuela.opciones[2])],
+        f"pregunta_{escuela.abierta}": "Porque sí",
+    }
+
+    def enviar(indice):
+        cliente = iniciar_sesion(app, f"alumno{indice}@test.local")
+        return cliente.post(url, data=respuestas).status_code
+
+    envios = [i for i in range(ALUMNOS) for _ in range(2)]
+    random.Random(0).shuffle(envios)
+    with ThreadPoolExecutor(max_workers=HILOS) as pool:
+        codigos = list(pool.map(enviar, envios))  # una excepción en un hilo se relanza acá
+
+    assert set(codigos) == {302}
+    with app.app_context():
+        por_alumno = db.session.execute(
+            select(EntregaExamen.alumno_id, func.count()).group_by(EntregaExamen.alumno_id)
+        ).all()
+        assert len(por_alumno) == ALUMNOS
+        assert {cantidad for _, cantidad in por_alumno} == {1}
+        assert db.session.execute(select(func.count()).select_from(RespuestaAlumno)).scalar() == ALUMNOS * 2
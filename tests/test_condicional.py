@@ -0,0 +1,63 @@
+# test_condicional.py
+# ETag débil y 304 en las páginas que se leen mucho, y páginas con mensajes flash.
+import io
+
+from conftest import iniciar_sesion
+
+
+def test_revalidacion_sin_cambios_responde_304(app, escuela):
+    cliente = iniciar_sesion(app, "alumno@test.local")
+    url = f"/curso/{escuela.curso}/contenido"
+
+    primera = cliente.get(url)
+    assert primera.status_code == 200
+    assert primera.headers["Cache-Control"] == "private, no-cache"
+    etag = primera.headers["ETag"]
+
+    repetida = cliente.get(url, headers={"If-None-Match": etag})
+    assert repetida.status_code == 304
+    assert repetida.headers["ETag"] == etag
+    assert repetida.data == b""
+
+
+def test_cambio_en_el_curso_cambia_el_etag(app, escuela):
+    profesor = iniciar_sesion(app, "profesor@test.local")
+    alumno = iniciar_sesion(app, "alumno@test.local")
+    url = f"/curso/{escuela.curso}/contenido"
+    etag = alumno.get(url).headers["ETag"]
+
+    profesor.post(url, data={"archivo": (io.BytesIO(b"apunte"), "apunte.txt")})
+
+    respuesta = alumno.get(url, headers={"If-None-Match": etag})
+    assert respuesta.status_code == 200
+    assert b"apunte.txt" in respuesta.data
+    assert respuesta.headers["ETag"] != etag
+
+
+def test_pagina_con_flash_no_lleva_etag(app, escuela):
+    cliente = iniciar_sesion(app, "profesor@test.local")
+    url = f"/curso/{escuela.curso}/contenido"
+
+    subida = cliente.post(url, data={"archivo": (io.BytesIO(b"apunte"), "apunte.txt")}, follow_redirects=True)
+    assert "Archivo subido con éxito".encode() in subida.data
+    assert "ETag" not in subida.headers
+    assert "no-store" in subida.headers["Cache-Control"]
+
+    recarga = cliente.get(url)
+    assert "Archivo subido con éxito".encode() not in recarga.data
+    etag = recarga.headers["ETag"]
+    assert cliente.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_flash_pendiente_se_muestra_aunque_el_etag_coincida(app, escuela):
+    cliente = iniciar_sesion(app, "alumno@test.local")
+    url = f"/curso/{escuela.curso}/contenido"
+    etag = cliente.get(url).headers["ETag"]
+
+    with cliente.session_transaction() as sesion:
+        sesion["_flashes"] = [("info", "Mensaje pendiente")]
+    respuesta = cliente.get(url, headers={"If-None-Match": etag})
+
+    assert respuesta.status_code == 200
+    assert b"Mensaje pendiente" in respuesta.data
+    assert "ETag" not in respuesta.headers
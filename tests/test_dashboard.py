@@ -0,0 +1,56 @@
+# test_dashboard.py
+# El dashboard de cada rol hace la misma cantidad de consultas con 1 curso que
+# con muchos: ninguna relación se carga de a un curso por vez.
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models import Archivo, Curso, Examen, User
+
+from conftest import PASSWORD, iniciar_sesion
+
+
+def sembrar(cantidad_cursos):
+    admin = User(nombre="Admin", email="admin@test.local", password=PASSWORD, rol="admin")
+    profesor = User(nombre="Profesor", email="profesor@test.local", password=PASSWORD, rol="profesor")
+    alumno = User(nombre="Alumno", email="alumno@test.local", password=PASSWORD, rol="alumno")
+    db.session.add_all([admin, profesor, alumno])
+    db.session.flush()
+    for i in range(cantidad_cursos):
+        curso = Curso(nombre=f"Curso {i}", descripcion="", profesor_id=profesor.id)
+        curso.alumnos.append(alumno)
+        db.session.add(curso)
+        db.session.flush()
+        db.session.add(Archivo(nombre=f"apunte{i}.pdf", ruta=f"uploads/apunte{i}.pdf", curso_id=curso.id))
+        db.session.add(Examen(titulo=f"Examen {i}", curso_id=curso.id))
+    db.session.commit()
+
+
+def consultas_del_dashboard(app, email):
+    cliente = iniciar_sesion(app, email)
+    consultas = []
+
+    def contar(conexion, cursor, sentencia, parametros, contexto, multiples):
+        consultas.append(sentencia)
+
+    with app.app_context():
+        motor = db.engine
+    event.listen(motor, "before_cursor_execute", contar)
+    try:
+        respuesta = cliente.get("/dashboard")
+    finally:
+        event.remove(motor, "before_cursor_execute", contar)
+    assert respuesta.status_code == 200
+    return consultas
+
+
+@pytest.mark.parametrize("rol", ["admin", "profesor", "alumno"])
+def test_consultas_del_dashboard_no_crecen_con_los_cursos(crear_app, rol):
+    cantidades = {}
+    for cursos in (1, 12):
+        app = crear_app()
+        with app.app_context():
+            sembrar(cursos)
+        cantidades[cursos] = len(consultas_del_dashboard(app, f"{rol}@test.local"))
+
+    assert cantidades[1] == cantidades[12]
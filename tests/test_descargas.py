@@ -0,0 +1,71 @@
+# test_descargas.py
+# Descarga de archivos de un curso: control de acceso y caché privada con ETag
+# (el SHA-256 del contenido), 304 y pedidos parciales.
+import hashlib
+import io
+
+import pytest
+
+from app.models import Archivo
+
+from conftest import iniciar_sesion
+
+CONTENIDO = b"0123456789" * 100
+
+
+@pytest.fixture
+def archivo(app, escuela):
+    profesor = iniciar_sesion(app, "profesor@test.local")
+    profesor.post(f"/curso/{escuela.curso}/contenido", data={"archivo": (io.BytesIO(CONTENIDO), "apunte.txt")})
+    with app.app_context():
+        return Archivo.query.one().id
+
+
+@pytest.mark.parametrize("usuario, codigo", [
+    ("alumno", 200),
+    ("profesor", 200),
+    ("admin", 200),
+    ("otro_alumno", 403),
+    ("otro_profesor", 403),
+])
+def test_acceso(app, archivo, usuario, codigo):
+    cliente = iniciar_sesion(app, f"{usuario}@test.local")
+    respuesta = cliente.get(f"/archivo/{archivo}/descargar")
+    assert respuesta.status_code == codigo
+    if codigo == 200:
+        assert respuesta.data == CONTENIDO
+
+
+def test_sin_sesion_redirige_al_login(app, archivo):
+    respuesta = app.test_client().get(f"/archivo/{archivo}/descargar")
+    assert respuesta.status_code == 302
+    assert "/login" in respuesta.headers["Location"]
+
+
+def test_cache_privada_y_304(app, archivo):
+    cliente = iniciar_sesion(app, "alumno@test.local")
+    respuesta = cliente.get(f"/archivo/{archivo}/descargar")
+    etag = respuesta.headers["ETag"]
+    assert etag == f'"{hashlib.sha256(CONTENIDO).hexdigest()}"'
+    assert respuesta.cache_control.private
+    assert not respuesta.cache_control.public
+
+    repetida = cliente.get(f"/archivo/{archivo}/descargar", headers={"If-None-Match": etag})
+    assert repetida.status_code == 304
+    assert repetida.headers["ETag"] == etag
+    assert repetida.cache_control.private
+
+
+def test_304_no_saltea_el_control_de_acceso(app, archivo):
+    cliente = iniciar_sesion(app, "otro_alumno@test.local")
+    etag = f'"{hashlib.sha256(CONTENIDO).hexdigest()}"'
+    assert cliente.get(f"/archivo/{archivo}/descargar", headers={"If-None-Match": etag}).status_code == 403
+
+
+def test_range_responde_206(app, archivo):
+    cliente = iniciar_sesion(app, "alumno@test.local")
+    respuesta = cliente.get(f"/archivo/{archivo}/descargar", headers={"Range": "bytes=10-19"})
+    assert respuesta.status_code == 206
+    assert respuesta.data == CONTENIDO[10:20]
+    assert respuesta.headers["Content-Range"] == f"bytes 10-19/{len(CONTENIDO)}"
+    assert respuesta.cache_control.private
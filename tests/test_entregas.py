@@ -0,0 +1,75 @@
+# test_entregas.py
+# Entrega de exámenes idempotente: un segundo envío no crea otra EntregaExamen
+# ni pisa las respuestas de la primera.
+from app import db
+from app.examenes import obtener_vista_examen, registrar_entrega
+from app.models import EntregaExamen, RespuestaAlumno
+from app.selecciones import decodificar
+
+from conftest import iniciar_sesion
+
+
+def url_resolver(escuela):
+    return f"/curso/{escuela.curso}/examen/{escuela.examen}/resolver"
+
+
+def respuestas_guardadas(app, escuela):
+    with app.app_context():
+        filas = {fila.pregunta_id: fila for fila in RespuestaAlumno.query.filter_by(alumno_id=escuela.alumno)}
+        return (
+            decodificar(filas[escuela.multiple].respuesta_opciones, escuela.opciones),
+            filas[escuela.abierta].respuesta_texto,
+        )
+
+
+def entregas(app, escuela):
+    with app.app_context():
+        return EntregaExamen.query.filter_by(examen_id=escuela.examen, alumno_id=escuela.alumno).count()
+
+
+def test_reenvio_del_formulario_no_pisa_la_entrega(app, escuela):
+    cliente = iniciar_sesion(app, "alumno@test.local")
+    primera = cliente.post(url_resolver(escuela), data={
+        f"pregunta_{escuela.multiple}": [str(escuela.opciones[0])],
+        f"pregunta_{escuela.abierta}": "Primera",
+    })
+    segunda = cliente.post(url_resolver(escuela), data={
+        f"pregunta_{escuela.multiple}": [str(escuela.opciones[1])],
+        f"pregunta_{escuela.abierta}": "Segunda",
+    }, follow_redirects=True)
+
+    assert primera.status_code == 302
+    assert "Ya habías enviado este examen.".encode() in segunda.data
+    assert entregas(app, escuela) == 1
+    assert respuestas_guardadas(app, escuela) == ([escuela.opciones[0]], "Primera")
+
+
+def test_reenvio_json_responde_entregado_false(app, escuela):
+    cliente = iniciar_sesion(app, "alumno@test.local")
+    primera = cliente.post(url_resolver(escuela), json={"respuestas": {
+        str(escuela.multiple): [escuela.opciones[0], escuela.opciones[2]],
+        str(escuela.abierta): "Primera",
+    }})
+    segunda = cliente.post(url_resolver(escuela), json={"respuestas": {
+        str(escuela.multiple): [escuela.opciones[3]],
+        str(escuela.abierta): "Segunda",
+    }})
+
+    assert primera.get_json()["entregado"] is True
+    assert segunda.status_code == 200
+    assert segunda.get_json()["entregado"] is False
+    assert entregas(app, escuela) == 1
+    assert respuestas_guardadas(app, escuela) == ([escuela.opciones[0], escuela.opciones[2]], "Primera")
+
+
+def test_registrar_entrega_dos_veces(app, escuela):
+    # Sin el chequeo previo de la vista: la restricción única decide
+    with app.app_context():
+        examen = obtener_vista_examen(escuela.examen)
+        primera = [{"pregunta_id": escuela.abierta, "respuesta_texto": "Primera", "respuesta_opciones": None}]
+        segunda = [{"pregunta_id": escuela.abierta, "respuesta_texto": "Segunda", "respuesta_opciones": None}]
+
+        assert registrar_entrega(examen, escuela.alumno, primera) is True
+        assert registrar_entrega(examen, escuela.alumno, segunda) is False
+        assert db.session.query(RespuestaAlumno.respuesta_texto).scalar() == "Primera"
+    assert entregas(app, escuela) == 1
@@ -0,0 +1,88 @@
+# test_inscripciones.py
+# Altas y bajas por diferencia de conjuntos e importación de cohortes por CSV.
+import io
+
+import pytest
+
+from app import db
+from app.inscripciones import CohorteInvalida, ids_inscriptos, importar_cohorte_csv, sincronizar_alumnos
+
+from conftest import crear_usuario, iniciar_sesion
+
+
+@pytest.fixture
+def alumnos(app, escuela):
+    """Ids de 6 alumnos más (ninguno inscripto)."""
+    with app.app_context():
+        ids = [crear_usuario(f"nuevo{i}", "alumno") for i in range(6)]
+        db.session.commit()
+        return ids
+
+
+def inscriptos(app, escuela):
+    with app.app_context():
+        return ids_inscriptos(escuela.curso)
+
+
+def test_sincronizar_agrega_y_quita_por_diferencia(app, escuela, alumnos):
+    with app.app_context():
+        assert sincronizar_alumnos(escuela.curso, alumnos[:3]) == (3, 1)
+        assert sincronizar_alumnos(escuela.curso, alumnos[:3]) == (0, 0)
+        # Ids inexistentes o de otros roles se ignoran
+        assert sincronizar_alumnos(escuela.curso, alumnos[1:4] + [escuela.profesor, 999]) == (1, 1)
+    assert inscriptos(app, escuela) == set(alumnos[1:4])
+
+
+def test_alcance_solo_toca_la_pagina(app, escuela, alumnos):
+    with app.app_context():
+        sincronizar_alumnos(escuela.curso, alumnos)
+        # Página con los 3 primeros: se destilda el 2do; los demás no se ven y no se tocan
+        agregados, quitados = sincronizar_alumnos(
+            escuela.curso, [alumnos[0], alumnos[2], escuela.alumno], alcance=alumnos[:3],
+        )
+    assert (agregados, quitados) == (0, 1)
+    assert inscriptos(app, escuela) == set(alumnos) - {alumnos[1]}
+
+
+def test_formulario_paginado_de_asignacion(app, escuela, alumnos):
+    cliente = iniciar_sesion(app, "admin@test.local")
+    respuesta = cliente.post(f"/curso/{escuela.curso}/asignar_alumnos", data={
+        "alumnos_en_pagina": [escuela.alumno, alumnos[0]],
+        "alumnos_seleccionados": [alumnos[0]],
+    })
+    assert respuesta.status_code == 302
+    assert inscriptos(app, escuela) == {alumnos[0]}
+
+
+def test_importar_por_id_y_email(app, escuela, alumnos):
+    csv = (
+        "id,email\n"
+        f"{alumnos[0]},\n"
+        ",NUEVO1@test.local\n"
+        ",nadie@test.local\n"
+        f"{escuela.alumno},\n"
+    )
+    with app.app_context():
+        assert importar_cohorte_csv(escuela.curso, io.StringIO(csv)) == (2, ["nadie@test.local"])
+    assert inscriptos(app, escuela) == {escuela.alumno, alumnos[0], alumnos[1]}
+
+
+def test_importar_con_filas_invalidas_no_inscribe_a_nadie(app, escuela, alumnos):
+    csv = (
+        "id,email\n"
+        f"{alumnos[0]},\n"
+        "abc,\n"
+        ",\n"
+        f"{escuela.profesor},\n"
+        "999,\n"
+    )
+    with app.app_context(), pytest.raises(CohorteInvalida) as error:
+        importar_cohorte_csv(escuela.curso, io.StringIO(csv))
+
+    assert error.value.errores == [
+        "Línea 3: id 'abc' no es un número",
+        "Línea 4: falta el id o el email",
+        f"Línea 5: el id {escuela.profesor} no es de un alumno",
+        "Línea 6: el id 999 no es de un alumno",
+    ]
+    assert inscriptos(app, escuela) == {escuela.alumno}
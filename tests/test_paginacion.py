@@ -0,0 +1,42 @@
+# test_paginacion.py
+# Paginación por clave: parámetros explícitos o tomados del request.
+from app.models import User
+from app.paginacion import paginar
+
+from conftest import iniciar_sesion
+
+
+def ids(pagina):
+    return [usuario.id for usuario in pagina.items]
+
+
+def test_parametros_explicitos_y_del_request(app, escuela):
+    with app.test_request_context("/?despues=2&limite=2"):
+        consulta = User.query
+        assert ids(paginar(consulta, User.id)) == [3, 4]
+        # Cada parámetro explícito reemplaza solo al suyo
+        assert ids(paginar(consulta, User.id, despues=1)) == [2, 3]
+        assert ids(paginar(consulta, User.id, limite=1)) == [3]
+        assert ids(paginar(consulta, User.id, despues=3, limite=10)) == [4, 5]
+
+
+def test_siguiente_recorre_todas_las_paginas(app, escuela):
+    with app.test_request_context("/"):
+        vistos, despues = [], None
+        while True:
+            pagina = paginar(User.query, User.id, despues=despues, limite=2)
+            vistos.extend(ids(pagina))
+            despues = pagina.siguiente
+            if despues is None:
+                break
+        assert vistos == [1, 2, 3, 4, 5]
+
+
+def test_api_pagina_con_el_cursor(app, escuela):
+    cliente = iniciar_sesion(app, "admin@test.local")
+    primera = cliente.get(f"/api/curso/{escuela.curso}/alumnos?limite=1").get_json()
+    segunda = cliente.get(f"/api/curso/{escuela.curso}/alumnos?limite=1&despues={primera['siguiente']}").get_json()
+
+    assert [(a["id"], a["inscripto"]) for a in primera["items"]] == [(escuela.alumno, True)]
+    assert [(a["id"], a["inscripto"]) for a in segunda["items"]] == [(escuela.otro_alumno, False)]
+    assert segunda["siguiente"] is None
@@ -0,0 +1,89 @@
+# test_selecciones.py
+# Respuestas de opción múltiple como máscara de bits: codificación y consultas
+# con operadores de bits en SQL.
+import random
+
+import pytest
+
+from app import db
+from app.examenes import fila_respuesta, guardar_respuestas, obtener_vista_examen, registrar_entrega
+from app.models import Examen, MascaraOpciones, Opcion, Pregunta
+from app.selecciones import alumnos_que_eligieron, codificar, decodificar, frecuencia_opciones
+
+from conftest import crear_usuario
+
+MAX = MascaraOpciones.MAX_OPCIONES
+
+
+def test_ida_y_vuelta():
+    azar = random.Random(0)
+    ids_opciones = sorted(azar.sample(range(1, 10_000), 40))
+    for _ in range(200):
+        elegidos = sorted(azar.sample(ids_opciones, azar.randint(0, len(ids_opciones))))
+        assert decodificar(codificar(elegidos, ids_opciones), ids_opciones) == elegidos
+
+
+def test_codificar_bits_por_ordinal():
+    assert codificar([], [10, 20, 30]) == 0
+    assert codificar([10, 30], [10, 20, 30]) == 0b101
+    # Ids que no son de la pregunta se ignoran
+    assert codificar([20, 99], [10, 20, 30]) == 0b010
+    assert decodificar(None, [10, 20, 30]) == []
+
+
+def test_opciones_mas_alla_de_la_mascara():
+    ids_opciones = list(range(100, 100 + MAX + 7))
+    todas = codificar(ids_opciones, ids_opciones)
+    assert todas == (1 << MAX) - 1
+    assert todas.bit_length() == 63  # entra en un BIGINT con signo
+    assert decodificar(todas, ids_opciones) == ids_opciones[:MAX]
+    assert codificar(ids_opciones[MAX:], ids_opciones) == 0
+
+
+@pytest.fixture
+def respuestas(app, escuela):
+    """Dos entregas y un borrador sobre la pregunta de opción múltiple, más una
+    pregunta de 63 opciones donde se elige la última (bit 62)."""
+    with app.app_context():
+        examen = db.session.get(Examen, escuela.examen)
+        larga = Pregunta(texto="¿Última?", tipo="multiple", examen_id=examen.id)
+        db.session.add(larga)
+        db.session.flush()
+        largas = [Opcion(texto=f"Opción {i}", pregunta_id=larga.id) for i in range(MAX)]
+        db.session.add_all(largas)
+        examen.version += 1
+        borrador = crear_usuario("borrador", "alumno")
+        db.session.commit()
+
+        vista = obtener_vista_examen(escuela.examen)
+        preguntas = {pregunta.id: pregunta for pregunta in vista.preguntas}
+        uno, dos, tres, cuatro = escuela.opciones
+        registrar_entrega(vista, escuela.alumno, [
+            fila_respuesta(preguntas[escuela.multiple], [uno, tres]),
+            fila_respuesta(preguntas[larga.id], [largas[-1].id]),
+        ])
+        registrar_entrega(vista, escuela.otro_alumno, [fila_respuesta(preguntas[escuela.multiple], [uno])])
+        # Sin EntregaExamen: borrador autoguardado
+        guardar_respuestas([dict(fila_respuesta(preguntas[escuela.multiple], [uno, cuatro]), alumno_id=borrador)])
+        db.session.commit()
+        return {"borrador": borrador, "ultima": largas[-1].id}
+
+
+def test_alumnos_que_eligieron(app, escuela, respuestas):
+    uno, dos, tres, cuatro = escuela.opciones
+    with app.app_context():
+        assert alumnos_que_eligieron(uno) == sorted([escuela.alumno, escuela.otro_alumno])
+        assert alumnos_que_eligieron(dos) == []
+        assert alumnos_que_eligieron(tres) == [escuela.alumno]
+        assert alumnos_que_eligieron(cuatro) == []
+        assert alumnos_que_eligieron(cuatro, solo_entregadas=False) == [respuestas["borrador"]]
+        assert alumnos_que_eligieron(respuestas["ultima"]) == [escuela.alumno]
+
+
+def test_frecuencia_opciones(app, escuela, respuestas):
+    uno, dos, tres, cuatro = escuela.opciones
+    with app.app_context():
+        assert frecuencia_opciones(escuela.examen) == {uno: 2, tres: 1, respuestas["ultima"]: 1}
+        assert frecuencia_opciones(escuela.examen, solo_entregadas=False) == {
+            uno: 3, tres: 1, cuatro: 1, respuestas["ultima"]: 1,
+        }
@@ -0,0 +1,10 @@
+# wsgi.py
+# Punto de entrada para producción (run.py es solo para desarrollo):
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#   waitress-serve --threads 16 wsgi:app   (un solo proceso con hilos, sin fork)
+# En cada deploy, antes de arrancar: flask --app wsgi construir-estaticos
+from app import create_app
+from app.arranque import precalentar
+
+app = create_app()
+precalentar(app)